@@ -8,6 +8,7 @@ from openpyxl.styles import Font, PatternFill, Alignment, numbers
 import re
 import shutil
 from datetime import datetime
+import logging
 
 # Игнорируем предупреждения
 warnings.simplefilter("ignore")
@@ -16,6 +17,8 @@ warnings.simplefilter("ignore")
 DARK_RED = "8B0000"  # Темно-красный
 LIGHT_YELLOW = "FFFF99"  # Светло-желтый
 
+logger = logging.getLogger(__name__)
+
 def create_backup(file_path):
     """Создаёт резервную копию файла"""
     backup_dir = os.path.join(os.path.dirname(file_path), "backups")
@@ -243,15 +246,16 @@ def calculate_prices_for_section(ws, price_ws, section_row, next_section_row):
             logistics_part = part_length / total_length * logistics_cost if total_length > 0 else 0
             
             # Выводим в консоль значения для отладки
-            print(f"\nРасчет для ID: {id_cell.value}")
-            print(f"Длина детали: {part_length} мм")
-            print(f"Общая длина секции: {total_length} мм")
-            print(f"Logistics Cost секции: {logistics_cost}")
-            print(f"Логистическая часть: {part_length}/{total_length}*{logistics_cost} = {logistics_part:.2f}")
+            logger.debug("Расчет для ID: %s", id_cell.value)
+            logger.debug("Длина детали: %s мм", part_length)
+            logger.debug("Общая длина секции: %s мм", total_length)
+            logger.debug("Logistics Cost секции: %s", logistics_cost)
+            logger.debug("Логистическая часть: %s/%s*%s = %.2f", part_length, total_length, logistics_cost, logistics_part)
             
             # Итоговая цена
             price = contour_cost + cut_cost + logistics_part
-            print(f"Итоговая цена: {contour_cost:.2f} (контуры) + {cut_cost:.2f} (резка) + {logistics_part:.2f} (логистика) = {price:.2f}")
+            logger.debug("Итоговая цена: %.2f (контуры) + %.2f (резка) + %.2f (логистика) = %.2f",
+                         contour_cost, cut_cost, logistics_part, price)
                 
             # Записываем цену
             ws.cell(row=row, column=headers["Price(₽)"], value=round(price, 2))
@@ -553,6 +557,9 @@ def process_excel(input_path):
         print("⚠️ Изменения не сохранены. Используйте резервную копию при необходимости.")
 
 if __name__ == "__main__":
+    # Построчный расчёт цен (по пять строк на деталь) выводится при DEBUG_PRICES=1
+    logging.basicConfig(level=logging.DEBUG if os.environ.get("DEBUG_PRICES") else logging.INFO,
+                        format="%(message)s")
     print("📂 Выберите Excel-файл для обработки (.xlsx)")
     selected_file = select_file()
     process_excel(selected_file)
\ No newline at end of file
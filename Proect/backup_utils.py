@@ -1,23 +1,278 @@
 # backup_utils.py
+"""Резервные копии исходных файлов в хранилище с адресацией по содержимому.
 
+backups/objects/<2 символа>/<sha256>.xlsx[.gz] — уникальное содержимое, хранится один раз;
+backups/runs/<имя файла>.jsonl — журнал запусков: какой объект был исходником в каком запуске.
+
+По умолчанию хранилище лежит рядом с файлом; backup_dir (--backup-dir) задаёт общее хранилище.
+Журнал ищется по имени файла, поэтому файл, переехавший в другой каталог (watcher:
+processing/ → done/), восстанавливается из того же хранилища.
+
+Восстановление исходника запуска одной командой:
+    python backup_utils.py restore path/to/file_Nest.xlsx            # последний запуск
+    python backup_utils.py restore path/to/file_Nest.xlsx --run ID   # конкретный запуск
+    python backup_utils.py restore done/file_Nest.xlsx --backup-dir watch/backups
+    python backup_utils.py list path/to/file_Nest.xlsx
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
 import os
 import shutil
-from datetime import datetime
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from config import BACKUP_DIR, BACKUP_COMPRESSION, BACKUP_HARDLINK, BACKUP_KEEP_LAST, BACKUP_MAX_AGE_DAYS
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
-def create_backup(file_path):
-    """Создаёт резервную копию файла."""
-    backup_dir = os.path.join(os.path.dirname(file_path), "backups")
-    os.makedirs(backup_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"{os.path.splitext(os.path.basename(file_path))[0]}_backup_{timestamp}.xlsx"
-    backup_path = os.path.join(backup_dir, backup_name)
+_CHUNK = 1024 * 1024
+# ioctl FICLONE (Linux): копия-клон блоков файла на Btrfs/XFS без чтения и записи данных
+_FICLONE = 0x40049409
+# Объекты моложе этого срока не удаляются при сборке мусора: их может как раз записывать другой процесс
+_GC_GRACE_SECONDS = 60
+# Журналы запусков меняются под этой блокировкой (между потоками) и под flock (между процессами)
+_runs_lock = threading.Lock()
+
+def _store_dir(file_path, backup_dir=None):
+    if backup_dir:
+        return os.path.abspath(backup_dir)
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), BACKUP_DIR)
+
+def _runs_path(file_path, backup_dir=None):
+    return os.path.join(_store_dir(file_path, backup_dir), "runs", os.path.basename(file_path) + ".jsonl")
+
+def _object_path(store, digest, compression):
+    suffix = ".xlsx.gz" if compression == "gzip" else ".xlsx"
+    return os.path.join(store, "objects", digest[:2], digest + suffix)
+
+def file_digest(path):
+    """SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _clone_or_copy(src, dst):
+    """Клонирует файл (reflink), если файловая система умеет, иначе копирует."""
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    return "copy"
+
+def _link(src, dst):
+    """Жёсткая ссылка на исходник (тот же inode, без копирования); False, если не вышло
+    (другая файловая система, FAT, нет прав) — тогда объект клонируется или копируется."""
+    try:
+        os.link(src, dst)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+def _write_object(src, object_path, compression, hardlink=False):
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if compression == "gzip":
+            with open(src, "rb") as s, gzip.open(tmp_path, "wb") as d:
+                shutil.copyfileobj(s, d, _CHUNK)
+            method = "gzip"
+        elif hardlink and _link(src, tmp_path):
+            method = "hardlink"
+        else:
+            method = _clone_or_copy(src, tmp_path)
+        os.replace(tmp_path, object_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return method
+
+def read_runs(file_path, backup_dir=None):
+    """Записи журнала запусков файла, от старых к новым."""
+    path = _runs_path(file_path, backup_dir)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@contextmanager
+def _locked_runs(file_path, backup_dir=None):
+    """Исключительный доступ к журналу запусков файла: дописывание и обрезка не теряют строки
+    друг друга, даже если пишут потоки резервного копирования и рабочие процессы пакета."""
+    path = _runs_path(file_path, backup_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _runs_lock, open(path + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        yield path
+
+def _write_runs(file_path, runs, backup_dir=None):
+    """Перезаписывает журнал через уникальный временный файл; вызывается под _locked_runs."""
+    path = _runs_path(file_path, backup_dir)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
     try:
-        shutil.copy2(file_path, backup_path)
-        logger.info(f"✅ Создана резервная копия: {backup_path}")
-        return backup_path
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for run in runs:
+                f.write(json.dumps(run, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def create_backup(file_path, backup_dir=None, hardlink=BACKUP_HARDLINK):
+    """Сохраняет исходник в хранилище и возвращает путь объекта (None при ошибке).
+
+    Одинаковое содержимое хранится один раз: повторный запуск на неизменённом файле
+    добавляет только строку в журнал запусков. backup_dir — каталог хранилища
+    (None — BACKUP_DIR рядом с файлом); hardlink — объект без сжатия делается жёсткой
+    ссылкой на исходник (см. BACKUP_HARDLINK в config).
+    """
+    try:
+        store = _store_dir(file_path, backup_dir)
+        digest = file_digest(file_path)
+        object_path = _object_path(store, digest, BACKUP_COMPRESSION)
+        if os.path.exists(object_path):
+            # Свежая отметка времени защищает объект от сборки мусора в соседнем процессе
+            os.utime(object_path)
+            method = "dedup"
+        else:
+            method = _write_object(file_path, object_path, BACKUP_COMPRESSION, hardlink)
+
+        created = datetime.now()
+        run = {
+            "run": f"{created.strftime('%Y%m%d_%H%M%S_%f')}_{digest[:8]}",
+            "created": created.isoformat(timespec="seconds"),
+            "file": os.path.abspath(file_path),
+            "sha256": digest,
+            "size": os.path.getsize(file_path),
+            "object": os.path.relpath(object_path, store),
+        }
+        with _locked_runs(file_path, backup_dir) as runs_path, open(runs_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+        logger.info(f"✅ Создана резервная копия ({method}): {object_path}")
+        apply_retention(file_path, backup_dir=backup_dir)
+        return object_path
     except Exception as e:
         logger.error(f"❌ Ошибка при создании резервной копии: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def start_backup(file_path, backup_dir=None):
+    """Запускает create_backup в фоновом потоке и возвращает Future с путём копии.
+
+    Загрузка книги идёт параллельно; результат нужно дождаться до сохранения в исходный файл.
+    """
+    future = Future()
+
+    def run():
+        future.set_result(create_backup(file_path, backup_dir))
+
+    threading.Thread(target=run, name="backup", daemon=True).start()
+    return future
+
+def apply_retention(file_path, keep_last=BACKUP_KEEP_LAST, max_age_days=BACKUP_MAX_AGE_DAYS, backup_dir=None):
+    """Обрезает журнал файла по политике хранения и удаляет объекты, на которые никто не ссылается."""
+    with _locked_runs(file_path, backup_dir):
+        runs = read_runs(file_path, backup_dir)
+        kept = runs[-keep_last:] if keep_last else list(runs)
+        if max_age_days is not None:
+            cutoff = datetime.now() - timedelta(days=max_age_days)
+            # Последний запуск сохраняется всегда, иначе нечего будет восстанавливать
+            kept = [run for run in kept[:-1] if datetime.fromisoformat(run["created"]) >= cutoff] + kept[-1:]
+        if len(kept) == len(runs):
+            return 0
+        _write_runs(file_path, kept, backup_dir)
+    removed = collect_garbage(_store_dir(file_path, backup_dir))
+    logger.info(f"🧹 Политика хранения: удалено запусков {len(runs) - len(kept)}, объектов {removed}")
+    return removed
+
+def collect_garbage(store):
+    """Удаляет объекты, на которые не ссылается ни один журнал хранилища."""
+    referenced = set()
+    runs_dir = os.path.join(store, "runs")
+    if os.path.isdir(runs_dir):
+        for name in os.listdir(runs_dir):
+            if name.endswith(".jsonl"):
+                with open(os.path.join(runs_dir, name), encoding="utf-8") as f:
+                    referenced.update(os.path.normpath(json.loads(line)["object"]) for line in f if line.strip())
+    removed = 0
+    objects_dir = os.path.join(store, "objects")
+    now = time.time()
+    for root, _, files in os.walk(objects_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".tmp") or os.path.relpath(path, store) in referenced:
+                continue
+            if now - os.path.getmtime(path) < _GC_GRACE_SECONDS:
+                continue
+            os.remove(path)
+            removed += 1
+    return removed
+
+def restore_backup(file_path, run_id=None, target=None, backup_dir=None):
+    """Восстанавливает исходник запуска run_id (по умолчанию последнего) в target или на место файла."""
+    runs = read_runs(file_path, backup_dir)
+    if run_id is not None:
+        runs = [run for run in runs if run["run"] == run_id]
+    if not runs:
+        raise LookupError(f"Нет резервной копии для {file_path}" + (f" (запуск {run_id})" if run_id else ""))
+    run = runs[-1]
+    object_path = os.path.join(_store_dir(file_path, backup_dir), run["object"])
+    target = target or file_path
+    tmp_path = target + ".restore.tmp"
+    if object_path.endswith(".gz"):
+        with gzip.open(object_path, "rb") as s, open(tmp_path, "wb") as d:
+            shutil.copyfileobj(s, d, _CHUNK)
+    else:
+        _clone_or_copy(object_path, tmp_path)
+    if file_digest(tmp_path) != run["sha256"]:
+        os.remove(tmp_path)
+        raise ValueError(f"Контрольная сумма копии не совпадает: {object_path}")
+    os.replace(tmp_path, target)
+    logger.info(f"♻️ Восстановлен исходник запуска {run['run']}: {target}")
+    return run
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Резервные копии Nest-файлов: список и восстановление.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="Показать запуски файла")
+    list_parser.add_argument("file")
+    list_parser.add_argument("--backup-dir", default=None, help="Каталог хранилища (по умолчанию — рядом с файлом)")
+    restore_parser = commands.add_parser("restore", help="Восстановить исходник запуска")
+    restore_parser.add_argument("file")
+    restore_parser.add_argument("--backup-dir", default=None, help="Каталог хранилища (по умолчанию — рядом с файлом)")
+    restore_parser.add_argument("--run", default=None, help="Идентификатор запуска (по умолчанию — последний)")
+    restore_parser.add_argument("--to", default=None, help="Куда восстановить (по умолчанию — на место файла)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for run in read_runs(args.file, args.backup_dir):
+            print(f"{run['run']}  {run['created']}  {run['size']:>10}  {run['sha256'][:12]}")
+        return 0
+    try:
+        run = restore_backup(args.file, args.run, args.to, args.backup_dir)
+    except (LookupError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"♻️ Восстановлен запуск {run['run']} → {args.to or args.file}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+# batch.py
+
+import argparse
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+
+from log_setup import setup_worker_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERN = "*_Nest.xlsx"
+
+def collect_inputs(source, pattern=DEFAULT_PATTERN):
+    """Собирает список файлов: каталог (по шаблону) или glob-выражение."""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, pattern))
+    else:
+        paths = glob.glob(source)
+    return sorted(os.path.abspath(p) for p in paths if os.path.isfile(p))
+
+def process_file(input_path, price_file, profile=False, compresslevel=None, history=None, backup_dir=None):
+    """Обрабатывает один файл в рабочем процессе и возвращает запись манифеста.
+
+    history — база истории расчётов (None — QUOTE_HISTORY_DB из config, False — не писать);
+    backup_dir — каталог хранилища резервных копий (None — рядом с файлом).
+    """
+    from main import run_pipeline
+    from quote_history import history_target
+    from run_report import RunReport
+
+    started = time.perf_counter()
+    entry = {"file": input_path, "status": "ok", "error": None, "backup": None, "report": None}
+    report = RunReport(input_path)
+    try:
+        with report.profiled(profile):
+            entry["backup"] = run_pipeline(input_path, price_file, report, compresslevel,
+                                           history=history_target(history), backup_dir=backup_dir)
+    except Exception as e:
+        report.fail(e)
+        entry["status"] = "failed"
+        entry["error"] = f"{type(e).__name__}: {e}"
+        entry["traceback"] = traceback.format_exc()
+    try:
+        entry["report"] = report.write()
+    except OSError as e:
+        logger.warning(f"⚠️ Не удалось сохранить отчёт о запуске: {e}")
+    entry["seconds"] = round(time.perf_counter() - started, 3)
+    return entry
+
+def run_batch(inputs, price_file, workers=None, manifest_path=None, profile=False, compresslevel=None,
+              backup_dir=None):
+    """Обрабатывает файлы на пуле процессов, пишет манифест (JSON Lines).
+
+    compresslevel — уровень deflate при сохранении (1 — быстрее, для больших пакетов);
+    backup_dir — общее хранилище резервных копий (None — рядом с каждым файлом).
+    """
+    if not inputs:
+        logger.warning("⚠️ Нет файлов для пакетной обработки.")
+        return []
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"🚀 Пакетная обработка: {len(inputs)} файлов, процессов: {workers}")
+    started = time.perf_counter()
+    results = []
+    manifest = open(manifest_path, "w", encoding="utf-8") if manifest_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker_logging) as pool:
+            futures = {pool.submit(process_file, path, price_file, profile, compresslevel, None, backup_dir): path
+                       for path in inputs}
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except Exception as e:  # рабочий процесс упал целиком (BrokenProcessPool) — файл всё равно в манифесте
+                    entry = {"file": futures[future], "status": "failed", "error": f"{type(e).__name__}: {e}",
+                             "seconds": None}
+                results.append(entry)
+                if manifest:
+                    manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    manifest.flush()
+                if entry["status"] == "ok":
+                    logger.info(f"✅ {entry['file']} ({entry['seconds']} с)")
+                else:
+                    logger.error(f"❌ {entry['file']}: {entry['error']}")
+    finally:
+        if manifest:
+            manifest.close()
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for entry in results if entry["status"] != "ok")
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    logger.info(f"🏁 Готово: {len(results) - failed} успешно, {failed} с ошибками, "
+                f"{elapsed:.1f} с, {rate:.2f} файлов/с")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная обработка Nest-файлов без диалогов.")
+    parser.add_argument("source", help="Каталог с файлами или glob-шаблон (например 'in/*_Nest.xlsx')")
+    parser.add_argument("--price", required=True, help="Файл с ценами (Price.xlsx)")
+    parser.add_argument("--workers", type=int, default=None, help="Число рабочих процессов (по умолчанию — число CPU)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="Шаблон имён файлов при обработке каталога")
+    parser.add_argument("--manifest", default=None, help="Путь к манифесту (по умолчанию batch_manifest.jsonl рядом с файлами)")
+    parser.add_argument("--profile", action="store_true", help="Сохранять профиль cProfile для каждого файла")
+    parser.add_argument("--compresslevel", type=int, choices=range(10), default=None, metavar="0-9",
+                        help="Уровень сжатия xlsx при сохранении (по умолчанию — из config)")
+    parser.add_argument("--backup-dir", default=None,
+                        help="Каталог хранилища резервных копий (по умолчанию — backups рядом с каждым файлом)")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.source, args.pattern)
+    manifest_path = args.manifest
+    if manifest_path is None:
+        base_dir = args.source if os.path.isdir(args.source) else os.path.dirname(os.path.abspath(args.source))
+        manifest_path = os.path.join(base_dir, "batch_manifest.jsonl")
+    results = run_batch(inputs, os.path.abspath(args.price), args.workers, manifest_path, args.profile,
+                        args.compresslevel, args.backup_dir)
+    return 1 if any(entry["status"] != "ok" for entry in results) else 0
+
+if __name__ == "__main__":
+    from log_setup import setup_logging
+    setup_logging()
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+# benchmarks/bench_service.py
+"""Нагрузочный замер HTTP-сервиса (service.py): пропускная способность и задержка заданий.
+
+Запуск из каталога Proect:
+    python benchmarks/bench_service.py --jobs 20 --concurrency 4 --workers 2
+    python benchmarks/bench_service.py --url 127.0.0.1:8765 --price main --file a_Nest.xlsx
+
+Без --url сервис запускается в этом же процессе на свободном порту с синтетическим
+прайсом. Задержка — от отправки книги до готовности результата (включая ожидание в очереди).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from price_cache import load_price_table
+from service import JobService, http_request
+from nest_generator import write_nest_files
+
+async def run_job(host, port, data, price_id, poll_interval):
+    """Отправляет книгу и ждёт результат; возвращает (статус, секунды)."""
+    started = time.perf_counter()
+    status, _, body = await http_request(host, port, "POST", f"/jobs?price={price_id}&name=bench_Nest.xlsx", data)
+    if status != 202:
+        return f"http {status}", time.perf_counter() - started
+    job_id = json.loads(body)["id"]
+    while True:
+        _, _, body = await http_request(host, port, "GET", f"/jobs/{job_id}")
+        job = json.loads(body)
+        if job["status"] in ("done", "failed"):
+            break
+        await asyncio.sleep(poll_interval)
+    if job["status"] == "done":
+        await http_request(host, port, "GET", f"/jobs/{job_id}/result")
+    return job["status"], time.perf_counter() - started
+
+async def load(host, port, data, price_id, jobs, concurrency, poll_interval):
+    """jobs заданий, не больше concurrency одновременно от клиента."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            return await run_job(host, port, data, price_id, poll_interval)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(jobs)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(seconds for status, seconds in results if status == "done")
+    summary = {
+        "jobs": jobs,
+        "concurrency": concurrency,
+        "done": len(latencies),
+        "failed": jobs - len(latencies),
+        "seconds": round(elapsed, 3),
+        "jobs_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+    }
+    if latencies:
+        summary.update({
+            "latency_p50": round(statistics.median(latencies), 3),
+            "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "latency_max": round(latencies[-1], 3),
+        })
+    return summary
+
+async def bench_local(args, data, price_path, workdir):
+    service = JobService({"bench": load_price_table(price_path, use_cache=False)},
+                         os.path.join(workdir, "jobs"), args.workers, queue_limit=args.jobs)
+    port = await service.start("127.0.0.1", 0)
+    try:
+        return await load("127.0.0.1", port, data, "bench", args.jobs, args.concurrency, args.poll)
+    finally:
+        await service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="ХОСТ:ПОРТ работающего сервиса (по умолчанию — запуск в процессе)")
+    parser.add_argument("--price", default="bench", help="Идентификатор прайс-листа на сервисе (с --url)")
+    parser.add_argument("--file", default=None, help="Nest-книга для отправки (по умолчанию — синтетическая)")
+    parser.add_argument("--size", default="200x10", help="СЕКЦИИxДЕТАЛИ синтетической книги")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Одновременных заданий от клиента")
+    parser.add_argument("--workers", type=int, default=None, help="Процессов сервиса (без --url)")
+    parser.add_argument("--poll", type=float, default=0.05, help="Интервал опроса состояния, с")
+    parser.add_argument("--log-level", default="CRITICAL", help="Уровень логирования во время замера")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    with tempfile.TemporaryDirectory() as workdir:
+        sections, _, parts = args.size.lower().partition("x")
+        nest_path, price_path = write_nest_files(workdir, int(sections), int(parts))
+        with open(args.file or nest_path, "rb") as f:
+            data = f.read()
+        if args.url:
+            host, _, port = args.url.rpartition(":")
+            summary = asyncio.run(load(host, int(port), data, args.price, args.jobs, args.concurrency, args.poll))
+        else:
+            summary = asyncio.run(bench_local(args, data, price_path, workdir))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_styles.py
+"""Замер форматирования листа: время и размер xl/styles.xml, прежний способ против реестра стилей.
+
+Запуск из каталога Proect:
+    python benchmarks/bench_styles.py --sections 2000 --parts 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl.styles import Font, PatternFill, Alignment
+from config import DARK_RED, LIGHT_YELLOW, HEADER_NAMES
+from sheet_layout import scan_layout
+from formatting import apply_styles_to_sheet
+from bench_totals_rows import build_part_info
+
+def legacy_apply_styles(ws):
+    """Прежняя реализация: четыре any()/all() на строку и новые объекты стилей на каждую ячейку."""
+    for row in ws.iter_rows():
+        is_section = any(cell.value and isinstance(cell.value, str) and "section:" in str(cell.value).lower() for cell in row)
+        is_header = any(cell.value in HEADER_NAMES for cell in row)
+        is_result = any(cell.value and isinstance(cell.value, str) and ("total" in str(cell.value).lower() or "logistics cost:" in str(cell.value).lower()) for cell in row)
+        is_empty = all(cell.value is None for cell in row)
+        if is_section:
+            ws.row_dimensions[row[0].row].height = 35
+            for cell in row:
+                cell.font = Font(bold=True)
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+        elif is_header:
+            ws.row_dimensions[row[0].row].height = 25
+            for cell in row:
+                cell.font = Font(bold=True)
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+        elif is_result:
+            ws.row_dimensions[row[0].row].height = 35
+            for cell in row:
+                cell.font = Font(bold=True, color=DARK_RED)
+                cell.fill = PatternFill(start_color=LIGHT_YELLOW, end_color=LIGHT_YELLOW, fill_type="solid")
+        elif is_empty:
+            ws.row_dimensions[row[0].row].height = 35
+        else:
+            ws.row_dimensions[row[0].row].height = 15
+            for cell in row:
+                cell.font = Font(bold=False)
+
+def styles_xml_size(ws):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        ws.parent.save(path)
+        with zipfile.ZipFile(path) as archive:
+            return archive.getinfo("xl/styles.xml").file_size
+
+def run(name, sections, parts, styler):
+    ws = build_part_info(sections, parts)
+    started = time.perf_counter()
+    styler(ws)
+    seconds = time.perf_counter() - started
+    print(f"{name:<10} {ws.max_row:>8} {seconds:>8.3f} {styles_xml_size(ws):>12}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=2000)
+    parser.add_argument("--parts", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'способ':<10} {'строк':>8} {'сек':>8} {'styles.xml':>12}")
+    run("прежний", args.sections, args.parts, legacy_apply_styles)
+    run("реестр", args.sections, args.parts, lambda ws: apply_styles_to_sheet(ws, scan_layout(ws)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_suite.py
+"""Набор замеров конвейера по этапам на синтетических Nest-книгах, результат — JSON.
+
+Запуск из каталога Proect:
+    python benchmarks/bench_suite.py --sizes 100x10 500x20 2000x20 --output bench.json
+    python benchmarks/bench_suite.py --sizes 500x20 --compare bench.json
+
+Каждый размер задаётся как СЕКЦИИxДЕТАЛИ; время этапа — минимум по --repeat повторам.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import numpy
+import openpyxl
+import main as pipeline
+from run_report import RunReport
+from nest_generator import write_nest_files
+
+def bench_size(workdir, sections, parts, price_count, repeat):
+    """Замеряет один размер: этапы конвейера (по отчёту RunReport) и запуск целиком."""
+    source, price_path = write_nest_files(workdir, sections, parts, price_count)
+    work_path = os.path.join(workdir, "work_Nest.xlsx")
+    best_stages = None
+    best_total = None
+    for _ in range(repeat):
+        shutil.copyfile(source, work_path)
+        report = RunReport(work_path)
+        pipeline.run_pipeline(work_path, price_path, report)
+        result = report.to_dict()
+        stages = {name: entry["wall"] for name, entry in result["stages"].items()}
+        best_stages = stages if best_stages is None else {k: min(v, stages[k]) for k, v in best_stages.items()}
+        best_total = result["wall"] if best_total is None else min(best_total, result["wall"])
+        shutil.rmtree(os.path.join(workdir, "backups"), ignore_errors=True)
+
+    return {
+        "sections": sections,
+        "parts": parts,
+        "price_rows": price_count,
+        "rows": 1 + sections * (parts + 3),
+        "file_bytes": os.path.getsize(source),
+        "repeat": repeat,
+        "stages": best_stages,
+        "end_to_end": best_total,
+        "counters": result["counters"],
+        "peak_rss_mb": result["peak_rss_mb"],
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "openpyxl": openpyxl.__version__,
+        "numpy": numpy.__version__,
+    }
+
+def parse_size(text):
+    sections, _, parts = text.lower().partition("x")
+    return int(sections), int(parts)
+
+def compare(report, baseline):
+    """Печатает отношение времени к базовому отчёту (>1 — медленнее)."""
+    previous = {(r["sections"], r["parts"], r["price_rows"]): r for r in baseline["results"]}
+    print(f"сравнение с {baseline['environment'].get('commit')}:")
+    for result in report["results"]:
+        old = previous.get((result["sections"], result["parts"], result["price_rows"]))
+        if old is None:
+            continue
+        ratios = [f"{name} {seconds / old['stages'][name]:.2f}"
+                  for name, seconds in result["stages"].items() if old["stages"].get(name)]
+        total = result["end_to_end"] / old["end_to_end"] if old["end_to_end"] else float("nan")
+        print(f"  {result['sections']}x{result['parts']}: всего {total:.2f}; " + ", ".join(ratios))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["100x10", "500x20", "2000x20"], help="СЕКЦИИxДЕТАЛИ")
+    parser.add_argument("--price-rows", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Куда записать JSON (по умолчанию — stdout)")
+    parser.add_argument("--compare", default=None, help="JSON предыдущего замера для сравнения")
+    parser.add_argument("--log-level", default="CRITICAL", help="Уровень логирования конвейера во время замеров")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    report = {"environment": environment(), "results": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            sections, parts = parse_size(size)
+            result = bench_size(workdir, sections, parts, args.price_rows, args.repeat)
+            report["results"].append(result)
+            print(f"{size}: {result['end_to_end']:.3f} с", file=sys.stderr)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_totals_rows.py
+"""Замер вставки итоговых строк Part Info в зависимости от числа секций.
+
+Запуск из каталога Proect:
+    python benchmarks/bench_totals_rows.py --sections 250 500 1000 2000 --parts 10
+
+Для сравнения с прежним способом (ws.insert_rows на каждую секцию) — флаг --legacy.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from config import PART_INFO_SHEET, HEADER_NAMES
+from sheet_layout import scan_layout
+from part_info_processor import process_part_info_sheet
+
+def build_part_info(sections, parts):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = PART_INFO_SHEET
+    ws.append(["Part Info"])
+    for s in range(sections):
+        ws.append([f"Section: R{s} Толщина стенки: 5"])
+        ws.append(list(HEADER_NAMES))
+        for p in range(1, parts + 1):
+            ws.append([p, f"P{p}", 2, 1000 + p, 1, 2000, None])
+        ws.append([])
+    return ws
+
+def time_deferred(sections, parts):
+    ws = build_part_info(sections, parts)
+    started = time.perf_counter()
+    process_part_info_sheet(ws, None, scan_layout(ws))
+    return time.perf_counter() - started
+
+def time_legacy(sections, parts):
+    ws = build_part_info(sections, parts)
+    layout = scan_layout(ws)
+    started = time.perf_counter()
+    for section in reversed(layout.sections):
+        ws.insert_rows(section.last_data_row + 1)
+    return time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--parts", type=int, default=10)
+    parser.add_argument("--legacy", action="store_true", help="также замерить последовательные insert_rows")
+    args = parser.parse_args(argv)
+
+    print(f"{'секций':>8} {'строк':>8} {'сек':>8} {'мкс/секцию':>11}" + (f" {'legacy, сек':>12}" if args.legacy else ""))
+    for sections in args.sections:
+        seconds = time_deferred(sections, args.parts)
+        line = f"{sections:>8} {sections * (args.parts + 3):>8} {seconds:>8.3f} {seconds / sections * 1e6:>11.1f}"
+        if args.legacy:
+            line += f" {time_legacy(sections, args.parts):>12.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/nest_generator.py
+"""Генератор синтетических Nest-книг для замеров производительности.
+
+Книга повторяет структуру реальных выгрузок: лист Part Info (заголовок, секции с толщиной,
+таблицы деталей), Nesting  Summary и Tube Info с Tube Count, Price Data; первая строка
+и подписи секций объединены. Размер задаётся числом секций, деталей в секции и строк цен.
+
+Запуск из каталога Proect:
+    python benchmarks/nest_generator.py out_Nest.xlsx --sections 500 --parts 20 --price-rows 40
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from config import PART_INFO_SHEET, NESTING_SUMMARY_SHEET, TUBE_INFO_SHEET, PRICE_SHEET_NAME, HEADER_NAMES
+
+def price_rows(count):
+    """Строки Price Data: толщина, цена за трубу, цена за контур, цена за метр резки."""
+    rows = []
+    for i in range(count):
+        thickness = round(1 + i * 0.5, 1)
+        rows.append([thickness, 100 + 40 * i, f"{2 + i * 0.25:.2f}".replace(".", ","), 15 + i])
+    return rows
+
+def _fill_price_sheet(ws, rows):
+    ws.append(["Толщина", "Цена за трубу", "Контур", "Резка"])
+    for row in rows:
+        ws.append(row)
+
+def _part_row(rng, part_id):
+    """Строка детали с типичным для выгрузок разнобоем форматов."""
+    qty = rng.choice([1, 2, 4, "2", "3/4"])
+    length = rng.uniform(150, 6000)
+    length = f"{length:.1f}".replace(".", ",") if rng.random() < 0.5 else round(length, 2)
+    contour = rng.choice([1, 2, 3, 4.0])
+    cut = "ERROR:#VALUE!" if rng.random() < 0.02 else round(rng.uniform(200, 9000), 1)
+    return [part_id, f"P-{part_id:05d}", qty, length, contour, cut, None]
+
+def build_nest_workbook(sections, parts, price_count=40, seed=0):
+    """Строит книгу в памяти: sections секций по parts деталей и price_count строк цен."""
+    rng = random.Random(seed)
+    prices = price_rows(price_count)
+    max_thickness = prices[-1][0] if prices else 5
+
+    wb = Workbook()
+    part_info = wb.active
+    part_info.title = PART_INFO_SHEET
+    part_info.append(["Part Info Report"] + [None] * (len(HEADER_NAMES) - 1))
+    part_info.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(HEADER_NAMES))
+
+    summary = wb.create_sheet(NESTING_SUMMARY_SHEET)
+    summary.append(["Nesting Summary"])
+    summary.merge_cells("A1:D1")
+    tube_info = wb.create_sheet(TUBE_INFO_SHEET)
+
+    part_id = 0
+    for s in range(sections):
+        thickness = f"{rng.uniform(1, max_thickness):.1f}".replace(".", ",")
+        label = f"Section: R{s:04d} Толщина стенки: {thickness}"
+        part_info.append([label] + [None] * (len(HEADER_NAMES) - 1))
+        row = part_info.max_row
+        part_info.merge_cells(start_row=row, start_column=1, end_row=row, end_column=4)
+        part_info.append(list(HEADER_NAMES))
+        for _ in range(parts):
+            part_id += 1
+            part_info.append(_part_row(rng, part_id))
+        part_info.append([None])
+
+        tube_count = rng.randint(1, 12)
+        summary.append([label, None, f"Tube Count: {tube_count}"])
+        tube_info.append([label])
+        tube_info.append([tube_count])
+
+    _fill_price_sheet(wb.create_sheet(PRICE_SHEET_NAME), prices)
+    return wb
+
+def build_price_workbook(price_count=40):
+    """Отдельный файл цен, как его выбирает пользователь (первый лист)."""
+    wb = Workbook()
+    _fill_price_sheet(wb.active, price_rows(price_count))
+    return wb
+
+def write_nest_files(directory, sections, parts, price_count=40, seed=0):
+    """Сохраняет Nest-книгу и файл цен в directory; возвращает (путь книги, путь цен)."""
+    nest_path = os.path.join(directory, f"synthetic_{sections}x{parts}_Nest.xlsx")
+    price_path = os.path.join(directory, f"synthetic_price_{price_count}.xlsx")
+    build_nest_workbook(sections, parts, price_count, seed).save(nest_path)
+    build_price_workbook(price_count).save(price_path)
+    return nest_path, price_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="Путь к создаваемой Nest-книге")
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--parts", type=int, default=20)
+    parser.add_argument("--price-rows", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--price-output", default=None, help="Куда сохранить отдельный файл цен")
+    args = parser.parse_args(argv)
+
+    build_nest_workbook(args.sections, args.parts, args.price_rows, args.seed).save(args.output)
+    if args.price_output:
+        build_price_workbook(args.price_rows).save(args.price_output)
+    print(f"{args.output}: секций {args.sections}, деталей {args.sections * args.parts}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,104 @@
 # config.py
 
+import os
+
 DARK_RED = "8B0000"  # Темно-красный
 LIGHT_YELLOW = "FFFF99"  # Светло-жёлтый
 PRICE_SHEET_NAME = "Price Data"
 PART_INFO_SHEET = "Part Info"
 NESTING_SUMMARY_SHEET = "Nesting  Summary"
-TUBE_INFO_SHEET = "Tube Info"
\ No newline at end of file
+TUBE_INFO_SHEET = "Tube Info"
+HEADER_NAMES = ("ID", "Part Name", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)")
+PRICE_HEADER_NAMES = ("price(₽)", "цена")
+# Столбцы служебных значений в строке секции Part Info
+THICKNESS_COL = 5
+TUBE_COUNT_COL = 6
+LOGISTICS_COL = 7
+
+# Выборка при подборе ширины столбцов: (первые N строк целиком, далее каждая k-я).
+# (None, 1) — учитывать все строки.
+COLUMN_WIDTH_SAMPLING = (None, 1)
+
+# Каталог (рядом с обрабатываемым файлом) для JSON-отчётов о запусках и профилей cProfile
+RUN_REPORT_DIR = "reports"
+
+# Хранилище резервных копий: объекты по SHA-256 содержимого, журнал запусков по файлам.
+BACKUP_DIR = "backups"
+# Сжатие объектов: None или "gzip". xlsx — уже zip-архив, gzip экономит единицы процентов.
+BACKUP_COMPRESSION = None
+# Объект без сжатия — жёсткая ссылка на исходник вместо reflink/копии (та же файловая система).
+# Безопасно, пока исходник сохраняется заменой файла (save_workbook: os.replace), а не
+# перезаписью на месте: иначе изменилась бы и копия.
+BACKUP_HARDLINK = False
+# Хранение: сколько последних запусков держать на файл и максимальный возраст (дни, None — без ограничения)
+BACKUP_KEEP_LAST = 20
+BACKUP_MAX_AGE_DAYS = None
+
+# Инкрементальный пересчёт: секции Part Info, не изменившиеся с прошлого запуска, не пересчитываются.
+# Отпечатки секций хранятся в скрытом листе книги.
+INCREMENTAL_RECOMPUTE = True
+FINGERPRINT_SHEET = "_section_fingerprints"
+
+# Кэш разобранного прайс-листа (каталог рядом с файлом прайса); повторные запуски не открывают прайс
+PRICE_CACHE_DIR = ".price_cache"
+PRICE_CACHE_ENABLED = True
+
+# Чтение значений для расчётов: "openpyxl" — из загруженной книги (эталон), "xml" — потоковое
+# чтение только значений нужных листов (xlsx_reader). Действует в quote.py и на сбор Tube Count
+# в run_pipeline; книга для записи результата всегда загружается через openpyxl
+READER_BACKEND = "openpyxl"
+
+# Уровень сжатия deflate при сохранении книги (1 — быстрее, 9 — меньше файл, 0 — без сжатия)
+SAVE_COMPRESSLEVEL = 6
+
+# Расчёт цен секций Part Info на пуле процессов: число процессов (None — число CPU)
+# и наименьшее число секций, с которого пул окупает запуск процессов и передачу данных
+PRICING_WORKERS = None
+PRICING_PARALLEL_MIN_SECTIONS = 1000
+
+# Локальный HTTP-сервис (service.py): адрес, число рабочих процессов (None — число CPU),
+# длина очереди заданий, наибольший размер загружаемого файла (МБ), каталог файлов заданий
+# и сколько завершённых заданий хранить
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = None
+SERVICE_QUEUE_LIMIT = 32
+SERVICE_MAX_UPLOAD_MB = 50
+SERVICE_JOB_DIR = "service_jobs"
+SERVICE_KEEP_JOBS = 200
+
+# Режим демона (watcher.py): сколько секунд файл не должен меняться перед обработкой,
+# интервал сканирования каталога, число рабочих процессов (None — число CPU),
+# окно статистики в логе и подкаталоги для файлов в работе, готовых и с ошибками
+WATCH_SETTLE_SECONDS = 5
+WATCH_POLL_SECONDS = 2
+WATCH_WORKERS = None
+WATCH_STATS_SECONDS = 60
+WATCH_PROCESSING_DIR = "processing"
+WATCH_DONE_DIR = "done"
+WATCH_FAILED_DIR = "failed"
+
+# Режим бюджета памяти (main.py --memory-budget МБ): лист Part Info обрабатывается частями
+# по секциям. Бюджет по умолчанию (None — книга целиком в памяти), оценка памяти на ячейку
+# части листа со всеми этапами обработки (байт), доля бюджета на часть листа и доля на готовый
+# XML строк в памяти (сверх неё он пишется во временный файл на диске)
+MEMORY_BUDGET_MB = None
+MEMORY_BUDGET_CELL_BYTES = 1000
+MEMORY_BUDGET_CHUNK_SHARE = 0.5
+MEMORY_BUDGET_SPOOL_SHARE = 0.25
+
+# Выгрузка рассчитанных цен таблицами (price_export): форматы по умолчанию ("csv", "parquet",
+# "sqlite"; пусто — не выгружать), каталог рядом с книгой и имя базы SQLite в нём
+EXPORT_FORMATS = ()
+EXPORT_DIR = "exports"
+EXPORT_SQLITE_NAME = "prices.sqlite"
+
+# История расчётов (quote_history.py): база SQLite, куда дописываются секции и детали каждой обработанной
+# книги — из main.py, пакета, демона и сервиса. По умолчанию — в каталоге пользователя, а не рядом с
+# программой; переменная окружения NEST_QUOTE_HISTORY_DB задаёт другой путь, пустая — отключает историю.
+# None — историю не вести
+QUOTE_HISTORY_DB = os.environ.get("NEST_QUOTE_HISTORY_DB",
+                                  os.path.join(os.path.expanduser("~"), ".nest_processing", "quote_history.sqlite"))
+
+# Сводный отчёт по обработанным файлам (consolidate.py): число рабочих процессов (None — число CPU)
+CONSOLIDATE_WORKERS = None
@@ -0,0 +1,231 @@
+# consolidate.py
+"""Сводный отчёт по обработанным Nest-файлам: итоги по толщинам и по секциям.
+
+    python consolidate.py in/ --since 2026-07-01 --until 2026-10-01 --output Сводка.xlsx
+
+Из каждой книги читается только лист Part Info — потоково и только значения
+(XlsxValuesReader.iter_sheet_rows), без загрузки листа целиком: строки секций (имя, толщина,
+Tube Count, Logistics Cost) и строки итогов, записанные конвейером (Total Qty / Length /
+Cut Length / Price Section). Книги читаются на пуле процессов, в работе одновременно не больше
+2 × процессов файлов; итоги файла сразу складываются в общие, а строка листа «Файлы» пишется
+в книгу write-only по мере готовности — память не растёт с числом файлов.
+Период (--since, --until) — по времени изменения файла.
+"""
+
+import argparse
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from batch import DEFAULT_PATTERN, collect_inputs
+from config import PART_INFO_SHEET, CONSOLIDATE_WORKERS
+from formatting import BOLD_FONT
+from log_setup import setup_worker_logging
+from section_header import parse_section_row
+from sheet_layout import ROW_SECTION, ROW_RESULT, TOTAL_PRICE_LABEL, classify_row
+from workbook_writer import save_workbook
+from xlsx_reader import ValueCell, XlsxValuesReader
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Показатели группы (толщины или секции) в порядке столбцов отчёта
+FIELDS = ("files", "sections", "tubes", "qty", "length_mm", "cut_mm", "total_price", "logistics_cost")
+_HEADERS = ("Файлов", "Секций", "Труб", "Деталей, шт", "Длина, м", "Резка, м", "Стоимость, ₽", "Logistics Cost, ₽")
+
+# Подписи строки итогов секции -> показатель
+_TOTAL_LABELS = (
+    ("Total Qty:", "qty"),
+    ("Total Length:", "length_mm"),
+    ("Total Cut Length:", "cut_mm"),
+    ("Total Price Section:", "total_price"),
+)
+
+THICKNESS_SHEET = "По толщинам"
+SECTION_SHEET = "По секциям"
+FILES_SHEET = "Файлы"
+
+def _label_value(text):
+    try:
+        return float(text.partition(":")[2])
+    except ValueError:
+        return None
+
+def _add(groups, key, values):
+    totals = groups.get(key)
+    if totals is None:
+        totals = groups[key] = [0] * len(FIELDS)
+    for index, value in enumerate(values):
+        if value:
+            totals[index] += value
+
+def _section_values(header, totals):
+    values = dict(totals or {}, files=0, sections=1, tubes=header.tube_count, logistics_cost=header.logistics_cost)
+    return [values.get(name) for name in FIELDS]
+
+def summarize_workbook(path):
+    """Итоги одной обработанной книги: {"thickness": {толщина: [FIELDS]}, "section": {(имя, толщина): [FIELDS]}}."""
+    by_thickness = {}
+    by_section = {}
+    sections = 0
+
+    def close(header, totals):
+        thickness = round(header.thickness, 2) if header.thickness is not None else None
+        values = _section_values(header, totals)
+        _add(by_thickness, thickness, values)
+        _add(by_section, (header.name, thickness), values)
+
+    with XlsxValuesReader(path) as book:
+        if PART_INFO_SHEET not in book:
+            return {"file": path, "status": "skipped", "error": f"нет листа '{PART_INFO_SHEET}'"}
+        header = totals = None
+        for row_number, values in book.iter_sheet_rows(PART_INFO_SHEET):
+            kind, label = classify_row(values)
+            if kind == ROW_SECTION and label.lower().lstrip().startswith(TOTAL_PRICE_LABEL):
+                kind = ROW_RESULT   # как в scan_layout: итог цены новую секцию не начинает
+            if kind == ROW_SECTION:
+                if header is not None:
+                    close(header, totals)
+                sections += 1
+                header = parse_section_row([ValueCell(row_number, column, value)
+                                            for column, value in enumerate(values, start=1)])
+                totals = None
+            elif kind == ROW_RESULT and header is not None and totals is None:
+                # Первая строка итогов после деталей — та, что записал конвейер
+                found = {}
+                for value in values:
+                    if isinstance(value, str):
+                        for label, name in _TOTAL_LABELS:
+                            if value.startswith(label):
+                                found[name] = _label_value(value)
+                if found:
+                    totals = found
+        if header is not None:
+            close(header, totals)
+
+    # Книга попадает в каждую свою группу один раз
+    for groups in (by_thickness, by_section):
+        for group in groups.values():
+            group[0] = 1
+    return {"file": path, "status": "ok", "error": None, "sections": sections,
+            "thickness": by_thickness, "section": by_section}
+
+def _summarize_one(path):
+    """summarize_workbook для рабочего процесса: ошибка файла не останавливает отчёт."""
+    try:
+        return summarize_workbook(path)
+    except Exception as e:
+        return {"file": path, "status": "failed", "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc()}
+
+def _summaries(paths, workers):
+    """Итоги файлов по мере готовности; в пул отдано не больше 2 × workers файлов сразу."""
+    if workers == 1:
+        for path in paths:
+            yield _summarize_one(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker_logging) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(_summarize_one, path))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def _in_period(path, since=None, until=None):
+    """Время изменения файла в [since, until); даты — "ГГГГ-ММ-ДД"."""
+    modified = datetime.fromtimestamp(os.stat(path).st_mtime).strftime("%Y-%m-%d")
+    return (not since or modified >= since) and (not until or modified < until)
+
+def _bold_row(ws, values):
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = BOLD_FONT
+        cells.append(cell)
+    return cells
+
+def _report_values(totals):
+    values = dict(zip(FIELDS, totals))
+    return [values["files"], values["sections"], values["tubes"], values["qty"],
+            round(values["length_mm"] / 1000, 3), round(values["cut_mm"] / 1000, 3),
+            round(values["total_price"], 2), round(values["logistics_cost"], 2)]
+
+def _sort_key(key):
+    # Группы без толщины — в конце
+    return (key is None, key if key is not None else 0)
+
+def consolidate(inputs, output, workers=None, since=None, until=None):
+    """Сводный отчёт по файлам inputs в output (xlsx). Возвращает {"files", "failed", "sections"}."""
+    workers = workers or CONSOLIDATE_WORKERS or os.cpu_count() or 1
+    paths = (path for path in inputs if _in_period(path, since, until))
+    logger.info(f"📊 Сводный отчёт: файлов {len(inputs)}, процессов: {workers}")
+
+    wb = Workbook(write_only=True)
+    thickness_ws = wb.create_sheet(THICKNESS_SHEET)
+    section_ws = wb.create_sheet(SECTION_SHEET)
+    files_ws = wb.create_sheet(FILES_SHEET)
+    thickness_ws.append(_bold_row(thickness_ws, ("Толщина, мм",) + _HEADERS))
+    section_ws.append(_bold_row(section_ws, ("Секция", "Толщина, мм") + _HEADERS))
+    files_ws.append(_bold_row(files_ws, ("Файл", "Секций", "Стоимость, ₽", "Ошибка")))
+
+    by_thickness = {}
+    by_section = {}
+    files = failed = sections = 0
+    for entry in _summaries(paths, workers):
+        if entry["status"] != "ok":
+            failed += 1
+            logger.error(f"❌ {entry['file']}: {entry['error']}")
+            files_ws.append([os.path.basename(entry["file"]), None, None, entry["error"]])
+            continue
+        files += 1
+        sections += entry["sections"]
+        for key, values in entry["thickness"].items():
+            _add(by_thickness, key, values)
+        for key, values in entry["section"].items():
+            _add(by_section, key, values)
+        price = sum(values[FIELDS.index("total_price")] for values in entry["thickness"].values())
+        files_ws.append([os.path.basename(entry["file"]), entry["sections"], round(price, 2), None])
+
+    for key in sorted(by_thickness, key=_sort_key):
+        thickness_ws.append([key] + _report_values(by_thickness[key]))
+    grand = [sum(values[index] for values in by_thickness.values()) for index in range(len(FIELDS))]
+    grand[0] = files
+    thickness_ws.append(_bold_row(thickness_ws, ["Итого"] + _report_values(grand)))
+    for name, thickness in sorted(by_section, key=lambda key: (str(key[0]), _sort_key(key[1]))):
+        section_ws.append([name, thickness] + _report_values(by_section[(name, thickness)]))
+
+    save_workbook(wb, output)
+    logger.info(f"✅ Сводный отчёт сохранён: {output} (файлов {files}, с ошибками {failed}, секций {sections})")
+    return {"files": files, "failed": failed, "sections": sections}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводный отчёт по обработанным Nest-файлам.")
+    parser.add_argument("source", help="Каталог с файлами или glob-шаблон (например 'done/*_Nest.xlsx')")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="Шаблон имён файлов при обработке каталога")
+    parser.add_argument("--since", default=None, help="Файлы, изменённые с даты (ГГГГ-ММ-ДД)")
+    parser.add_argument("--until", default=None, help="Файлы, изменённые до даты, не включая её (ГГГГ-ММ-ДД)")
+    parser.add_argument("--workers", type=int, default=None, help="Число рабочих процессов (по умолчанию — число CPU)")
+    parser.add_argument("--output", default=None,
+                        help="Файл отчёта (по умолчанию consolidated_<дата>.xlsx рядом с файлами)")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.source, args.pattern)
+    output = args.output
+    if output is None:
+        base_dir = args.source if os.path.isdir(args.source) else os.path.dirname(os.path.abspath(args.source))
+        output = os.path.join(base_dir, f"consolidated_{datetime.now():%Y%m%d_%H%M%S}.xlsx")
+    stats = consolidate(inputs, output, args.workers, args.since, args.until)
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    from log_setup import setup_logging
+    setup_logging()
+    raise SystemExit(main())
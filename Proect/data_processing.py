@@ -2,55 +2,145 @@
 
 import math
 import re
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
 import logging
+# Разбор текста строк секций вынесен в section_header; имена оставлены для прежних импортов
+from section_header import extract_thickness_value, get_section_name
 
 logger = logging.getLogger(__name__)
 
 def try_convert(value):
-    """Преобразует значение в число."""
+    """Преобразует значение в число.
+
+    Вызывается для каждой ячейки, поэтому отладочные сообщения форматируются лениво
+    и только при включённом уровне DEBUG.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
     if value is None or value == "ERROR:#VALUE!":
-        logger.debug(f"🚫 Значение пропущено: {value}")
+        if debug:
+            logger.debug("🚫 Значение пропущено: %s", value)
         return None, None
     if isinstance(value, (int, float)):
         converted = math.ceil(value) if value != int(value) else int(value)
-        logger.debug(f"🔢 Преобразовано число: {value} → {converted}")
+        if debug:
+            logger.debug("🔢 Преобразовано число: %s → %s", value, converted)
         return converted, '0'
     if isinstance(value, str):
         value = value.strip()
         if '/' in value and value.replace('/', '', 1).isdigit():
             converted = int(value.split('/')[0])
-            logger.debug(f"🔢 Преобразовано дробное значение: {value} → {converted}")
+            if debug:
+                logger.debug("🔢 Преобразовано дробное значение: %s → %s", value, converted)
             return converted, '0'
         try:
             num = float(value.replace(',', '.'))
             converted = math.ceil(num) if num != int(num) else int(num)
-            logger.debug(f"🔢 Преобразовано значение: {value} → {converted}")
+            if debug:
+                logger.debug("🔢 Преобразовано значение: %s → %s", value, converted)
             return converted, '0'
         except ValueError:
-            logger.debug(f"🔤 Не удалось преобразовать строку: {value}")
+            if debug:
+                logger.debug("🔤 Не удалось преобразовать строку: %s", value)
             return value, None
-    logger.debug(f"🔁 Без изменений: {value}")
+    if debug:
+        logger.debug("🔁 Без изменений: %s", value)
     return value, None
 
-def extract_thickness_value(text, keyword):
-    """Извлекает значение толщины из текста."""
-    try:
-        pattern = re.compile(rf"{re.escape(keyword)}[^\d]*([\d,\.]+)")
-        matches = pattern.findall(text.lower())
-        if matches:
-            value = float(matches[-1].replace(',', '.'))
-            logger.debug(f"📐 Извлечена толщина: {value}")
-            return value
-    except Exception as e:
-        logger.error(f"❌ Ошибка при извлечении толщины: {e}")
-    return None
-
-def get_section_name(cell_value):
-    """Извлекает название секции."""
-    if not isinstance(cell_value, str):
-        return None
-    match = re.search(r'section:\s*(.+?)(?:\s*толщина|thickness|$)', cell_value.lower())
-    if match:
-        logger.debug(f"🔖 Извлечено имя секции: {match.group(1).strip()}")
-        return match.group(1).strip()
-    return None
\ No newline at end of file
+# Быстрый разбор строк в ValueConverter. Число без экспоненты из цифр ASCII с точкой или запятой
+# float() разбирает всегда, конечным значением — результат совпадает с try_convert.
+_PLAIN_NUMBER = re.compile(r"[+-]?(?:[0-9]+(?:[.,][0-9]*)?|[.,][0-9]+)")
+# Символ, которого не бывает в строке, разбираемой float() (цифры, знак, точка, запятая,
+# экспонента, "_", пробелы, inf / infinity / nan) — такая строка точно не число
+_NOT_NUMBER_CHAR = re.compile(r"[^\d\s+\-.,eE_infatyINFATY]")
+
+# Сколько различных строк листа запоминает ValueConverter (память не растёт с размером листа)
+CONVERT_MEMO_SIZE = 65536
+
+class ValueConverter:
+    """try_convert для ячеек листа: быстрый путь для обычных чисел и текста, который не может
+    быть числом (таблица символов), память результатов для повторяющихся строк (имена деталей,
+    подписи), запись в ячейку только при изменении значения или формата.
+
+    converted — ячеек, ставших числами; rewritten — ячеек, в которые действительно записано
+    значение или формат. Строки, не подходящие под быстрый путь (дроби "1/2", экспонента,
+    не-ASCII цифры, подписи с цифрами из одних "похожих на число" символов), разбираются
+    самим try_convert.
+    """
+
+    def __init__(self):
+        self._memo = {}
+        self.converted = 0
+        self.rewritten = 0
+
+    def convert(self, value):
+        """То же, что try_convert(value)."""
+        kind = type(value)
+        if kind is str:
+            result = self._memo.get(value)
+            if result is None:
+                result = self._convert_text(value)
+                if len(self._memo) < CONVERT_MEMO_SIZE:
+                    self._memo[value] = result
+            return result
+        if kind is int:
+            return value, '0'
+        if kind is float and math.isfinite(value):
+            return (int(value) if value.is_integer() else math.ceil(value)), '0'
+        return try_convert(value)
+
+    @staticmethod
+    def _convert_text(value):
+        text = value.strip()
+        if _PLAIN_NUMBER.fullmatch(text):
+            number = float(text.replace(',', '.'))
+            return (int(number) if number.is_integer() else math.ceil(number)), '0'
+        if value == "ERROR:#VALUE!":
+            return None, None
+        if '/' not in text and _NOT_NUMBER_CHAR.search(text):
+            return text, None
+        return try_convert(value)
+
+    def convert_sheet(self, ws, widths=None, skip_rows=None):
+        """Преобразует значения ячеек листа; возвращает число ячеек, ставших числами."""
+        if logger.isEnabledFor(logging.DEBUG):
+            convert = try_convert   # с отладочными сообщениями по каждой ячейке
+        else:
+            convert = self.convert
+        converted = rewritten = 0
+        for row in ws.iter_rows():
+            if skip_rows and row and row[0].row in skip_rows:
+                if widths is not None:
+                    widths.observe_cells(row)
+                continue
+            for cell in row:
+                value = cell.value
+                if value is None:
+                    continue
+                converted_value, number_format = convert(value)
+                if converted_value is None:
+                    continue
+                changed = False
+                if type(converted_value) is not type(value) or converted_value != value:
+                    cell.value = converted_value
+                    changed = True
+                if number_format:
+                    converted += 1
+                    style = cell._style
+                    if style is None or style.numFmtId != BUILTIN_FORMATS_REVERSE[number_format]:
+                        cell.number_format = number_format
+                        changed = True
+                rewritten += changed
+            if widths is not None:
+                widths.observe_cells(row)
+        self.converted += converted
+        self.rewritten += rewritten
+        return converted
+
+def convert_sheet_values(ws, widths=None, skip_rows=None, converter=None):
+    """Преобразует значения всех ячеек листа (try_convert) и возвращает число ячеек, ставших числами.
+
+    widths — ColumnWidthTracker, которому передаётся каждая строка после преобразования;
+    skip_rows — номера строк, которые не меняются (только учитываются в ширине);
+    converter — ValueConverter листа (память строк и счётчик rewritten), по умолчанию новый.
+    """
+    return (converter or ValueConverter()).convert_sheet(ws, widths, skip_rows)
@@ -1,6 +1,8 @@
 # excel_utils.py
 
+from bisect import bisect_right
 from openpyxl.utils import get_column_letter
+from formatting import StyleRegistry, BOLD_FONT, CENTER_ALIGNMENT
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,23 +13,160 @@ def unmerge_cells_without_filling(ws):
         ws.unmerge_cells(str(merged_range))
     logger.debug(f"🔧 Разъединены объединённые ячейки на листе '{ws.title}'.")
 
-def merge_first_row(ws):
-    """Объединяет первую строку, если есть данные."""
+def merge_first_row(ws, last_col=None):
+    """Объединяет первую строку, если есть данные.
+
+    last_col — последний столбец листа с непустым значением, если он уже известен
+    (лист обрабатывается частями и в памяти не целиком).
+    """
     if ws.max_row == 0 or ws.max_column == 0:
         logger.debug(f"🚫 Нет данных для объединения первой строки на листе '{ws.title}'.")
         return
-    last_col = max((cell.column for row in ws.iter_rows() for cell in row if cell.value), default=0)
+    if last_col is None:
+        last_col = max((cell.column for row in ws.iter_rows() for cell in row if cell.value), default=0)
     if last_col > 1:
         ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=last_col)
         logger.debug(f"🔗 Объединена первая строка на листе '{ws.title}'.")
         if ws.cell(row=1, column=1).value:
-            ws.cell(row=1, column=1).alignment = Alignment(horizontal='center', vertical='center')
-            ws.cell(row=1, column=1).font = Font(bold=True)
-
-def auto_adjust_column_width(ws):
-    """Автоподбор ширины столбцов."""
-    for column in ws.columns:
-        max_length = max((len(str(cell.value)) for cell in column if cell.value), default=0)
-        adjusted_width = max_length + 2
-        ws.column_dimensions[get_column_letter(column[0].column)].width = adjusted_width
-    logger.debug(f"📏 Автоподбор ширины столбцов выполнен для листа '{ws.title}'.")
\ No newline at end of file
+            StyleRegistry.for_workbook(ws.parent).apply([ws.cell(row=1, column=1)], font=BOLD_FONT, alignment=CENTER_ALIGNMENT)
+
+class ColumnWidthTracker:
+    """Накопитель ширины столбцов: максимум len(str(value)) по столбцу, собранный попутно.
+
+    Значения учитываются в момент преобразования и записи ячеек, отдельного прохода по листу
+    нет. В режиме выборки (sample_head, sample_step) после первых sample_head строк учитывается
+    только каждая sample_step-я; явные записи через observe() учитываются всегда.
+
+    Перезапись уже учтённой ячейки сообщается через forget(старое значение): для каждого
+    столбца хранится, сколько значений имеют максимальную длину, и если перезаписаны все,
+    столбец перемеряется по листу (refresh) — ширина совпадает с полным проходом по итоговым
+    значениям, а не растёт от затёртых.
+    """
+
+    def __init__(self, sample_head=None, sample_step=1):
+        self.max_lengths = {}
+        self.sample_head = sample_head
+        self.sample_step = max(1, sample_step)
+        self._rows_seen = 0
+        self._max_counts = {}   # столбец -> сколько учтённых значений имеют длину max_lengths[столбец]
+        self._stale = set()     # столбцы, чей максимум перезаписан: перемеряются в refresh()
+
+    def observe(self, column, value):
+        """Учитывает значение, записанное в столбец column."""
+        if value:
+            length = len(str(value))
+            current = self.max_lengths.get(column, 0)
+            if length > current:
+                self.max_lengths[column] = length
+                self._max_counts[column] = 1
+            elif length == current:
+                self._max_counts[column] += 1
+
+    def observe_cells(self, cells):
+        """Учитывает строку ячеек (с учётом режима выборки)."""
+        self._rows_seen += 1
+        if self.sample_head is not None and self._rows_seen > self.sample_head \
+                and (self._rows_seen - self.sample_head) % self.sample_step:
+            return
+        max_lengths = self.max_lengths
+        max_counts = self._max_counts
+        for cell in cells:
+            value = cell.value
+            if value:
+                length = len(str(value))
+                current = max_lengths.get(cell.column, 0)
+                if length > current:
+                    max_lengths[cell.column] = length
+                    max_counts[cell.column] = 1
+                elif length == current:
+                    max_counts[cell.column] += 1
+
+    def forget(self, column, value):
+        """Сообщает, что учтённое значение столбца column сейчас будет перезаписано."""
+        if value and column not in self._stale and len(str(value)) == self.max_lengths.get(column, 0):
+            self._max_counts[column] -= 1
+            if self._max_counts[column] <= 0:
+                self._stale.add(column)
+
+    def reset_column(self, column):
+        """Забывает значения столбца (например, после его очистки)."""
+        self.max_lengths.pop(column, None)
+        self._max_counts.pop(column, None)
+        self._stale.discard(column)
+
+    def refresh(self, ws):
+        """Перемеряет по листу ws столбцы, максимальные значения которых были перезаписаны."""
+        for column in sorted(self._stale):
+            self.reset_column(column)
+            for (value,) in ws.iter_rows(min_col=column, max_col=column, values_only=True):
+                self.observe(column, value)
+        self._stale.clear()
+
+    def fork(self):
+        """Пустой накопитель с теми же настройками выборки и счётчиком строк — для части листа."""
+        tracker = ColumnWidthTracker(self.sample_head, self.sample_step)
+        tracker._rows_seen = self._rows_seen
+        return tracker
+
+    def merge(self, other):
+        """Добавляет максимумы накопителя части листа (см. fork); other.refresh() — до слияния."""
+        max_lengths = self.max_lengths
+        for column, length in other.max_lengths.items():
+            current = max_lengths.get(column, 0)
+            if length > current:
+                max_lengths[column] = length
+                self._max_counts[column] = other._max_counts[column]
+            elif length == current:
+                self._max_counts[column] += other._max_counts[column]
+        self._rows_seen = max(self._rows_seen, other._rows_seen)
+
+    def apply(self, ws, min_column=None, max_column=None):
+        """Выставляет ширину всех столбцов листа (или столбцов min_column..max_column): максимум + 2."""
+        self.refresh(ws)
+        min_column = ws.min_column if min_column is None else min_column
+        max_column = ws.max_column if max_column is None else max_column
+        for column in range(min_column, max_column + 1):
+            ws.column_dimensions[get_column_letter(column)].width = self.max_lengths.get(column, 0) + 2
+        logger.debug(f"📏 Ширина столбцов выставлена для листа '{ws.title}'.")
+
+def insert_blank_rows(ws, rows):
+    """Вставляет по пустой строке перед каждой строкой из rows за одну перестройку листа.
+
+    Результат совпадает с последовательными ws.insert_rows() снизу вверх, но ячейки
+    сдвигаются один раз, а не при каждой вставке. Вместе с ячейками сдвигаются высоты и
+    параметры строк (row_dimensions), объединённые ячейки и ссылки гиперссылок — их
+    ws.insert_rows не переносит. Возвращает словарь
+    {исходный номер строки: номер вставленной пустой строки}.
+    """
+    positions = sorted(rows)
+    if not positions:
+        return {}
+    moved = {}
+    for (row, column), cell in ws._cells.items():
+        shift = bisect_right(positions, row)
+        if shift:
+            cell.row = row + shift
+            hyperlink = getattr(cell, "hyperlink", None)
+            if hyperlink is not None:
+                hyperlink.ref = cell.coordinate
+        moved[(row + shift, column)] = cell
+    ws._cells = moved
+    ws._current_row = ws.max_row
+
+    dimensions = sorted(ws.row_dimensions.items())
+    ws.row_dimensions.clear()
+    for row, dimension in dimensions:
+        dimension.index = row + bisect_right(positions, row)
+        ws.row_dimensions[dimension.index] = dimension
+
+    for merged in ws.merged_cells.ranges:
+        min_row = merged.min_row + bisect_right(positions, merged.min_row)
+        max_row = merged.max_row + bisect_right(positions, merged.max_row)
+        if (min_row, max_row) != (merged.min_row, merged.max_row):
+            grown = max_row - min_row != merged.max_row - merged.min_row
+            merged.min_row, merged.max_row = min_row, max_row
+            if grown:
+                # Вставка внутри объединения: новые строки тоже становятся его частью
+                merged.format()
+    logger.debug(f"➕ Вставлено строк на листе '{ws.title}': {len(positions)}")
+    return {position: position + index for index, position in enumerate(positions)}
\ No newline at end of file
@@ -0,0 +1,87 @@
+# fingerprints.py
+"""Отпечатки секций Part Info для инкрементального пересчёта.
+
+Отпечаток секции — хеш всех значений её строк (от строки "Section:" до следующей секции)
+вместе с данными, от которых зависит расчёт: ставки Price Data для её толщины, цена трубы
+и Tube Count с листа Nesting Summary / Tube Info. Отпечатки результата сохраняются в скрытом
+листе книги; при следующем запуске секция с тем же отпечатком не пересчитывается.
+"""
+
+import hashlib
+import math
+from collections import Counter
+from config import FINGERPRINT_SHEET
+from section_header import parse_section_row
+from sheet_layout import section_row_cells
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении правил расчёта: старые отпечатки тогда не используются
+FINGERPRINT_VERSION = 1
+
+def _normalized(value):
+    """Число в файле может вернуться другим типом (2.0 записывается как 2) — сравниваем как float."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def _section_dependencies(ws, section, price_index, section_tube_counts):
+    """Внешние данные, от которых зависит результат секции."""
+    header = parse_section_row(section_row_cells(ws, section))
+    rates = tube_price = None
+    if price_index is not None:
+        if header.thickness is not None:
+            rates = price_index.nearest(header.thickness)
+        if header.thicknesses:
+            tube_price = price_index.tube_price(math.ceil(header.max_thickness))
+    rates = (rates['C'], rates['D']) if rates else None
+    return rates, tube_price, section_tube_counts.lookup(section.label)
+
+def section_fingerprints(ws, layout, price_index, section_tube_counts):
+    """Список (ключ секции, отпечаток, SectionLayout) в порядке секций листа.
+
+    Ключ — текст строки секции и номер его повторения, чтобы совпадающие подписи не путались.
+    """
+    max_col = ws.max_column
+    per_section = []
+    for section in layout.sections:
+        # Пустые ячейки в файл не сохраняются, поэтому в отпечаток входят только значения
+        cells = []
+        rows = ws.iter_rows(min_row=section.row, max_row=section.end_row, max_col=max_col, values_only=True)
+        for offset, values in enumerate(rows):
+            for column, value in enumerate(values, start=1):
+                if value is not None:
+                    cells.append((offset, column, _normalized(value)))
+        per_section.append(cells)
+
+    occurrences = Counter()
+    result = []
+    for section, cells in zip(layout.sections, per_section):
+        digest = hashlib.blake2b(repr(cells).encode("utf-8"), digest_size=16)
+        digest.update(repr(_section_dependencies(ws, section, price_index, section_tube_counts)).encode("utf-8"))
+        occurrences[section.label] += 1
+        result.append(((section.label, occurrences[section.label]), digest.hexdigest(), section))
+    return result
+
+def load_fingerprints(wb):
+    """Сохранённые отпечатки {ключ: отпечаток} или None, если их нет или они другой версии."""
+    if FINGERPRINT_SHEET not in wb.sheetnames:
+        return None
+    rows = wb[FINGERPRINT_SHEET].iter_rows(values_only=True)
+    first = next(rows, None)
+    if not first or first[:2] != ("version", FINGERPRINT_VERSION):
+        logger.info("🧬 Отпечатки секций устарели — полный пересчёт")
+        return None
+    return {(label, occurrence): fingerprint for label, occurrence, fingerprint in rows}
+
+def store_fingerprints(wb, fingerprints):
+    """Записывает отпечатки в скрытый лист книги (заменяя прежние)."""
+    if FINGERPRINT_SHEET in wb.sheetnames:
+        wb.remove(wb[FINGERPRINT_SHEET])
+    ws = wb.create_sheet(FINGERPRINT_SHEET)
+    ws.sheet_state = "veryHidden"
+    ws.append(["version", FINGERPRINT_VERSION])
+    for (label, occurrence), fingerprint, _ in fingerprints:
+        ws.append([label, occurrence, fingerprint])
+    logger.debug("🧬 Сохранено отпечатков секций: %s", len(fingerprints))
@@ -1,50 +1,92 @@
 # formatting.py
 
+from weakref import WeakKeyDictionary
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.styles.cell_style import StyleArray
 import logging
 
 logger = logging.getLogger(__name__)
 from config import DARK_RED, LIGHT_YELLOW
+from sheet_layout import ROW_SECTION, ROW_HEADER, ROW_RESULT, ROW_EMPTY, ROW_PLAIN
+
+# Общие объекты стилей: создаются один раз на весь процесс
+BOLD_FONT = Font(bold=True)
+PLAIN_FONT = Font(bold=False)
+RESULT_FONT = Font(bold=True, color=DARK_RED)
+CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+RESULT_FILL = PatternFill(start_color=LIGHT_YELLOW, end_color=LIGHT_YELLOW, fill_type="solid")
+
+# Именованные стили строк: (шрифт, заливка, выравнивание, высота строки)
+ROW_STYLES = {
+    ROW_SECTION: (BOLD_FONT, None, CENTER_ALIGNMENT, 35),
+    ROW_HEADER: (BOLD_FONT, None, CENTER_ALIGNMENT, 25),
+    ROW_RESULT: (RESULT_FONT, RESULT_FILL, None, 35),
+    ROW_EMPTY: (None, None, None, 35),
+    ROW_PLAIN: (PLAIN_FONT, None, None, 15),
+}
+
+class StyleRegistry:
+    """Реестр стилей книги: каждый общий стиль регистрируется в таблицах книги один раз.
+
+    Присваивание cell.font = Font(...) каждый раз хеширует объект и ищет его в таблице
+    шрифтов книги. Реестр запоминает полученный индекс и дальше пишет его в ячейку напрямую.
+    """
+
+    _by_workbook = WeakKeyDictionary()
+
+    def __init__(self, wb):
+        self.wb = wb
+        self._ids = {}
+
+    @classmethod
+    def for_workbook(cls, wb):
+        """Реестр, общий для всех листов книги."""
+        registry = cls._by_workbook.get(wb)
+        if registry is None:
+            registry = cls._by_workbook[wb] = cls(wb)
+        return registry
+
+    def _style_id(self, collection, style):
+        key = (collection, style)
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = self._ids[key] = getattr(self.wb, collection).add(style)
+        return style_id
+
+    def apply(self, cells, font=None, fill=None, alignment=None):
+        """Назначает общие стили всем ячейкам из cells."""
+        font_id = self._style_id("_fonts", font) if font is not None else None
+        fill_id = self._style_id("_fills", fill) if fill is not None else None
+        alignment_id = self._style_id("_alignments", alignment) if alignment is not None else None
+        for cell in cells:
+            style = cell._style
+            if style is None:
+                style = cell._style = StyleArray()
+            if font_id is not None:
+                style.fontId = font_id
+            if fill_id is not None:
+                style.fillId = fill_id
+            if alignment_id is not None:
+                style.alignmentId = alignment_id
 
 def apply_section_row_formatting(ws):
     """Форматирует строки с 'Section:'."""
+    registry = StyleRegistry.for_workbook(ws.parent)
     for row in ws.iter_rows():
         for cell in row:
             if cell.value and isinstance(cell.value, str) and "section:" in cell.value.lower():
                 ws.row_dimensions[cell.row].height = 35
-                for row_cell in ws[cell.row]:
-                    row_cell.font = Font(bold=True)
-                    row_cell.alignment = Alignment(horizontal='center', vertical='center')
-                logger.debug(f"🎨 Строка секции отформатирована: '{cell.value}' на листе '{ws.title}'.")
+                registry.apply(row, font=BOLD_FONT, alignment=CENTER_ALIGNMENT)
+                logger.debug("🎨 Строка секции отформатирована: '%s' на листе '%s'.", cell.value, ws.title)
                 break
 
-def apply_styles_to_sheet(ws):
-    """Применяет стили ко всем строкам листа."""
+def apply_styles_to_sheet(ws, layout):
+    """Применяет стили ко всем строкам листа по готовой разметке (scan_layout)."""
+    registry = StyleRegistry.for_workbook(ws.parent)
+    row_dimensions = ws.row_dimensions
     for row in ws.iter_rows():
-        is_section = any(cell.value and isinstance(cell.value, str) and "section:" in str(cell.value).lower() for cell in row)
-        is_header = any(cell.value in ["ID", "Part Name", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)"] for cell in row)
-        is_result = any(cell.value and isinstance(cell.value, str) and ("total" in str(cell.value).lower() or "logistics cost:" in str(cell.value).lower()) for cell in row)
-        is_empty = all(cell.value is None for cell in row)
-
-        if is_section:
-            ws.row_dimensions[row[0].row].height = 35
-            for cell in row:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-        elif is_header:
-            ws.row_dimensions[row[0].row].height = 25
-            for cell in row:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-        elif is_result:
-            ws.row_dimensions[row[0].row].height = 35
-            for cell in row:
-                cell.font = Font(bold=True, color=DARK_RED)
-                cell.fill = PatternFill(start_color=LIGHT_YELLOW, end_color=LIGHT_YELLOW, fill_type="solid")
-        elif is_empty:
-            ws.row_dimensions[row[0].row].height = 35
-        else:
-            ws.row_dimensions[row[0].row].height = 15
-            for cell in row:
-                cell.font = Font(bold=False)
-    logger.debug(f"🎨 Применены стили к листу '{ws.title}'.")
\ No newline at end of file
+        font, fill, alignment, height = ROW_STYLES[layout.row_kind(row[0].row)]
+        row_dimensions[row[0].row].height = height
+        if font is not None:
+            registry.apply(row, font=font, fill=fill, alignment=alignment)
+    logger.debug(f"🎨 Применены стили к листу '{ws.title}'.")
@@ -0,0 +1,71 @@
+# log_setup.py
+
+import atexit
+import logging
+import multiprocessing.util
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+LOG_FILE = "app.log"
+
+# Слушатель очереди текущего процесса и pid, в котором он запущен
+_listener = None
+_listener_pid = None
+# Уровень и файл, с которыми логирование настроено в основном процессе (None — не настроено)
+_config = None
+
+def setup_logging(level=logging.INFO, log_file=LOG_FILE):
+    """Настраивает логирование через очередь: обработка только кладёт записи в очередь,
+    а вывод в консоль и запись в файл выполняет фоновый поток QueueListener.
+
+    Повторный вызов в том же процессе ничего не меняет; в дочернем процессе (fork)
+    унаследованный обработчик заменяется и запускается собственный слушатель.
+    """
+    global _listener, _listener_pid, _config
+    if _listener is not None and _listener_pid == os.getpid():
+        return _listener
+    _config = (level, os.path.abspath(log_file))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(), logging.FileHandler(log_file, encoding="utf-8")]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    return _listener
+
+def setup_worker_logging():
+    """Инициализатор рабочего процесса пула (fork): если в основном процессе логирование
+    настроено, запускает в процессе собственный слушатель очереди с тем же уровнем и файлом —
+    унаследованный слушатель в дочернем процессе не работает. Слушатель живёт до завершения
+    процесса и останавливается финализатором multiprocessing (atexit в рабочих процессах
+    не вызывается). Без настройки в основном процессе (например, в тестах) ничего не делает."""
+    if _config is None:
+        return None
+    listener = setup_logging(*_config)
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+    return listener
+
+def stop_logging():
+    """Дописывает оставшиеся записи очереди и останавливает слушатель."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _listener_pid = None
+
+atexit.register(stop_logging)
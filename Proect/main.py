@@ -1,55 +1,219 @@
 # main.py
 
+import os
+import sys
+import tracemalloc
 import openpyxl
 from file_utils import select_file
-from backup_utils import create_backup
-from excel_utils import unmerge_cells_without_filling, merge_first_row, auto_adjust_column_width
-from data_processing import try_convert
+from backup_utils import start_backup
+from excel_utils import unmerge_cells_without_filling, merge_first_row, ColumnWidthTracker
+from data_processing import convert_sheet_values, ValueConverter
 from formatting import apply_styles_to_sheet
+from part_info_processor import process_part_info_sheet, copy_tube_counts_to_part_info
+from tube_counts import collect_section_tube_counts
+from price_data_handler import attach_price_file
+from price_index import PriceIndex
+from sheet_layout import scan_layout
+from fingerprints import section_fingerprints, load_fingerprints, store_fingerprints
+from config import (PART_INFO_SHEET, COLUMN_WIDTH_SAMPLING, INCREMENTAL_RECOMPUTE, FINGERPRINT_SHEET, MEMORY_BUDGET_MB,
+                    EXPORT_FORMATS, READER_BACKEND)
+from log_setup import setup_logging
+from run_report import RunReport
+from workbook_writer import save_workbook
+from memory_budget import load_workbook_budgeted
+from price_export import PriceRecords, check_formats, export_records, record_clean_sections
+from quote_history import history_target, record_run
+from xlsx_reader import XlsxValuesReader
 import logging
 
-# Настройка логгирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("app.log", encoding="utf-8")
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
-def process_excel(input_path):
-    """Основная функция обработки файла."""
+def process_workbook(wb, price_file=None, report=None, part_info=None, records=None, section_tube_counts=None):
+    """Обрабатывает загруженную книгу в памяти: цены, итоги, стили, ширина столбцов.
+
+    Если книга уже обрабатывалась и в ней есть отпечатки секций, секции Part Info,
+    не изменившиеся с прошлого запуска, остаются как есть. part_info — PartInfoChunks
+    (memory_budget.load_workbook_budgeted): лист Part Info обрабатывается частями.
+    records — price_export.PriceRecords: цены деталей и итоги секций для выгрузки таблицами.
+    section_tube_counts — Tube Count секций, уже собранные из файла (None — из книги wb).
+    """
+    report = report or RunReport(None)
+    stored = load_fingerprints(wb) if INCREMENTAL_RECOMPUTE else None
+    fingerprints = None
+    if section_tube_counts is None:
+        with report.stage("tube_counts"):
+            section_tube_counts = collect_section_tube_counts(wb)
+    with report.stage("price_data"):
+        price_data_ws = attach_price_file(wb, price_file)
+        price_index = PriceIndex.from_sheet(price_data_ws) if price_data_ws is not None else None
+    if records is not None and price_index is not None:
+        records.price_version = price_index.digest()
+    for sheet_name in wb.sheetnames:
+        if sheet_name == FINGERPRINT_SHEET:
+            continue
+        ws = wb[sheet_name]
+        if part_info is not None and ws is part_info.ws:
+            fingerprints = part_info.process(price_index, section_tube_counts, stored, report, records)
+            continue
+        with report.stage("unmerge_merge"):
+            unmerge_cells_without_filling(ws)
+            merge_first_row(ws)
+        clean_rows = set()
+        if sheet_name == PART_INFO_SHEET and stored:
+            with report.stage("fingerprints"):
+                for key, fingerprint, section in section_fingerprints(ws, scan_layout(ws), price_index, section_tube_counts):
+                    if stored.get(key) == fingerprint:
+                        clean_rows.update(range(section.row, section.end_row + 1))
+        # Ширина столбцов копится попутно с преобразованием и последующими записями
+        widths = ColumnWidthTracker(*COLUMN_WIDTH_SAMPLING)
+        converter = ValueConverter()
+        with report.stage("convert"):
+            converted = convert_sheet_values(ws, widths, clean_rows, converter)
+        report.count("cells", ws.max_row * ws.max_column)
+        report.count("cells_converted", converted)
+        report.count("cells_rewritten", converter.rewritten)
+        logger.info(f"🔢 Лист '{sheet_name}': преобразовано в числа ячеек: {converted}")
+        with report.stage("layout"):
+            layout = scan_layout(ws)
+        if sheet_name == PART_INFO_SHEET:
+            dirty = layout._replace(sections=tuple(s for s in layout.sections if s.row not in clean_rows))
+            if clean_rows:
+                logger.info(f"🧬 Секций без изменений: {len(layout.sections) - len(dirty.sections)}, "
+                            f"пересчитывается: {len(dirty.sections)}")
+            with report.stage("tube_counts"):
+                report.count("sections_without_tube_count",
+                             copy_tube_counts_to_part_info(ws, dirty, section_tube_counts, widths))
+            with report.stage("part_info"):
+                if records is not None and clean_rows:
+                    record_clean_sections(records, ws, layout, dirty, price_index)
+                priced = process_part_info_sheet(ws, price_index, dirty, widths, incremental=bool(stored),
+                                                 records=records)
+            report.count("sections", len(layout.sections))
+            report.count("sections_recomputed", len(dirty.sections))
+            report.count("sections_priced", priced)
+            with report.stage("layout"):
+                # Итоговые строки вставлены — разметку строим заново одним проходом
+                layout = scan_layout(ws)
+            if INCREMENTAL_RECOMPUTE:
+                with report.stage("fingerprints"):
+                    fingerprints = section_fingerprints(ws, layout, price_index, section_tube_counts)
+        with report.stage("styling"):
+            apply_styles_to_sheet(ws, layout)
+        with report.stage("widths"):
+            widths.apply(ws)
+    if fingerprints is not None:
+        store_fingerprints(wb, fingerprints)
+    return wb
+
+def run_pipeline(input_path, price_file=None, report=None, compresslevel=None, memory_budget_mb=None, export=None,
+                 history=None, backup_dir=None):
+    """Полный цикл обработки файла. Ошибки пробрасываются вызывающему коду.
+
+    report — RunReport, в который пишутся замеры этапов и счётчики;
+    compresslevel — уровень deflate при сохранении (None — SAVE_COMPRESSLEVEL из config);
+    memory_budget_mb — бюджет памяти в МБ: лист Part Info читается и обрабатывается частями
+    (см. memory_budget), None — книга целиком в памяти;
+    export — форматы выгрузки цен таблицами ("csv", "parquet", "sqlite", см. price_export);
+    history — база истории расчётов (см. quote_history), None — запуск в историю не пишется;
+    backup_dir — каталог хранилища резервных копий (None — рядом с файлом, см. backup_utils).
+    """
+    report = report or RunReport(input_path)
+    records = None
+    if export:
+        check_formats(export)
+    if export or history:
+        records = PriceRecords(os.path.basename(input_path))
+    # Резервная копия пишется в фоне, пока книга загружается и обрабатывается
+    backup = start_backup(input_path, backup_dir)
+    try:
+        part_info = None
+        section_tube_counts = None
+        if READER_BACKEND == "xml":
+            with report.stage("tube_counts"):
+                # Только значения листов Nesting Summary / Tube Info, без стилей и остальных листов
+                with XlsxValuesReader(input_path) as book:
+                    section_tube_counts = collect_section_tube_counts(book)
+        with report.stage("load"):
+            if memory_budget_mb:
+                wb, part_info = load_workbook_budgeted(input_path, memory_budget_mb)
+            else:
+                wb = openpyxl.load_workbook(input_path)
+        logger.info(f"📘 Файл загружен: {input_path}")
+        process_workbook(wb, price_file, report, part_info, records, section_tube_counts)
+    finally:
+        with report.stage("backup_wait"):
+            # Исходник перезаписывается только после того, как копия готова
+            backup_path = backup.result()
+    with report.stage("save"):
+        # Запись во временный файл и атомарная замена: прерванное сохранение не портит исходник
+        save_workbook(wb, input_path, compresslevel)
+    logger.info(f"💾 Изменения сохранены в исходный файл: {input_path}")
+    if export:
+        with report.stage("export"):
+            export_records(records, input_path, export)
+    if history:
+        with report.stage("history"):
+            record_run(records, input_path, price_file, history)
+    if backup_path:
+        logger.info(f"🔁 Резервная копия создана: {backup_path}")
+    return backup_path
+
+def process_excel(input_path, price_file=None, profile=False, memory_budget_mb=None, trace_memory=None, export=None,
+                  history=None):
+    """Основная функция обработки файла.
+
+    После каждого запуска пишется JSON-отчёт (reports/ рядом с файлом);
+    profile=True дополнительно сохраняет профиль cProfile.
+    memory_budget_mb — бюджет памяти в МБ (None — MEMORY_BUDGET_MB из config);
+    trace_memory — пики памяти Python по этапам через tracemalloc (py_peak_mb в отчёте).
+    По умолчанию включено вместе с бюджетом памяти; замедляет обработку в 2–3 раза.
+    export — форматы выгрузки цен таблицами (None — EXPORT_FORMATS из config);
+    history — база истории расчётов (None — QUOTE_HISTORY_DB из config, False — не писать).
+    """
     if not input_path:
         logger.warning("⚠️ Файл не выбран.")
         return
-    backup_path = create_backup(input_path)
+    if memory_budget_mb is None:
+        memory_budget_mb = MEMORY_BUDGET_MB
+    if export is None:
+        export = EXPORT_FORMATS
+    history = history_target(history)
+    if trace_memory is None:
+        trace_memory = bool(memory_budget_mb)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    report = RunReport(input_path)
     try:
-        wb = openpyxl.load_workbook(input_path)
-        logger.info(f"📘 Файл загружен: {input_path}")
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            unmerge_cells_without_filling(ws)
-            merge_first_row(ws)
-            for row in ws.iter_rows():
-                for cell in row:
-                    converted_value, number_format = try_convert(cell.value)
-                    if converted_value is not None:
-                        cell.value = converted_value
-                        if number_format:
-                            cell.number_format = number_format
-            apply_styles_to_sheet(ws)
-            auto_adjust_column_width(ws)
-        wb.save(input_path)
-        logger.info(f"💾 Изменения сохранены в исходный файл: {input_path}")
-        if backup_path:
-            logger.info(f"🔁 Резервная копия создана: {backup_path}")
+        with report.profiled(profile):
+            run_pipeline(input_path, price_file, report, memory_budget_mb=memory_budget_mb, export=export,
+                         history=history)
     except Exception as e:
+        report.fail(e)
         logger.error(f"❌ Произошла ошибка при обработке файла: {str(e)}")
+    try:
+        report.write()
+    except OSError as e:
+        logger.warning(f"⚠️ Не удалось сохранить отчёт о запуске: {e}")
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return report
+
+def _option_value(args, name):
+    """Значение параметра командной строки "name ЗНАЧЕНИЕ" или None."""
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
 
 if __name__ == "__main__":
+    # Настройка логгирования: консоль и app.log пишутся из фонового потока через очередь
+    setup_logging()
     print("📂 Выберите Excel-файл для обработки (.xlsx)")
     selected_file = select_file()
-    process_excel(selected_file)
\ No newline at end of file
+    args = sys.argv[1:]
+    budget = _option_value(args, "--memory-budget")
+    export = _option_value(args, "--export")
+    process_excel(selected_file, profile="--profile" in args, memory_budget_mb=float(budget) if budget else None,
+                  trace_memory=True if "--trace-memory" in args else None,
+                  export=tuple(export.split(",")) if export else None)
\ No newline at end of file
@@ -0,0 +1,527 @@
+# memory_budget.py
+"""Обработка больших книг в пределах бюджета памяти: лист Part Info — частями по секциям.
+
+openpyxl.load_workbook держит в памяти все ячейки книги, и каждый этап проходит по ним
+целиком. В режиме бюджета памяти (process_excel(..., memory_budget_mb=N)) лист Part Info
+загружается без ячеек: свойства листа, ширина столбцов, объединения, границы данных.
+Ячейки читаются вторым, потоковым проходом по XML листа и обрабатываются частями —
+подряд идущими секциями, сколько помещается в долю бюджета MEMORY_BUDGET_CHUNK_SHARE
+(не меньше одной секции). Каждая часть проходит те же этапы, что и лист целиком
+(преобразование, Tube Count, цены и итоги, отпечатки, стили), и сразу выводится в XML
+строк. Готовый XML копится в SpooledTemporaryFile: до MEMORY_BUDGET_SPOOL_SHARE бюджета —
+в памяти, дальше — во временном файле на диске. При сохранении книги он копируется
+в лист как есть (workbook_writer вызывает writer_class листа).
+
+Остальные листы невелики и обрабатываются обычным образом; бюджет относится к памяти
+сверх них. Если запущен tracemalloc (process_excel включает его вместе с бюджетом), пики
+памяти этапов пишутся в отчёт о запуске (py_peak_mb) и сравниваются с бюджетом.
+
+Результат совпадает с обработкой листа целиком, с оговорками:
+- таблицы, рисунки и сводные таблицы на листе Part Info не переносятся (в выгрузках их нет);
+- ширина листа для стилей берётся по части: если служебные столбцы (Tube Count,
+  Logistics Cost) правее данных, строки других частей не дополняются пустыми ячейками
+  до этой ширины;
+- атрибуты строк (высота и т.п.) сдвигаются вместе со строками при вставке итогов.
+Нужна стандартная запись XML openpyxl (et_xmlfile) и openpyxl проверенной ветки
+(workbook_writer.OPENPYXL_SUPPORTED); с lxml (OPENPYXL_LXML=True) или другой версией
+openpyxl книга обрабатывается целиком в памяти.
+"""
+
+import tracemalloc
+import zipfile
+from contextlib import ExitStack
+from copy import copy
+from tempfile import SpooledTemporaryFile
+from openpyxl import LXML, __version__ as openpyxl_version, load_workbook
+from openpyxl.cell import Cell
+from openpyxl.comments.comment_sheet import CommentSheet
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.packaging.relationship import get_rels_path, get_dependents, RelationshipList
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.utils import get_column_letter, range_boundaries, coordinate_to_tuple
+from openpyxl.worksheet._reader import WorksheetReader, WorkSheetParser
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.worksheet.dimensions import RowDimension, SheetDimension
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.constants import COMMENTS_NS
+from openpyxl.xml.functions import fromstring, xmlfile
+from data_processing import convert_sheet_values, ValueConverter
+from excel_utils import merge_first_row, ColumnWidthTracker
+from fingerprints import section_fingerprints
+from formatting import apply_styles_to_sheet
+from part_info_processor import process_part_info_sheet, copy_tube_counts_to_part_info
+from price_export import record_clean_sections
+from sheet_layout import scan_layout, TOTAL_PRICE_LABEL
+from workbook_writer import FastWorksheetWriter, openpyxl_internals_supported
+from config import (PART_INFO_SHEET, COLUMN_WIDTH_SAMPLING, INCREMENTAL_RECOMPUTE, MEMORY_BUDGET_CELL_BYTES,
+                    MEMORY_BUDGET_CHUNK_SHARE, MEMORY_BUDGET_SPOOL_SHARE)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Блок копирования готового XML строк при сохранении
+_COPY_BLOCK = 1 << 20
+
+# Этапы обработки частей листа — их пики сравниваются с бюджетом
+_CHUNK_STAGES = ("read_chunk", "convert", "layout", "tube_counts", "part_info", "fingerprints", "styling", "spill")
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1)
+
+class _SkeletonReader(WorksheetReader):
+    """Читает лист без ячеек: ячейки только учитываются в границах листа,
+    объединения и ссылки запоминаются отдельно, атрибуты строк читаются вместе с частями."""
+
+    def __init__(self, ws, xml_source, shared_strings, data_only, rich_text):
+        super().__init__(ws, xml_source, shared_strings, data_only, rich_text)
+        self.max_column = 0
+        self.max_value_column = 0     # последний столбец с непустым значением (для первой строки)
+        self.max_filled_column = 0    # последний столбец со значением, не равным None
+        self.empty_edge = {}          # столбец правее значений -> строки пустых ячеек в нём
+        self.merged = []
+        self.hyperlinks = {}
+
+    def bind_cells(self):
+        for _, row in self.parser.parse():
+            for cell in row:
+                column, value = cell["column"], cell["value"]
+                if column > self.max_column:
+                    self.max_column = column
+                if value is not None:
+                    if column > self.max_filled_column:
+                        self.max_filled_column = column
+                    if value and column > self.max_value_column:
+                        self.max_value_column = column
+                else:
+                    self.empty_edge.setdefault(column, []).append(cell["row"])
+            # Пустые ячейки левее значений границу листа не определяют
+            for column in [c for c in self.empty_edge if c <= self.max_filled_column]:
+                del self.empty_edge[column]
+            self.parser.row_dimensions.clear()
+
+    def bind_merged_cells(self):
+        if self.parser.merged_cells:
+            self.merged = [CellRange(cr.ref) for cr in self.parser.merged_cells.mergeCell]
+        self.ws.merged_cells = MultiCellRange()
+
+    def bind_hyperlinks(self):
+        for link in self.parser.hyperlinks.hyperlink:
+            if link.id:
+                link.target = self.ws._rels.get(link.id).Target
+            min_col, min_row, max_col, max_row = range_boundaries(link.ref)
+            for row in range(min_row, max_row + 1):
+                for column in range(min_col, max_col + 1):
+                    self.hyperlinks[(row, column)] = copy(link) if ":" in link.ref else link
+
+    def bind_row_dimensions(self):
+        pass
+
+class SpilledWorksheet(Worksheet):
+    """Лист Part Info без ячеек: строки уже обработаны и лежат готовым XML (см. PartInfoChunks)."""
+
+    def __init__(self, parent, title):
+        super().__init__(parent, title)
+        self.spilled_rows = None        # SpooledTemporaryFile с элементом sheetData
+        self.spilled_dimension = None   # ссылка на диапазон данных, как calculate_dimension
+        self.spilled_comments = []
+        self.spilled_hyperlinks = []
+
+    @property
+    def writer_class(self):
+        return _SpilledWorksheetWriter if self.spilled_rows is not None else FastWorksheetWriter
+
+class _SpilledWorksheetWriter(FastWorksheetWriter):
+    """Запись листа, строки которого уже выведены в XML: текст копируется в поток листа."""
+
+    def write_dimensions(self):
+        self.xf.send(SheetDimension(self.ws.spilled_dimension).to_tree())
+
+    def write_rows(self):
+        xf = self.xf.send(True)
+        spool = self.ws.spilled_rows
+        spool.seek(0)
+        while True:
+            block = spool.read(_COPY_BLOCK)
+            if not block:
+                break
+            xf._file(block)
+        # Примечания и ссылки собраны при выводе строк частей
+        self.ws._comments.extend(self.ws.spilled_comments)
+        self.ws._hyperlinks.extend(self.ws.spilled_hyperlinks)
+        self.xf.send(None)
+
+class _ChunkWorksheet(Worksheet):
+    """Часть листа Part Info: строки в исходной нумерации, книга — как у листа."""
+
+    def __init__(self, parent, title):
+        super().__init__(None, title)
+        self._parent = parent
+
+    # Имя — как у листа книги; _WorkbookChild переименовал бы часть в "Part Info1"
+    @property
+    def title(self):
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=False):
+        # Обход «всего листа» начинается с первой строки части, а не с первой строки листа
+        if min_row is None:
+            min_row = self.min_row
+        return super().iter_rows(min_row, max_row, min_col, max_col, values_only)
+
+class _ChunkRowWriter(FastWorksheetWriter):
+    """Выводит строки части листа в открытый элемент sheetData."""
+
+    def __init__(self, ws):
+        # WorksheetWriter.__init__ открывает файл листа целиком — здесь нужны только строки
+        self.ws = ws
+        self.ws._hyperlinks = []
+        self.ws._comments = []
+        self._style_ids = {}
+        self._letters = {}
+
+    def write_rows_to(self, xf):
+        for row_idx, row in self.rows():
+            self.write_row(xf, row, row_idx)
+
+class _BudgetReader(ExcelReader):
+    """ExcelReader, загружающий лист Part Info без ячеек (SpilledWorksheet)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.path = path
+        self.source = None
+
+    def read_worksheets(self):
+        sheets = list(self.parser.find_sheets())
+        others = [(sheet, rel) for sheet, rel in sheets if sheet.name != PART_INFO_SHEET]
+        self.parser.find_sheets = lambda: iter(others)
+        super().read_worksheets()
+        for index, (sheet, rel) in enumerate(sheets):
+            if sheet.name == PART_INFO_SHEET and rel.target in self.valid_files and "chartsheet" not in rel.Type:
+                self.source = self._read_skeleton(sheet, rel, index)
+
+    def _read_skeleton(self, sheet, rel, index):
+        rels_path = get_rels_path(rel.target)
+        rels = get_dependents(self.archive, rels_path) if rels_path in self.valid_files else RelationshipList()
+        ws = SpilledWorksheet(self.wb, sheet.name)
+        self.wb._sheets.insert(index, ws)
+        ws._rels = rels
+        with self.archive.open(rel.target) as fh:
+            reader = _SkeletonReader(ws, fh, self.shared_strings, self.data_only, self.rich_text)
+            reader.bind_all()
+        comments = {}
+        for r in rels.find(COMMENTS_NS):
+            for ref, comment in CommentSheet.from_tree(fromstring(self.archive.read(r.target))).comments:
+                comments[coordinate_to_tuple(ref)] = comment
+        if reader.tables or any(rels.find(SpreadsheetDrawing._rel_type)):
+            logger.warning(f"⚠️ Таблицы и рисунки листа '{sheet.name}' в режиме бюджета памяти не сохраняются")
+        ws.legacy_drawing = None
+        ws.sheet_state = sheet.state
+        return PartInfoChunks(self.path, rel.target, self.shared_strings, self.data_only, self.rich_text,
+                              ws, reader, comments)
+
+class PartInfoChunks:
+    """Потоковое чтение листа Part Info частями по секциям и их обработка.
+
+    В памяти — лист без ячеек, границы листа, объединения и одна часть строк.
+    """
+
+    def __init__(self, path, target, shared_strings, data_only, rich_text, ws, reader, comments):
+        self.path = path
+        self.target = target
+        self.shared_strings = shared_strings
+        self.data_only = data_only
+        self.rich_text = rich_text
+        self.ws = ws
+        self.last_value_col = reader.max_value_column
+        self.hyperlinks = reader.hyperlinks
+        self.comments = comments
+        self.merged_rows = _merged_spans(reader.merged)
+        self.max_column = _sheet_max_column(reader, self.merged_rows, comments)
+        self.budget_bytes = None
+
+    def iter_chunks(self, max_cells):
+        """Части листа: (первая строка, последняя строка, строки [(номер, ячейки)], атрибуты строк).
+
+        Новая часть начинается только со строки секции — секция целиком в одной части.
+        """
+        wb = self.ws.parent
+        with zipfile.ZipFile(self.path) as archive, archive.open(self.target) as fh:
+            parser = WorkSheetParser(fh, self.shared_strings, self.data_only, wb.epoch, wb._date_formats,
+                                     wb._timedelta_formats, self.rich_text)
+            first_row, rows, cells = 1, [], 0
+            for row_idx, row_cells in parser.parse():
+                if rows and cells >= max_cells and _starts_section(row_cells):
+                    yield first_row, row_idx - 1, rows, _pop_row_dimensions(parser, row_idx - 1)
+                    first_row, rows, cells = row_idx, [], 0
+                rows.append((row_idx, row_cells))
+                cells += len(row_cells)
+            # Последняя строка листа — последняя с ячейкой (пустые строки с атрибутами не считаются)
+            last_row = max([row for row, row_cells in rows
+                            if any(not _hidden(self.merged_rows, row, cell["column"]) for cell in row_cells)]
+                           + [row for row, _ in self.comments] + [row for row, _ in self.hyperlinks]
+                           + [first_row])
+            yield first_row, last_row, rows, _pop_row_dimensions(parser, None)
+
+    def _build_chunk(self, first_row, last_row, rows, row_dimensions):
+        wb = self.ws.parent
+        ws = _ChunkWorksheet(wb, self.ws.title)
+        cells = ws._cells
+        styles = wb._cell_styles
+        merged_rows = self.merged_rows
+        for row_idx, row_cells in rows:
+            for cell in row_cells:
+                row, column = cell["row"], cell["column"]
+                if row in merged_rows and _hidden(merged_rows, row, column):
+                    continue
+                c = Cell(ws, row=row, column=column, style_array=styles[cell["style_id"]])
+                c._value = cell["value"]
+                c.data_type = cell["data_type"]
+                cells[(row, column)] = c
+        for (row, column), comment in self.comments.items():
+            if first_row <= row <= last_row:
+                ws.cell(row=row, column=column).comment = comment
+        for (row, column), link in self.hyperlinks.items():
+            if first_row <= row <= last_row:
+                ws.cell(row=row, column=column).hyperlink = link
+        # Границы части: с первой строки и на всю ширину листа, как при обходе листа целиком
+        ws.cell(row=first_row, column=1)
+        ws.cell(row=last_row, column=max(self.max_column, 1))
+        for row, attrs in row_dimensions:
+            if "s" in attrs:
+                attrs["s"] = styles[int(attrs["s"])]
+            ws.row_dimensions[row] = RowDimension(ws, **attrs)
+        return ws
+
+    def process(self, price_index, section_tube_counts, stored, report, records=None):
+        """Обрабатывает лист частями и выводит строки в XML. Возвращает отпечатки секций или None."""
+        budget = self.budget_bytes
+        widths = ColumnWidthTracker(*COLUMN_WIDTH_SAMPLING)
+        # Остальная книга (другие листы, общие строки) уже в памяти — бюджет считается сверх неё
+        baseline = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        max_cells = max(1, int(budget * MEMORY_BUDGET_CHUNK_SHARE / MEMORY_BUDGET_CELL_BYTES))
+        spool = SpooledTemporaryFile(max_size=int(budget * MEMORY_BUDGET_SPOOL_SHARE), mode="w+", encoding="utf-8")
+        numbering = _SectionNumbering()
+        stored_numbering = _SectionNumbering()
+        fingerprints = [] if INCREMENTAL_RECOMPUTE else None
+        inserted = 0
+        price_col = None
+        converted = sections = 0
+        # Одна память строк на весь лист: имена деталей повторяются и между частями
+        converter = ValueConverter()
+        bounds = None
+        with ExitStack() as stack:
+            xf = stack.enter_context(xmlfile(spool, encoding="unicode"))
+            stack.enter_context(xf.element("sheetData"))
+            chunks = self.iter_chunks(max_cells)
+            chunk_index = 0
+            while True:
+                with report.stage("read_chunk"):
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    first_row, last_row, rows, row_dimensions = chunk
+                    ws = self._build_chunk(first_row, last_row, rows, row_dimensions)
+                    # Список строк держит и генератор частей — очищаем его, а не только ссылку
+                    rows.clear()
+                    del chunk, rows
+                if chunk_index == 0:
+                    with report.stage("unmerge_merge"):
+                        merge_first_row(ws, self.last_value_col)
+                        for merged in ws.merged_cells.ranges:
+                            self.ws.merged_cells.add(CellRange(merged.coord))
+                clean_rows = set()
+                if stored:
+                    with report.stage("fingerprints"):
+                        for key, fingerprint, section in stored_numbering(
+                                section_fingerprints(ws, scan_layout(ws), price_index, section_tube_counts)):
+                            if stored.get(key) == fingerprint:
+                                clean_rows.update(range(section.row, section.end_row + 1))
+                chunk_widths = widths.fork()
+                with report.stage("convert"):
+                    converted += convert_sheet_values(ws, chunk_widths, clean_rows, converter)
+                report.count("cells", (last_row - first_row + 1) * ws.max_column)
+                with report.stage("layout"):
+                    layout = scan_layout(ws)
+                if chunk_index == 0:
+                    price_col = layout.price_col
+                # Заголовок цены — в первой строке листа, то есть только в первой части
+                layout = layout._replace(price_col=price_col)
+                dirty = layout._replace(sections=tuple(s for s in layout.sections if s.row not in clean_rows))
+                with report.stage("tube_counts"):
+                    report.count("sections_without_tube_count",
+                                 copy_tube_counts_to_part_info(ws, dirty, section_tube_counts, chunk_widths))
+                with report.stage("part_info"):
+                    if records is not None and clean_rows:
+                        record_clean_sections(records, ws, layout, dirty, price_index)
+                    priced = process_part_info_sheet(ws, price_index, dirty, chunk_widths, incremental=bool(stored),
+                                                     records=records)
+                report.count("sections", len(layout.sections))
+                report.count("sections_recomputed", len(dirty.sections))
+                report.count("sections_priced", priced)
+                sections += len(layout.sections)
+                chunk_inserted = ws.max_row - last_row
+                with report.stage("layout"):
+                    _shift_rows(ws, inserted)
+                    inserted += chunk_inserted
+                    layout = scan_layout(ws)
+                if fingerprints is not None:
+                    with report.stage("fingerprints"):
+                        fingerprints.extend(numbering(
+                            section_fingerprints(ws, layout, price_index, section_tube_counts)))
+                with report.stage("styling"):
+                    apply_styles_to_sheet(ws, layout)
+                chunk_widths.refresh(ws)
+                widths.merge(chunk_widths)
+                with report.stage("spill"):
+                    bounds = _union(bounds, (ws.min_row, ws.min_column, ws.max_row, ws.max_column))
+                    _ChunkRowWriter(ws).write_rows_to(xf)
+                    self.ws.spilled_comments.extend(ws._comments)
+                    self.ws.spilled_hyperlinks.extend(ws._hyperlinks)
+                logger.debug("🧩 Часть листа '%s': строки %s–%s, секций %s, ячеек %s",
+                             self.ws.title, first_row, last_row, len(layout.sections), len(ws._cells))
+                report.count("chunks")
+                # Ячейки ссылаются на лист, лист — на ячейки: без разрыва цикла часть ждала бы сборщика мусора
+                ws._cells.clear()
+                ws.row_dimensions.clear()
+                del ws, layout, dirty
+                chunk_index += 1
+        report.count("cells_converted", converted)
+        report.count("cells_rewritten", converter.rewritten)
+        logger.info(f"🔢 Лист '{self.ws.title}': преобразовано в числа ячеек: {converted}")
+        rolled = getattr(spool, "_rolled", False)
+        spool.seek(0, 2)
+        spilled = spool.tell()
+        report.count("spilled_mb", _mb(spilled))
+        logger.info(f"🧩 Лист '{self.ws.title}' обработан частями: {chunk_index}, секций {sections}, "
+                    f"XML строк {_mb(spilled)} МБ {'на диске' if rolled else 'в памяти'}")
+        self.ws.spilled_rows = spool
+        min_row, min_col, max_row, max_col = bounds
+        self.ws.spilled_dimension = (f"{get_column_letter(min_col)}{min_row}:"
+                                     f"{get_column_letter(max_col)}{max_row}")
+        with report.stage("widths"):
+            widths.apply(self.ws, min_col, max_col)
+        _check_budget(report, budget, baseline)
+        return fingerprints
+
+class _SectionNumbering:
+    """Номера повторений подписей секций сквозь части листа (section_fingerprints считает их по части)."""
+
+    def __init__(self):
+        self.occurrences = {}
+
+    def __call__(self, fingerprints):
+        numbered = []
+        for (label, _), fingerprint, section in fingerprints:
+            self.occurrences[label] = self.occurrences.get(label, 0) + 1
+            numbered.append(((label, self.occurrences[label]), fingerprint, section))
+        return numbered
+
+def _starts_section(cells):
+    """Строка начинает секцию (как в scan_layout: первая подпись "Section:", не итог секции)."""
+    for cell in cells:
+        value = cell["value"]
+        if isinstance(value, str):
+            lower = value.lower()
+            if "section:" in lower:
+                return not lower.lstrip().startswith(TOTAL_PRICE_LABEL)
+    return False
+
+def _pop_row_dimensions(parser, last_row):
+    """Атрибуты строк, прочитанные парсером до last_row включительно (None — все)."""
+    taken = [(int(row), attrs) for row, attrs in parser.row_dimensions.items()
+             if last_row is None or int(row) <= last_row]
+    for row, _ in taken:
+        del parser.row_dimensions[str(row)]
+    return taken
+
+def _merged_spans(ranges):
+    """Строка -> [(первый, последний столбец)] ячеек, скрытых объединением (все, кроме левой верхней)."""
+    spans = {}
+    for merged in ranges:
+        for row in range(merged.min_row, merged.max_row + 1):
+            first = merged.min_col + 1 if row == merged.min_row else merged.min_col
+            if first <= merged.max_col:
+                spans.setdefault(row, []).append((first, merged.max_col))
+    return spans
+
+def _hidden(spans, row, column):
+    row_spans = spans.get(row)
+    return row_spans is not None and any(first <= column <= last for first, last in row_spans)
+
+def _sheet_max_column(reader, spans, comments):
+    """Ширина листа после разъединения объединённых ячеек: пустые ячейки под объединением не считаются."""
+    max_column = reader.max_filled_column
+    for column, rows in reader.empty_edge.items():
+        if column > max_column and not all(_hidden(spans, row, column) for row in rows):
+            max_column = column
+    for _, column in comments:
+        max_column = max(max_column, column)
+    for _, column in reader.hyperlinks:
+        max_column = max(max_column, column)
+    return max_column
+
+def _shift_rows(ws, offset):
+    """Сдвигает строки части на offset (итоги, вставленные в предыдущих частях)."""
+    if not offset:
+        return
+    moved = {}
+    for (row, column), cell in ws._cells.items():
+        cell.row = row + offset
+        if cell.hyperlink is not None:
+            cell.hyperlink.ref = cell.coordinate
+        moved[(row + offset, column)] = cell
+    ws._cells = moved
+    dimensions = [(row, dim) for row, dim in ws.row_dimensions.items()]
+    ws.row_dimensions.clear()
+    for row, dim in dimensions:
+        dim.index = row + offset
+        ws.row_dimensions[row + offset] = dim
+    ws._current_row = ws.max_row
+
+def _union(bounds, other):
+    if bounds is None:
+        return other
+    return (min(bounds[0], other[0]), min(bounds[1], other[1]), max(bounds[2], other[2]), max(bounds[3], other[3]))
+
+def _check_budget(report, budget, baseline):
+    """Сравнивает пик памяти Python на этапах частей (tracemalloc) с бюджетом сверх baseline."""
+    if not tracemalloc.is_tracing():
+        return
+    peaks = {name: report.stages[name].get("py_peak_mb") for name in _CHUNK_STAGES if name in report.stages}
+    peaks = {name: peak for name, peak in peaks.items() if peak}
+    if not peaks:
+        return
+    stage, peak = max(peaks.items(), key=lambda item: item[1])
+    used = round(peak - _mb(baseline), 1)
+    if used > _mb(budget):
+        logger.warning(f"⚠️ Обработка частей заняла до {used} МБ (этап '{stage}'), больше бюджета {_mb(budget)} МБ; "
+                       f"уменьшите MEMORY_BUDGET_CHUNK_SHARE или увеличьте MEMORY_BUDGET_CELL_BYTES")
+    else:
+        logger.info(f"🧠 Обработка частей заняла до {used} МБ (этап '{stage}') при бюджете {_mb(budget)} МБ")
+
+def load_workbook_budgeted(path, memory_budget_mb):
+    """Загружает книгу; лист Part Info — без ячеек. Возвращает (книга, PartInfoChunks или None).
+
+    None — листа Part Info нет, запись идёт через lxml или версия openpyxl не проверена:
+    тогда книга загружена целиком.
+    """
+    if LXML:
+        logger.warning("⚠️ Режим бюджета памяти требует записи без lxml (OPENPYXL_LXML=False); "
+                       "книга загружается целиком")
+        return load_workbook(path), None
+    if not openpyxl_internals_supported():
+        logger.warning(f"⚠️ Режим бюджета памяти не проверен с openpyxl {openpyxl_version}; "
+                       "книга загружается целиком")
+        return load_workbook(path), None
+    reader = _BudgetReader(path)
+    reader.read()
+    source = reader.source
+    if source is not None:
+        source.budget_bytes = memory_budget_mb * 1024 * 1024
+        logger.info(f"🧠 Бюджет памяти {memory_budget_mb} МБ: лист '{PART_INFO_SHEET}' обрабатывается частями")
+    return reader.wb, source
@@ -1,160 +1,158 @@
 # part_info_processor.py
 
-from openpyxl.styles import Font
-from pricing import calculate_prices_for_section
+import math
+from formatting import StyleRegistry, BOLD_FONT, CENTER_ALIGNMENT
+from pricing import apply_section_prices
+from section_model import extract_sections, price_sections
+from excel_utils import insert_blank_rows
+from config import PART_INFO_SHEET, PRICE_HEADER_NAMES
+from config import THICKNESS_COL, TUBE_COUNT_COL, LOGISTICS_COL
 import logging
 
 logger = logging.getLogger(__name__)
-PART_INFO_SHEET = "Part Info"
 
-def process_part_info_sheet(ws, price_data_ws):
-    """Обрабатывает лист Part Info с расчётами"""
+def clear_price_column(ws, price_col, widths=None, sections=None):
+    """Очищает столбец с ценами во всех строках или только в строках секций sections."""
+    if sections is None:
+        if widths is not None:
+            widths.reset_column(price_col)
+        ranges = [(None, None)]
+    else:
+        # Остальные строки листа сохраняют цены: накопленная ширина не сбрасывается, очищенные значения забываются
+        ranges = [(section.row, section.end_row) for section in sections]
+    for min_row, max_row in ranges:
+        for (cell,) in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=price_col, max_col=price_col):
+            if cell.value and isinstance(cell.value, (int, float, str)):
+                if str(cell.value).strip().lower() not in PRICE_HEADER_NAMES:
+                    if widths is not None:
+                        widths.forget(price_col, cell.value)
+                    cell.value = None
+            if widths is not None and sections is None:
+                # Столбец сброшен — оставшиеся значения учитываются заново
+                widths.observe(price_col, cell.value)
+
+def copy_tube_counts_to_part_info(ws, layout, section_tube_counts, widths=None):
+    """Записывает Tube Count (tube_counts.TubeCountIndex) в строки секций листа Part Info.
+
+    Возвращает число секций, для которых Tube Count не нашёлся.
+    """
+    registry = StyleRegistry.for_workbook(ws.parent)
+    copied = 0
+    unmatched = []
+    for section in layout.sections:
+        tube_count = section_tube_counts.lookup(section.label)
+        if tube_count is None:
+            unmatched.append(section.row)
+            continue
+        tube_cell = _replace_value(ws, section.row, TUBE_COUNT_COL, f"Tube Count: {tube_count}", widths)
+        registry.apply([tube_cell], font=BOLD_FONT, alignment=CENTER_ALIGNMENT)
+        copied += 1
+    logger.info(f"🧮 Tube Count скопирован для секций: {copied}")
+    if unmatched and section_tube_counts:
+        logger.debug("🧮 Секции без Tube Count (строки): %s", unmatched[:20])
+    return len(unmatched)
+
+def _replace_value(ws, row, column, value, widths):
+    """ws.cell(row, column, value) с учётом в widths: прежнее значение забывается, новое учитывается."""
+    cell = ws.cell(row=row, column=column)
+    if widths is not None:
+        widths.forget(column, cell.value)
+        widths.observe(column, value)
+    cell.value = value
+    return cell
+
+def _write_totals(ws, row, totals, bold_col, bold_cells, widths):
+    for column, value in totals.items():
+        ws.cell(row=row, column=column, value=value)
+        if widths is not None:
+            widths.observe(column, value)
+    if bold_col:
+        bold_cells.append(ws.cell(row=row, column=bold_col))
+
+def _totals_labels(section, totals, total_price_section):
+    """{столбец: текст} строки итогов и столбец, выделяемый жирным."""
+    labels = {}
+    labels[section.column("Qty")] = f"Total Qty: {totals.qty}"
+    labels[section.column("Part Length(mm)")] = f"Total Length: {totals.length}"
+    if section.column("Contour Qty") and totals.contour > 0:
+        labels[section.column("Contour Qty")] = f"Total Contour: {totals.contour}"
+    if section.column("Cut Length(mm)") and totals.cut > 0:
+        labels[section.column("Cut Length(mm)")] = f"Total Cut Length: {totals.cut}"
+
+    # Добавляем общую стоимость секции
+    bold_col = None
+    if total_price_section is not None and section.column("Price(₽)"):
+        labels[section.column("Price(₽)")] = f"Total Price Section: {total_price_section:.2f}"
+        bold_col = section.column("Price(₽)")
+    return labels, bold_col
+
+def process_part_info_sheet(ws, price_index, layout, widths=None, incremental=False, workers=None, records=None):
+    """Обрабатывает лист Part Info с расчётами.
+
+    layout — результат scan_layout; widths — ColumnWidthTracker, которому сообщаются все записи.
+    incremental — пересчитываются только секции из layout.sections (остальные не трогаются),
+    а итоговая строка, оставшаяся от прошлого запуска, перезаписывается, а не вставляется заново.
+    workers — число процессов для расчёта цен (см. section_model.price_sections);
+    records — price_export.PriceRecords, куда попадают секции с результатами расчёта.
+    Возвращает число секций, для которых рассчитаны цены.
+    """
     if ws.title != PART_INFO_SHEET:
-        return
+        return 0
 
     logger.info("📄 Обработка листа 'Part Info'")
-    # Находим столбец с ценами
-    price_col = None
-    for cell in ws[1]:
-        if cell.value and str(cell.value).strip().lower() in ["price(₽)", "цена"]:
-            price_col = cell.column
-            break
-
-    if price_col:
-        clear_price_column(ws, price_col)
-
-    section_rows = []
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value and isinstance(cell.value, str) and "section:" in cell.value.lower():
-                section_rows.append(cell.row)
-                break
-
-    # Обрабатываем секции в обратном порядке
-    for i in range(len(section_rows)-1, -1, -1):
-        row_num = section_rows[i]
-        thickness_values = []
-        tube_count = None
-        start_data_row = row_num + 1
-        end_data_row = ws.max_row if i == len(section_rows)-1 else section_rows[i+1]-1
-
-        # Рассчитываем цены для всех ID в секции и получаем общую стоимость
-        total_price_section = calculate_prices_for_section(ws, price_data_ws, row_num, end_data_row)
-
-        header_row = None
-        id_col = None
-        for r in range(start_data_row, end_data_row + 1):
-            row_values = [str(cell.value).strip().lower() if cell.value else "" for cell in ws[r]]
-            if "id" in row_values and "part name" in row_values and "qty" in row_values:
-                header_row = r
-                for cell in ws[r]:
-                    if str(cell.value).strip().lower() == "id":
-                        id_col = cell.column
-                        break
-                break
-
-        if not header_row or not id_col:
+    if layout.price_col:
+        clear_price_column(ws, layout.price_col, widths, layout.sections if incremental else None)
+
+    # Чтение листа и расчёт — отдельные этапы; расчёт идёт по модели и может занять пул процессов
+    sections = extract_sections(ws, layout)
+    results = price_sections(sections, price_index, workers)
+    if records is not None:
+        records.add_sections(ws, sections, results)
+
+    # Итоговые строки только планируем: (строка вставки в исходной нумерации, {столбец: значение}, столбец жирного шрифта)
+    planned_totals = []
+    bold_cells = []
+    sections_priced = 0
+
+    # Записываем секции в обратном порядке
+    for section, result in zip(reversed(sections), reversed(results)):
+        row_num = section.row
+        header = section.header
+
+        total_price_section = apply_section_prices(ws, section, result, widths)
+        if total_price_section is not None:
+            sections_priced += 1
+
+        if not section.header_row:
             continue
-
-        col_indices = {
-            "ID": id_col,
-            "Part Name": None,
-            "Qty": None,
-            "Part Length(mm)": None,
-            "Contour Qty": None,
-            "Cut Length(mm)": None,
-            "Price(₽)": None
-        }
-
-        for cell in ws[header_row]:
-            if cell.value in col_indices:
-                col_indices[cell.value] = cell.column
-
-        if not col_indices["Qty"] or not col_indices["Part Length(mm)"]:
+        if not section.column("Qty") or not section.column("Part Length(mm)"):
             continue
 
-        last_data_row = header_row
-        for r in range(header_row + 1, end_data_row + 1):
-            id_cell = ws.cell(row=r, column=id_col)
-            if id_cell.value is None or (isinstance(id_cell.value, str) and not id_cell.value.strip().isdigit()):
-                break
-            last_data_row = r
-
-        if last_data_row > header_row:
-            total_qty = 0
-            total_length = 0
-            total_contour = 0
-            total_cut_length = 0
-
-            for data_row in range(header_row + 1, last_data_row + 1):
-                try:
-                    qty = float(ws.cell(row=data_row, column=col_indices["Qty"]).value) or 0
-                    part_length = float(ws.cell(row=data_row, column=col_indices["Part Length(mm)"]).value) or 0
-                    contour_qty = float(ws.cell(row=data_row, column=col_indices["Contour Qty"]).value) or 0 if col_indices["Contour Qty"] else 0
-                    cut_length = float(ws.cell(row=data_row, column=col_indices["Cut Length(mm)"]).value) or 0 if col_indices["Cut Length(mm)"] else 0
-
-                    total_qty += qty
-                    total_length += qty * part_length
-                    total_contour += qty * contour_qty
-                    total_cut_length += qty * cut_length
-                except (ValueError, TypeError):
-                    continue
-
-            result_row = last_data_row + 1
-            ws.insert_rows(result_row)
-
-            if col_indices["Qty"]:
-                ws.cell(row=result_row, column=col_indices["Qty"], value=f"Total Qty: {total_qty}")
-
-            if col_indices["Part Length(mm)"]:
-                ws.cell(row=result_row, column=col_indices["Part Length(mm)"], value=f"Total Length: {total_length}")
-
-            if col_indices["Contour Qty"] and total_contour > 0:
-                ws.cell(row=result_row, column=col_indices["Contour Qty"], value=f"Total Contour: {total_contour}")
-
-            if col_indices["Cut Length(mm)"] and total_cut_length > 0:
-                ws.cell(row=result_row, column=col_indices["Cut Length(mm)"], value=f"Total Cut Length: {total_cut_length}")
-
-            # Добавляем общую стоимость секции
-            if total_price_section is not None and col_indices["Price(₽)"]:
-                ws.cell(row=result_row, column=col_indices["Price(₽)"], value=f"Total Price Section: {total_price_section:.2f}").font = Font(bold=True)
-
-        for cell in ws[row_num]:
-            if cell.value and isinstance(cell.value, str):
-                cell_text = cell.value.lower()
-                for keyword in ["толщина стенки", "средняя толщина ноги", "толщина"]:
-                    value = extract_thickness_value(cell_text, keyword)
-                    if value is not None:
-                        thickness_values.append(value)
-                if "tube count:" in cell_text:
-                    try:
-                        tube_count = int(re.search(r'tube count:\s*(\d+)', cell_text).group(1))
-                    except (AttributeError, ValueError):
-                        pass
-
-        if thickness_values:
-            max_value = math.ceil(max(thickness_values))
-            ws.cell(row=row_num, column=5, value=f"Толщина стенки: {max_value}").font = Font(bold=True)
-
-        if tube_count is not None and price_data_ws and thickness_values:
-            max_value = math.ceil(max(thickness_values))
-            price_per_tube = None
-
-            for price_row in price_data_ws.iter_rows(min_row=2):
-                thickness_cell = price_row[0]
-                price_cell = price_row[1]
-
-                if thickness_cell.value is not None and price_cell.value is not None:
-                    try:
-                        thickness = float(thickness_cell.value)
-                        if abs(thickness - max_value) < 0.01:
-                            price_per_tube = float(price_cell.value)
-                            break
-                    except ValueError:
-                        pass
-
-            if price_per_tube is not None:
-                logistics_cost = tube_count * price_per_tube
-                ws.cell(row=row_num, column=7, value=f"Logistics Cost: {logistics_cost:.2f}").font = Font(bold=True)
-
-    logger.info("✅ Лист 'Part Info' успешно обработан")
\ No newline at end of file
+        if result.totals is not None:
+            totals, bold_col = _totals_labels(section, result.totals, total_price_section)
+            if incremental and section.result_row is not None:
+                for cell in next(ws.iter_rows(min_row=section.result_row, max_row=section.result_row,
+                                              max_col=section.max_column)):
+                    if widths is not None:
+                        widths.forget(cell.column, cell.value)
+                    cell.value = None
+                _write_totals(ws, section.result_row, totals, bold_col, bold_cells, widths)
+            else:
+                planned_totals.append((section.last_data_row + 1, totals, bold_col))
+
+        if header.thicknesses:
+            max_value = math.ceil(header.max_thickness)
+            bold_cells.append(_replace_value(ws, row_num, THICKNESS_COL, f"Толщина стенки: {max_value}", widths))
+
+        if result.logistics_cost is not None:
+            bold_cells.append(_replace_value(ws, row_num, LOGISTICS_COL, f"Logistics Cost: {result.logistics_cost:.2f}",
+                                             widths))
+
+    # Все итоговые строки вставляются одной перестройкой листа
+    new_rows = insert_blank_rows(ws, [insert_row for insert_row, _, _ in planned_totals])
+    for insert_row, totals, bold_col in planned_totals:
+        _write_totals(ws, new_rows[insert_row], totals, bold_col, bold_cells, widths)
+    StyleRegistry.for_workbook(ws.parent).apply(bold_cells, font=BOLD_FONT)
+
+    logger.info("✅ Лист 'Part Info' успешно обработан")
+    return sections_priced
\ No newline at end of file
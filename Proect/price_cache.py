@@ -0,0 +1,195 @@
+# price_cache.py
+"""Разбор прайс-листа в нормализованную таблицу и её кэш на диске.
+
+Прайс меняется редко, поэтому разобранная таблица (значения, стили, ширины столбцов)
+сохраняется в <каталог прайса>/.price_cache/<имя файла>.json. Запись кэша действительна,
+пока совпадают путь, mtime и размер файла; при другом mtime сверяется SHA-256 содержимого.
+Кэш хранит только данные (JSON, стили — их XML-разметкой): чтение кэша не исполняет код,
+даже если файл в каталоге прайса подменён.
+Кроме xlsx принимаются CSV (разделитель ; , или табуляция) и JSON (список строк или объектов).
+"""
+
+import csv
+import json
+import os
+from copy import copy
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+import openpyxl
+from openpyxl.styles import Alignment, Font
+from openpyxl.styles.fills import Fill
+from openpyxl.xml.functions import fromstring, tostring
+from backup_utils import file_digest
+from config import PRICE_CACHE_DIR, PRICE_CACHE_ENABLED
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении формата таблицы или правил нормализации: старый кэш тогда не используется
+PRICE_CACHE_VERSION = 2
+
+# rows — значения строк начиная с (first_row, first_col); styles — различные (font, fill, alignment);
+# cell_styles — {(смещение строки, смещение столбца): индекс в styles}; widths — {буква столбца: ширина}
+PriceTable = namedtuple("PriceTable", "rows first_row first_col styles cell_styles widths")
+
+def normalize_price_value(value):
+    """Текст с числом ("1 234,5") — в число; числа округляются до копеек."""
+    if isinstance(value, str):
+        try:
+            value = float(value.replace(",", ".").replace(" ", ""))
+        except ValueError:
+            return value
+    if isinstance(value, (int, float)):
+        return round(value, 2)
+    return value
+
+def _table_from_rows(rows):
+    """Таблица без стилей (CSV, JSON)."""
+    return PriceTable([tuple(normalize_price_value(v) for v in row) for row in rows], 1, 1, [], {}, {})
+
+def _read_xlsx(price_file):
+    price_wb = openpyxl.load_workbook(price_file)
+    if not price_wb.sheetnames:
+        raise ValueError("В выбранном файле нет листов с данными.")
+    sheet = price_wb[price_wb.sheetnames[0]]
+    rows = []
+    styles = []
+    style_ids = {}
+    cell_styles = {}
+    for r, row in enumerate(sheet.iter_rows()):
+        rows.append(tuple(normalize_price_value(cell.value) for cell in row))
+        for c, cell in enumerate(row):
+            if cell.has_style:
+                # Одинаковое оформление в книге — одинаковые индексы стилей
+                style = (cell._style.fontId, cell._style.fillId, cell._style.alignmentId)
+                if style not in style_ids:
+                    style_ids[style] = len(styles)
+                    styles.append((copy(cell.font), copy(cell.fill), copy(cell.alignment)))
+                cell_styles[(r, c)] = style_ids[style]
+    widths = {col: dim.width for col, dim in sheet.column_dimensions.items()}
+    return PriceTable(rows, sheet.min_row, sheet.min_column, styles, cell_styles, widths)
+
+def _read_csv(price_file):
+    with open(price_file, encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        return _table_from_rows([[value if value != "" else None for value in row] for row in csv.reader(f, dialect)])
+
+def _read_json(price_file):
+    with open(price_file, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError("JSON прайса должен быть списком строк или объектов.")
+    if data and isinstance(data[0], dict):
+        # Список объектов: заголовок — ключи первого объекта в их порядке
+        header = list(data[0])
+        return _table_from_rows([header] + [[item.get(key) for key in header] for item in data])
+    return _table_from_rows(data)
+
+_READERS = {".csv": _read_csv, ".json": _read_json}
+
+def parse_price_file(price_file):
+    """Разбирает прайс (xlsx, csv, json) в PriceTable без кэша."""
+    reader = _READERS.get(os.path.splitext(price_file)[1].lower(), _read_xlsx)
+    return reader(price_file)
+
+def _cache_path(price_file):
+    directory, name = os.path.split(os.path.abspath(price_file))
+    return os.path.join(directory, PRICE_CACHE_DIR, name + ".json")
+
+# Значения дат и времени в JSON — ISO-строкой с пометкой типа
+_TEMPORAL = {"datetime": datetime, "date": date, "time": time}
+
+def _encode_value(value):
+    if isinstance(value, timedelta):
+        return {"timedelta": value.total_seconds()}
+    for name, kind in _TEMPORAL.items():
+        if isinstance(value, kind):
+            return {name: value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    (name, data), = value.items()
+    if name == "timedelta":
+        return timedelta(seconds=data)
+    return _TEMPORAL[name].fromisoformat(data)
+
+def _style_xml(style):
+    return tostring(style.to_tree()).decode("utf-8")
+
+def _encode_table(table):
+    return {
+        "rows": [[_encode_value(value) for value in row] for row in table.rows],
+        "first_row": table.first_row,
+        "first_col": table.first_col,
+        "styles": [[_style_xml(style) for style in styles] for styles in table.styles],
+        "cell_styles": [[r, c, index] for (r, c), index in table.cell_styles.items()],
+        "widths": table.widths,
+    }
+
+def _decode_table(data):
+    return PriceTable(
+        [tuple(_decode_value(value) for value in row) for row in data["rows"]],
+        data["first_row"],
+        data["first_col"],
+        [(Font.from_tree(fromstring(font)), Fill.from_tree(fromstring(fill)), Alignment.from_tree(fromstring(alignment)))
+         for font, fill, alignment in data["styles"]],
+        {(r, c): index for r, c, index in data["cell_styles"]},
+        data["widths"],
+    )
+
+def _read_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        if not isinstance(entry, dict) or entry.get("version") != PRICE_CACHE_VERSION:
+            return None
+        entry["table"] = _decode_table(entry["table"])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Кэш прайса повреждён и будет пересоздан: {e}")
+        return None
+    return entry
+
+def _write_cache(path, entry):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(entry, table=_encode_table(entry["table"])), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Каталог прайса может быть только для чтения — работаем без кэша
+        logger.warning(f"⚠️ Не удалось сохранить кэш прайса: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_price_table(price_file, use_cache=PRICE_CACHE_ENABLED):
+    """PriceTable прайса: из кэша, если файл не менялся, иначе разбором файла."""
+    if not use_cache:
+        return parse_price_file(price_file)
+    stat = os.stat(price_file)
+    source = {"path": os.path.abspath(price_file), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    path = _cache_path(price_file)
+    entry = _read_cache(path)
+    if entry is not None and {key: entry["source"].get(key) for key in source} == source:
+        logger.info(f"⚡ Прайс взят из кэша: {os.path.basename(price_file)}")
+        return entry["table"]
+
+    source["sha256"] = file_digest(price_file)
+    if entry is not None and entry["source"].get("path") == source["path"] and entry["source"].get("sha256") == source["sha256"]:
+        # Файл перезаписан тем же содержимым — обновляем только отметку времени
+        table = entry["table"]
+        logger.info(f"⚡ Прайс взят из кэша (содержимое не изменилось): {os.path.basename(price_file)}")
+    else:
+        table = parse_price_file(price_file)
+        logger.info(f"📥 Прайс разобран и сохранён в кэш: {os.path.basename(price_file)}")
+    _write_cache(path, {"version": PRICE_CACHE_VERSION, "source": source, "table": table})
+    return table
@@ -1,63 +1,78 @@
 # price_data_handler.py
 
+from copy import copy
 from tkinter import Tk, filedialog
-import openpyxl
 from openpyxl.styles import numbers
 import os
 import logging
+from config import PRICE_SHEET_NAME
+from price_cache import PriceTable, load_price_table
 
 logger = logging.getLogger(__name__)
-PRICE_SHEET_NAME = "Price Data"
-
-def attach_price_file(wb):
-    """Добавляет лист с ценами"""
-    logger.info("💲 Выберите файл с ценами (например Price.xlsx)")
-    Tk().withdraw()
-    price_file = filedialog.askopenfilename(
-        title="Выберите файл с ценами",
-        filetypes=[("Excel files", "*.xlsx")]
-    )
+
+def write_price_sheet(ws, table):
+    """Заполняет лист значениями PriceTable: строки добавляются целиком через append,
+    одинаковое оформление назначается один раз и дальше копируется как общий стиль."""
+    for _ in range(table.first_row - 1):
+        ws.append([])
+    lead = [None] * (table.first_col - 1)
+    for row in table.rows:
+        ws.append(lead + list(row) if lead else row)
+
+    shared = {}
+    for r, row in enumerate(table.rows):
+        for c, value in enumerate(row):
+            style_id = table.cell_styles.get((r, c))
+            numeric = isinstance(value, (int, float))
+            if style_id is None and not numeric:
+                continue
+            cell = ws.cell(row=table.first_row + r, column=table.first_col + c)
+            key = (style_id, numeric)
+            if key in shared:
+                cell._style = copy(shared[key])
+                continue
+            if numeric:
+                cell.number_format = numbers.FORMAT_NUMBER_00
+            if style_id is not None:
+                font, fill, alignment = table.styles[style_id]
+                cell.font = font
+                cell.fill = fill
+                cell.alignment = alignment
+            shared[key] = cell._style
+
+    for col, width in table.widths.items():
+        ws.column_dimensions[col].width = width
+
+def attach_price_file(wb, price_file=None):
+    """Добавляет лист с ценами. price_file — путь к прайсу или уже загруженный PriceTable;
+    без price_file открывает окно выбора."""
+    if price_file is None:
+        logger.info("💲 Выберите файл с ценами (например Price.xlsx)")
+        Tk().withdraw()
+        price_file = filedialog.askopenfilename(
+            title="Выберите файл с ценами",
+            filetypes=[("Прайс-листы", "*.xlsx *.csv *.json"), ("Excel files", "*.xlsx"),
+                       ("CSV", "*.csv"), ("JSON", "*.json")]
+        )
     if not price_file:
         logger.warning("🚫 Файл с ценами не выбран. Пропускаем добавление цен.")
         return None
 
     try:
-        price_wb = openpyxl.load_workbook(price_file)
-        if not price_wb.sheetnames:
-            logger.error("❌ В выбранном файле нет листов с данными.")
-            return None
+        preloaded = isinstance(price_file, PriceTable)
+        table = price_file if preloaded else load_price_table(price_file)
 
         if PRICE_SHEET_NAME in wb.sheetnames:
             wb.remove(wb[PRICE_SHEET_NAME])
-
-        price_sheet = price_wb[price_wb.sheetnames[0]]
         new_sheet = wb.create_sheet(PRICE_SHEET_NAME)
+        write_price_sheet(new_sheet, table)
 
-        for row in price_sheet.iter_rows():
-            for cell in row:
-                value = cell.value
-                if isinstance(value, str):
-                    try:
-                        value = float(value.replace(",", ".").replace(" ", ""))
-                    except ValueError:
-                        pass
-                new_cell = new_sheet.cell(row=cell.row, column=cell.column, value=value)
-
-                if isinstance(value, (int, float)):
-                    new_cell.value = round(value, 2)
-                    new_cell.number_format = numbers.FORMAT_NUMBER_00
-
-                if cell.has_style:
-                    new_cell.font = cell.font.copy()
-                    new_cell.fill = cell.fill.copy()
-                    new_cell.alignment = cell.alignment.copy()
-
-        for col in price_sheet.column_dimensions:
-            new_sheet.column_dimensions[col].width = price_sheet.column_dimensions[col].width
-
-        logger.info(f"✅ Лист с ценами успешно добавлен из файла: {os.path.basename(price_file)}")
+        if preloaded:
+            logger.info("✅ Лист с ценами добавлен из загруженного прайс-листа")
+        else:
+            logger.info(f"✅ Лист с ценами успешно добавлен из файла: {os.path.basename(price_file)}")
         return new_sheet
 
     except Exception as e:
         logger.error(f"❌ Ошибка при добавлении файла с ценами: {str(e)}")
-        return None
\ No newline at end of file
+        return None
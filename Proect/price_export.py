@@ -0,0 +1,271 @@
+# price_export.py
+"""Выгрузка рассчитанных цен таблицами: CSV, Parquet (pyarrow), SQLite, pandas DataFrame.
+
+Данные берутся на этапе расчёта цен (process_part_info_sheet передаёт секции и их
+SectionResult в PriceRecords), а не разбором текста "Total Price Section: …" из листа.
+Две таблицы:
+- parts — строки деталей: цена (как в листе, round(…, 2)) или статус ошибки;
+- sections — секции: толщина, Tube Count, итоги, общая стоимость, Logistics Cost.
+Номера строк — строки исходного файла (до вставки итоговых строк). В инкрементальном
+режиме неизменённые секции не пересчитываются: их цены и итоги читаются из листа.
+
+Из конвейера: run_pipeline(..., export=("csv", "sqlite")) или main.py --export csv,sqlite;
+файлы пишутся в EXPORT_DIR рядом с книгой. Без записи xlsx: price_frames(path, price_file).
+"""
+
+import csv
+import os
+import sqlite3
+from datetime import datetime
+import numpy as np
+from config import EXPORT_DIR, EXPORT_SQLITE_NAME, LOGISTICS_COL
+from pricing_engine import ERROR_VALUE
+from section_model import PRICED, NO_RATES, extract_sections, price_section_model
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet — только при установленном pyarrow
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:  # DataFrame — только при установленном pandas
+    pandas = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "parquet", "sqlite")
+
+# (имя, тип SQLite)
+PART_COLUMNS = (
+    ("file", "TEXT"), ("section", "TEXT"), ("section_row", "INTEGER"), ("row", "INTEGER"),
+    ("part_id", "TEXT"), ("part_name", "TEXT"), ("qty", "REAL"), ("length_mm", "REAL"),
+    ("contour_qty", "REAL"), ("cut_length_mm", "REAL"), ("thickness", "REAL"),
+    ("price", "REAL"), ("status", "TEXT"),
+)
+SECTION_COLUMNS = (
+    ("file", "TEXT"), ("section", "TEXT"), ("label", "TEXT"), ("row", "INTEGER"), ("thickness", "REAL"),
+    ("tube_count", "INTEGER"), ("parts", "INTEGER"), ("priced_parts", "INTEGER"), ("error_parts", "INTEGER"),
+    ("total_qty", "REAL"), ("total_length_mm", "REAL"), ("total_contour", "REAL"), ("total_cut_mm", "REAL"),
+    ("total_price", "REAL"), ("logistics_cost", "REAL"), ("status", "TEXT"),
+)
+
+# Статус строки детали
+PART_PRICED = "priced"
+PART_ERROR = "error"
+PART_UNPRICED = "unpriced"
+
+def _number(value):
+    """float или None: значения деталей после try_convert — числа, но бывают и строки."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+class PriceRecords:
+    """Накопитель строк деталей и секций по столбцам; секции упорядочиваются по строке листа."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.price_version = None   # PriceIndex.digest() прайса, по которому считались цены
+        self._blocks = []   # (строка секции, значения строки секции, [значения строк деталей])
+
+    def add_sections(self, ws, sections, results):
+        """Добавляет секции (section_model.Section) с результатами расчёта (SectionResult)."""
+        for section, result in zip(sections, results):
+            self._blocks.append((section.row, self._section_row(section, result),
+                                 self._part_rows(ws, section, result)))
+
+    def _section_row(self, section, result):
+        header = section.header
+        totals = result.totals
+        priced = int(result.priced.sum()) if result.priced is not None else 0
+        errors = int(result.errors.sum()) if result.errors is not None else 0
+        return (self.file_name, header.name, section.label, section.row, _number(header.thickness),
+                header.tube_count, section.data_rows, priced, errors,
+                _number(totals.qty) if totals else None, _number(totals.length) if totals else None,
+                _number(totals.contour) if totals else None, _number(totals.cut) if totals else None,
+                _round(result.total_price) if result.status == PRICED else None,
+                _round(result.logistics_cost), result.status)
+
+    def _part_rows(self, ws, section, result):
+        count = section.data_rows
+        if not count:
+            return []
+        values = section.values
+        names = [None] * count
+        name_col = section.column("Part Name")
+        if name_col:
+            rows = ws.iter_rows(min_row=values.first_row, max_row=values.first_row + count - 1,
+                                min_col=name_col, max_col=name_col, values_only=True)
+            names = [name for (name,) in rows]
+        thickness = _number(section.header.thickness)
+        rows = []
+        for i in range(count):
+            if result.prices is not None and result.priced[i]:
+                price, status = round(float(result.prices[i]), 2), PART_PRICED
+            elif result.errors is not None and result.errors[i]:
+                price, status = None, PART_ERROR
+            else:
+                price, status = None, PART_UNPRICED
+            part_id = values.ids[i]
+            rows.append((self.file_name, section.header.name, section.row, values.first_row + i,
+                         str(part_id) if part_id is not None else None, names[i],
+                         _number(values.qty[i]), _number(values.length[i]), _number(values.contour[i]),
+                         _number(values.cut[i]), thickness, price, status))
+        return rows
+
+    def _ordered(self):
+        return sorted(self._blocks, key=lambda block: block[0])
+
+    def part_rows(self):
+        return [row for _, _, parts in self._ordered() for row in parts]
+
+    def section_rows(self):
+        return [section for _, section, _ in self._ordered()]
+
+    def columns(self):
+        """(детали, секции) как словари {имя столбца: список значений}."""
+        return _to_columns(self.part_rows(), PART_COLUMNS), _to_columns(self.section_rows(), SECTION_COLUMNS)
+
+    def __len__(self):
+        return len(self._blocks)
+
+def _label_number(value, prefix):
+    """Число из подписи вида "<prefix> 123.45", записанной в лист прошлым запуском, или None."""
+    if isinstance(value, str) and value.startswith(prefix):
+        return _number(value[len(prefix):])
+    return None
+
+def _result_from_sheet(ws, section, price_index):
+    """SectionResult неизменённой секции: цены, общая стоимость и Logistics Cost — из листа.
+
+    Строка секции после прошлого запуска дополнена подписями (толщина, Logistics Cost),
+    поэтому повторный расчёт по ней дал бы другие цены, чем записаны в листе.
+    """
+    result = price_section_model(section, price_index)
+    price_col = section.column("Price(₽)")
+    if price_col and section.data_rows:
+        first_row = section.values.first_row
+        cells = [value for (value,) in ws.iter_rows(min_row=first_row, max_row=first_row + section.data_rows - 1,
+                                                   min_col=price_col, max_col=price_col, values_only=True)]
+        result.prices = np.array([_number(value) or 0.0 for value in cells])
+        result.priced = np.array([_number(value) is not None for value in cells], dtype=bool)
+        result.errors = np.array([value == ERROR_VALUE for value in cells], dtype=bool)
+    total_price = None
+    if price_col and section.result_row:
+        total_price = _label_number(ws.cell(row=section.result_row, column=price_col).value, "Total Price Section:")
+    result.total_price = total_price
+    if total_price is not None:
+        result.status = PRICED
+    elif result.status == PRICED:
+        result.status = NO_RATES
+    result.logistics_cost = _label_number(ws.cell(row=section.row, column=LOGISTICS_COL).value, "Logistics Cost:")
+    return result
+
+def record_clean_sections(records, ws, layout, dirty, price_index):
+    """Добавляет в records секции, которые не пересчитываются (инкрементальный режим):
+    в лист они не пишутся, но в выгрузке нужны все секции книги."""
+    dirty_rows = {section.row for section in dirty.sections}
+    clean = [section for section in layout.sections if section.row not in dirty_rows]
+    sections = extract_sections(ws, layout._replace(sections=tuple(clean)))
+    records.add_sections(ws, sections, [_result_from_sheet(ws, section, price_index) for section in sections])
+
+def _to_columns(rows, schema):
+    names = [name for name, _ in schema]
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+def write_csv(records, prefix):
+    """<prefix>_parts.csv и <prefix>_sections.csv (UTF-8 с BOM — открываются в Excel)."""
+    paths = []
+    for suffix, schema, rows in (("parts", PART_COLUMNS, records.part_rows()),
+                                 ("sections", SECTION_COLUMNS, records.section_rows())):
+        path = f"{prefix}_{suffix}.csv"
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in schema])
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+def write_parquet(records, prefix):
+    """<prefix>_parts.parquet и <prefix>_sections.parquet; нужен pyarrow."""
+    if pyarrow is None:
+        raise ImportError("Для выгрузки в Parquet установите pyarrow: pip install pyarrow")
+    paths = []
+    for suffix, columns in zip(("parts", "sections"), records.columns()):
+        path = f"{prefix}_{suffix}.parquet"
+        pyarrow.parquet.write_table(pyarrow.table(columns), path)
+        paths.append(path)
+    return paths
+
+def _create_table(connection, name, schema):
+    columns = ", ".join(f"{column} {kind}" for column, kind in schema)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {name} ({columns}, exported TEXT)")
+    connection.execute(f"CREATE INDEX IF NOT EXISTS {name}_file ON {name} (file)")
+
+def write_sqlite(records, path):
+    """Таблицы priced_parts и priced_sections в базе path; строки файла заменяются одной транзакцией."""
+    exported = datetime.now().isoformat(timespec="seconds")
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            for table, schema, rows in (("priced_parts", PART_COLUMNS, records.part_rows()),
+                                        ("priced_sections", SECTION_COLUMNS, records.section_rows())):
+                _create_table(connection, table, schema)
+                connection.execute(f"DELETE FROM {table} WHERE file = ?", (records.file_name,))
+                placeholders = ", ".join("?" * (len(schema) + 1))
+                connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                                       (row + (exported,) for row in rows))
+    finally:
+        connection.close()
+    return [path]
+
+def to_dataframes(records):
+    """(детали, секции) как pandas.DataFrame; нужен pandas."""
+    if pandas is None:
+        raise ImportError("Для DataFrame установите pandas: pip install pandas")
+    parts, sections = records.columns()
+    return pandas.DataFrame(parts), pandas.DataFrame(sections)
+
+def check_formats(formats):
+    """ValueError для неизвестных форматов — до обработки книги, а не после её сохранения."""
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Неизвестные форматы выгрузки: {', '.join(sorted(unknown))}")
+    if "parquet" in formats and pyarrow is None:
+        raise ImportError("Для выгрузки в Parquet установите pyarrow: pip install pyarrow")
+
+def export_records(records, input_path, formats, directory=None):
+    """Пишет выгрузки formats ("csv", "parquet", "sqlite") в directory (по умолчанию EXPORT_DIR
+    рядом с input_path). Возвращает список путей."""
+    check_formats(formats)
+    directory = directory or os.path.join(os.path.dirname(os.path.abspath(input_path)), EXPORT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    prefix = os.path.join(directory, os.path.splitext(os.path.basename(input_path))[0])
+    paths = []
+    if "csv" in formats:
+        paths += write_csv(records, prefix)
+    if "parquet" in formats:
+        paths += write_parquet(records, prefix)
+    if "sqlite" in formats:
+        paths += write_sqlite(records, os.path.join(directory, EXPORT_SQLITE_NAME))
+    logger.info(f"📤 Выгрузка цен ({', '.join(formats)}): секций {len(records)}, файлов {len(paths)}")
+    return paths
+
+def price_frames(input_path, price_file=None):
+    """Цены деталей и секций файла как (DataFrame деталей, DataFrame секций) без записи xlsx."""
+    import openpyxl
+    from main import process_workbook
+    records = PriceRecords(os.path.basename(input_path))
+    process_workbook(openpyxl.load_workbook(input_path), price_file, records=records)
+    return to_dataframes(records)
@@ -0,0 +1,111 @@
+# price_index.py
+
+from bisect import bisect_left, bisect_right
+import hashlib
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+TUBE_PRICE_TOLERANCE = 0.01
+
+def _cell(row, index):
+    return row[index] if index < len(row) else None
+
+class PriceIndex:
+    """Индекс листа Price Data: отсортированные толщины и цены рядом с ними.
+
+    Строится один раз за запуск; поиск ближайшей и точной толщины — bisect.
+    Столбцы листа: A — толщина, B — цена за трубу, C — цена за контур,
+    D — цена за метр резки.
+    """
+
+    def __init__(self, rows):
+        rates = []
+        tubes = []
+        for order, row in enumerate(rows):
+            try:
+                thickness = float(_cell(row, 0))
+            except (ValueError, TypeError):
+                continue
+            if math.isnan(thickness):
+                continue
+            contour, cut = _cell(row, 2), _cell(row, 3)
+            try:
+                rates.append((thickness, order, float(contour) if contour else 0, float(cut) if cut else 0))
+            except (ValueError, TypeError):
+                pass
+            per_tube = _cell(row, 1)
+            if per_tube is not None:
+                try:
+                    tubes.append((thickness, order, float(per_tube)))
+                except (ValueError, TypeError):
+                    pass
+
+        # При одинаковой толщине побеждает строка, стоящая выше в листе
+        rates = self._first_per_thickness(rates)
+        self.thicknesses = [r[0] for r in rates]
+        self._rate_order = [r[1] for r in rates]
+        self.contour = [r[2] for r in rates]
+        self.cut = [r[3] for r in rates]
+
+        tubes.sort()
+        self.tube_thicknesses = [t[0] for t in tubes]
+        self._tube_order = [t[1] for t in tubes]
+        self.per_tube = [t[2] for t in tubes]
+        logger.debug(f"📇 Индекс цен построен: {len(self.thicknesses)} толщин, {len(self.per_tube)} цен за трубу")
+
+    @staticmethod
+    def _first_per_thickness(entries):
+        entries.sort()
+        unique = []
+        for entry in entries:
+            if not unique or unique[-1][0] != entry[0]:
+                unique.append(entry)
+        return unique
+
+    @classmethod
+    def from_sheet(cls, price_ws):
+        """Строит индекс по листу с ценами (данные со второй строки)."""
+        return cls(price_ws.iter_rows(min_row=2, values_only=True))
+
+    def __len__(self):
+        return len(self.thicknesses)
+
+    def digest(self):
+        """Версия прайс-листа: хэш толщин и цен, по которым считаются секции.
+
+        Не зависит от имени и оформления файла прайса: одинаковые цены — одинаковая версия.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(repr((self.thicknesses, self.contour, self.cut,
+                            self.tube_thicknesses, self.per_tube)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def nearest(self, thickness):
+        """Цены для ближайшей толщины: {'C': за контур, 'D': за метр резки} или None."""
+        keys = self.thicknesses
+        if not keys:
+            return None
+        i = bisect_left(keys, thickness)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(keys):
+                diff = abs(keys[j] - thickness)
+                if best is None or diff < best[0] or (diff == best[0] and self._rate_order[j] < self._rate_order[best[1]]):
+                    best = (diff, j)
+        if best is None or math.isnan(best[0]):
+            return None
+        j = best[1]
+        return {'C': self.contour[j], 'D': self.cut[j]}
+
+    def tube_price(self, thickness, tolerance=TUBE_PRICE_TOLERANCE):
+        """Цена за трубу для толщины, совпадающей с точностью tolerance, или None."""
+        keys = self.tube_thicknesses
+        lo = bisect_left(keys, thickness - tolerance)
+        hi = bisect_right(keys, thickness + tolerance)
+        best = None
+        for j in range(lo, hi):
+            if abs(keys[j] - thickness) < tolerance and (best is None or self._tube_order[j] < self._tube_order[best]):
+                best = j
+        return self.per_tube[best] if best is not None else None
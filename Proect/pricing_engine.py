@@ -0,0 +1,145 @@
+# pricing_engine.py
+
+from collections import namedtuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+ERROR_VALUE = "ERROR"
+
+SectionValues = namedtuple("SectionValues", ["first_row", "ids", "qty", "length", "contour", "cut"])
+SectionTotals = namedtuple("SectionTotals", ["qty", "length", "contour", "cut"])
+
+def read_section_values(ws, section):
+    """Один проход по строкам деталей секции: сырые значения нужных столбцов."""
+    columns = section.columns
+    first_row = section.header_row + 1
+    picked = [columns.get(name) for name in ("ID", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)")]
+    lists = [[] for _ in picked]
+    if first_row <= section.end_row:
+        for values in ws.iter_rows(min_row=first_row, max_row=section.end_row,
+                                   max_col=section.max_column, values_only=True):
+            for target, column in zip(lists, picked):
+                target.append(values[column - 1] if column and column <= len(values) else None)
+    return SectionValues(first_row, *lists)
+
+def _parse_optional(values):
+    """float(v) if v else 0 — правило расчёта цен. Возвращает (массив, маска ошибок)."""
+    parsed = np.zeros(len(values))
+    errors = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if value:
+            try:
+                parsed[i] = float(value)
+            except (ValueError, TypeError):
+                errors[i] = True
+    return parsed, errors
+
+def _parse_required(values):
+    """float(v) or 0 — правило расчёта итогов: пустое значение — ошибка строки."""
+    parsed = np.zeros(len(values))
+    errors = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        try:
+            parsed[i] = float(value)
+        except (ValueError, TypeError):
+            errors[i] = True
+    return parsed, errors
+
+def _running_sum(terms):
+    """Последовательная сумма слева направо (как +=), а не попарная, как у np.sum."""
+    return float(np.cumsum(terms)[-1]) if len(terms) else 0
+
+def compute_section_prices(values, rates, logistics_cost):
+    """Расчёт price_section без записи в лог (для рабочих процессов).
+
+    Возвращает (цены, маска строк с ценой, маска строк ERROR, общая стоимость секции,
+    число строк, пропущенных при расчёте total_length).
+    """
+    qty, qty_err = _parse_optional(values.qty)
+    length, length_err = _parse_optional(values.length)
+    contour, contour_err = _parse_optional(values.contour)
+    cut, cut_err = _parse_optional(values.cut)
+
+    length_ok = ~(qty_err | length_err)
+    total_length = _running_sum((length * qty)[length_ok])
+    skipped = int((~length_ok).sum())
+
+    has_id = np.fromiter((bool(value) for value in values.ids), dtype=bool, count=len(values.ids))
+    errors = has_id & (qty_err | length_err | contour_err | cut_err)
+    priced = has_id & ~errors
+
+    contour_cost = contour * rates['C']
+    cut_cost = cut / 1000 * rates['D']
+    if total_length > 0:
+        logistics_part = length / total_length * logistics_cost
+    else:
+        logistics_part = np.zeros(len(length))
+    prices = contour_cost + cut_cost + logistics_part
+
+    total_price_section = _running_sum((prices * qty)[priced])
+    return prices, priced, errors, total_price_section, skipped
+
+def price_section(values, rates, logistics_cost):
+    """Цены деталей секции массивами.
+
+    Возвращает (цены, маска строк с ценой, маска строк ERROR, общая стоимость секции).
+    Формулы и порядок операций совпадают с построчным расчётом.
+    """
+    prices, priced, errors, total_price_section, skipped = compute_section_prices(values, rates, logistics_cost)
+    if skipped:
+        logger.warning(f"⚠️ Строк, пропущенных при расчёте total_length: {skipped}")
+    return prices, priced, errors, total_price_section
+
+def write_prices(ws, values, price_col, prices, priced, errors, widths=None):
+    """Записывает цены (round(…, 2)) и ERROR одним проходом по столбцу цен."""
+    if not len(prices):
+        return
+    last_row = values.first_row + len(prices) - 1
+    rows = ws.iter_rows(min_row=values.first_row, max_row=last_row, min_col=price_col, max_col=price_col)
+    for i, (cell,) in enumerate(rows):
+        if priced[i]:
+            cell.value = round(float(prices[i]), 2)
+        elif errors[i]:
+            cell.value = ERROR_VALUE
+        else:
+            continue
+        if widths is not None:
+            widths.observe(price_col, cell.value)
+
+def section_totals(values, data_rows, has_contour, has_cut):
+    """Итоги Total Qty/Length/Contour/Cut по первым data_rows строкам деталей.
+
+    Строка, где хоть одно значение не читается как число, пропускается целиком.
+    Итог остаётся целым 0, если ни одно слагаемое не стало float — как при += с 0.
+    """
+    n = data_rows
+    qty, ok = _parse_required(values.qty[:n])
+    ok = ~ok
+    length, err = _parse_required(values.length[:n])
+    ok &= ~err
+    if has_contour:
+        contour, err = _parse_required(values.contour[:n])
+        ok &= ~err
+    else:
+        contour = np.zeros(n)
+    if has_cut:
+        cut, err = _parse_required(values.cut[:n])
+        ok &= ~err
+    else:
+        cut = np.zeros(n)
+
+    qty, length, contour, cut = qty[ok], length[ok], contour[ok], cut[ok]
+    # float(v) or 0 даёт int 0 для нулей; произведение остаётся int, только если оба множителя — int 0
+    qty_zero = qty == 0
+
+    def total(terms, int_terms):
+        return _running_sum(terms) if not int_terms.all() else 0
+
+    return SectionTotals(
+        qty=total(qty, qty_zero),
+        length=total(qty * length, qty_zero & (length == 0)),
+        contour=total(qty * contour, qty_zero & (contour == 0)),
+        cut=total(qty * cut, qty_zero & (cut == 0)),
+    )
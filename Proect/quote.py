@@ -0,0 +1,122 @@
+# quote.py
+"""Расчёт стоимости секций Part Info без изменения книги.
+
+Книга читается выбранным способом (config.READER_BACKEND): "openpyxl" — полная загрузка,
+эталон; "xml" — XlsxValuesReader, только значения нужных листов. Значения приводятся
+тем же try_convert, что и в основном конвейере, поэтому итоги совпадают с
+"Total Price Section" после обработки файла.
+
+    python quote.py file_Nest.xlsx --price Price.xlsx --backend xml
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections import namedtuple
+from config import PART_INFO_SHEET, PRICE_SHEET_NAME, READER_BACKEND
+from data_processing import try_convert
+from price_cache import load_price_table
+from price_index import PriceIndex
+from pricing_engine import SectionValues, read_section_values, price_section
+from section_header import parse_section_row, get_section_name
+from tube_counts import collect_section_tube_counts
+from sheet_layout import scan_layout, section_row_cells
+from xlsx_reader import ValueCell, open_values_workbook
+import logging
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_HEADERS = ("ID", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)")
+
+SectionQuote = namedtuple("SectionQuote", [
+    "name",            # имя секции (get_section_name)
+    "label",           # текст строки секции
+    "thickness",       # толщина для подбора цен
+    "tube_count",      # Tube Count с листов Nesting Summary / Tube Info или из строки секции
+    "parts",           # строк деталей с ценой
+    "total_price",     # Total Price Section или None, если конвейер его не запишет
+    "logistics_cost",  # Logistics Cost (Tube Count × цена трубы) или None
+])
+
+def _converted(value):
+    converted, _ = try_convert(value)
+    return value if converted is None else converted
+
+def _converted_values(values):
+    return SectionValues(values.first_row, *([_converted(v) for v in column] for column in values[1:]))
+
+def quote_sheet(ws, price_index, section_tube_counts):
+    """SectionQuote для каждой секции листа Part Info (лист openpyxl или ValuesSheet)."""
+    quotes = []
+    for section in scan_layout(ws).sections:
+        cells = [ValueCell(cell.row, cell.column, _converted(cell.value)) for cell in section_row_cells(ws, section)]
+        header = parse_section_row(cells)
+        name = get_section_name(section.label)
+        tube_count = section_tube_counts.lookup(section.label, header.tube_count)
+
+        total_price = None
+        parts = 0
+        rates = price_index.nearest(header.thickness) if price_index is not None and header.thickness is not None else None
+        # Как в process_part_info_sheet: без строк деталей итог секции не пишется
+        has_parts = section.header_row is not None and section.last_data_row > section.header_row
+        if rates and has_parts and all(key in section.columns for key in REQUIRED_HEADERS):
+            values = _converted_values(read_section_values(ws, section))
+            _, priced, _, total = price_section(values, rates, header.logistics_cost)
+            total_price = round(total, 2)
+            parts = int(priced.sum())
+
+        logistics_cost = None
+        if tube_count is not None and price_index is not None and header.thicknesses:
+            per_tube = price_index.tube_price(math.ceil(header.max_thickness))
+            if per_tube is not None:
+                logistics_cost = round(tube_count * per_tube, 2)
+        quotes.append(SectionQuote(name, section.label, header.thickness, tube_count, parts, total_price, logistics_cost))
+    return quotes
+
+def _price_index_from_table(table):
+    # Как PriceIndex.from_sheet: данные со второй строки листа, значения со столбца A
+    lead = (None,) * (table.first_col - 1)
+    return PriceIndex(lead + tuple(row) for row in table.rows[max(0, 2 - table.first_row):])
+
+def quote_file(path, price_file=None, backend=READER_BACKEND):
+    """Цены секций файла. Цены — из price_file или листа Price Data самой книги."""
+    book = open_values_workbook(path, backend)
+    try:
+        if PART_INFO_SHEET not in book.sheetnames:
+            logger.warning(f"⚠️ В файле нет листа '{PART_INFO_SHEET}': {path}")
+            return []
+        section_tube_counts = collect_section_tube_counts(book)
+        if price_file:
+            price_index = _price_index_from_table(load_price_table(price_file))
+        elif PRICE_SHEET_NAME in book.sheetnames:
+            price_index = PriceIndex.from_sheet(book[PRICE_SHEET_NAME])
+        else:
+            price_index = None
+        return quote_sheet(book[PART_INFO_SHEET], price_index, section_tube_counts)
+    finally:
+        if hasattr(book, "close"):
+            book.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Стоимость секций Nest-файла без изменения файла.")
+    parser.add_argument("file")
+    parser.add_argument("--price", default=None, help="Файл цен (xlsx, csv, json); по умолчанию — лист Price Data")
+    parser.add_argument("--backend", choices=("openpyxl", "xml"), default=READER_BACKEND)
+    parser.add_argument("--json", action="store_true", help="Вывести JSON вместо таблицы")
+    args = parser.parse_args(argv)
+
+    quotes = quote_file(args.file, args.price, args.backend)
+    if args.json:
+        json.dump([quote._asdict() for quote in quotes], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    for quote in quotes:
+        price = f"{quote.total_price:.2f}" if quote.total_price is not None else "—"
+        print(f"{quote.label[:60]:<60} {price:>12}")
+    total = sum(quote.total_price for quote in quotes if quote.total_price is not None)
+    print(f"{'Итого':<60} {total:>12.2f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+# quote_history.py
+"""История расчётов: локальная база SQLite с секциями и деталями всех обработанных книг.
+
+После сохранения каждой книги (main.process_excel, batch.process_file — пакет и демон, задание
+сервиса) record_run дописывает в базу запуск (файл, время, прайс-лист и его версия —
+PriceIndex.digest()), секции и детали с рассчитанными ценами одной транзакцией.
+Время запуска повторено в строках секций и деталей, чтобы фильтр по дате шёл по индексу
+вместе с толщиной или именем, без соединения с таблицей запусков.
+
+    python quote_history.py rates --thickness 5 --since 2026-07-01   # цена за метр резки и длины
+    python quote_history.py sections --name "r00%" --since 2026-07-01
+    python quote_history.py parts --name "Кронштейн%" --limit 20
+    python quote_history.py runs --since 2026-10-01
+
+--name — шаблон LIKE (% — любые символы); --until — дата, не включая её.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from config import QUOTE_HISTORY_DB
+from price_export import PART_COLUMNS, SECTION_COLUMNS
+from section_model import PRICED
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Секции с толщиной в пределах ±допуска от запрошенной
+THICKNESS_TOLERANCE = 0.05
+
+_RUN_COLUMNS = (
+    ("id", "INTEGER PRIMARY KEY"), ("processed_at", "TEXT"), ("file", "TEXT"), ("path", "TEXT"),
+    ("price_file", "TEXT"), ("price_version", "TEXT"), ("sections", "INTEGER"), ("parts", "INTEGER"),
+    ("total_price", "REAL"),
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS quote_runs ({runs})",
+    "CREATE TABLE IF NOT EXISTS quote_sections (run_id INTEGER REFERENCES quote_runs (id), "
+    "processed_at TEXT, {sections})",
+    "CREATE TABLE IF NOT EXISTS quote_parts (run_id INTEGER REFERENCES quote_runs (id), "
+    "processed_at TEXT, {parts})",
+    "CREATE INDEX IF NOT EXISTS quote_runs_date ON quote_runs (processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_sections_thickness ON quote_sections (thickness, processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_sections_name ON quote_sections (section COLLATE NOCASE, processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_sections_date ON quote_sections (processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_sections_run ON quote_sections (run_id)",
+    "CREATE INDEX IF NOT EXISTS quote_parts_thickness ON quote_parts (thickness, processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_parts_name ON quote_parts (part_name COLLATE NOCASE, processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_parts_date ON quote_parts (processed_at)",
+    "CREATE INDEX IF NOT EXISTS quote_parts_run ON quote_parts (run_id)",
+)
+
+def history_path(path=None):
+    """Абсолютный путь к базе: path или QUOTE_HISTORY_DB; None — история отключена."""
+    path = path or QUOTE_HISTORY_DB
+    return os.path.abspath(os.path.expanduser(path)) if path else None
+
+def history_target(history=None):
+    """База истории для запуска: None — QUOTE_HISTORY_DB из config, False или "" — не писать (None)."""
+    if history is None:
+        return history_path()
+    return history_path(history) if history else None
+
+def _columns(schema):
+    return ", ".join(f"{name} {kind}" for name, kind in schema)
+
+def connect(path=None):
+    """Соединение с базой истории; таблицы и индексы создаются при первом обращении."""
+    path = history_path(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # WAL: запросы из командной строки не ждут, пока пишется очередной запуск
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    with connection:
+        for statement in _SCHEMA:
+            connection.execute(statement.format(runs=_columns(_RUN_COLUMNS), sections=_columns(SECTION_COLUMNS),
+                                                parts=_columns(PART_COLUMNS)))
+    return connection
+
+def append_run(records, input_path, price_file=None, path=None):
+    """Дописывает запуск (price_export.PriceRecords) в базу одной транзакцией; возвращает id запуска.
+
+    input_path — путь к книге; None — у книги нет постоянного пути (загрузка в сервис),
+    в истории остаётся только имя файла records.file_name.
+    """
+    processed_at = datetime.now().isoformat(timespec="seconds")
+    sections = records.section_rows()
+    parts = records.part_rows()
+    total_index = [name for name, _ in SECTION_COLUMNS].index("total_price")
+    total_price = sum(row[total_index] for row in sections if row[total_index] is not None)
+    if not isinstance(price_file, str):
+        price_file = None   # прайс выбран в диалоге или передан уже загруженным
+    connection = connect(path)
+    try:
+        with connection:
+            run_id = connection.execute(
+                "INSERT INTO quote_runs (processed_at, file, path, price_file, price_version, sections, parts, "
+                "total_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (processed_at, records.file_name, os.path.abspath(input_path) if input_path else None,
+                 os.path.basename(price_file) if price_file else None, records.price_version,
+                 len(sections), len(parts), round(total_price, 2))).lastrowid
+            for table, schema, rows in (("quote_sections", SECTION_COLUMNS, sections),
+                                        ("quote_parts", PART_COLUMNS, parts)):
+                placeholders = ", ".join("?" * (len(schema) + 2))
+                connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                                       ((run_id, processed_at) + row for row in rows))
+    finally:
+        connection.close()
+    logger.info(f"🗃️ Запуск записан в историю расчётов: секций {len(sections)}, деталей {len(parts)}")
+    return run_id
+
+def record_run(records, input_path, price_file=None, path=None):
+    """append_run после сохранения книги: ошибка базы (или создания её каталога) записывается в лог,
+    а обработка не считается неудачной — книга уже сохранена. Возвращает id запуска или None."""
+    try:
+        return append_run(records, input_path, price_file, path)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"⚠️ Не удалось записать запуск в историю расчётов: {e}")
+        return None
+
+def _where(thickness=None, name_column=None, name=None, since=None, until=None, extra=()):
+    """Условие WHERE и параметры по фильтрам командной строки."""
+    conditions = list(extra)
+    params = []
+    if thickness is not None:
+        conditions.append("thickness BETWEEN ? AND ?")
+        params += [thickness - THICKNESS_TOLERANCE, thickness + THICKNESS_TOLERANCE]
+    if name is not None:
+        conditions.append(f"{name_column} LIKE ?")
+        params.append(name)
+    if since:
+        conditions.append("processed_at >= ?")
+        params.append(since)
+    if until:
+        conditions.append("processed_at < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+def _limit(limit):
+    return f" LIMIT {int(limit)}" if limit else ""
+
+def query_runs(connection, name=None, since=None, until=None, limit=None):
+    where, params = _where(name_column="file", name=name, since=since, until=until)
+    return connection.execute(
+        "SELECT id, processed_at, file, price_file, price_version, sections, parts, total_price "
+        f"FROM quote_runs{where} ORDER BY processed_at DESC{_limit(limit)}", params)
+
+def query_sections(connection, thickness=None, name=None, since=None, until=None, limit=None):
+    where, params = _where(thickness, "section", name, since, until)
+    return connection.execute(
+        "SELECT processed_at, file, section, thickness, tube_count, parts, total_qty, total_length_mm, "
+        f"total_cut_mm, total_price, logistics_cost, status FROM quote_sections{where} "
+        f"ORDER BY processed_at DESC{_limit(limit)}", params)
+
+def query_parts(connection, thickness=None, name=None, since=None, until=None, limit=None):
+    where, params = _where(thickness, "part_name", name, since, until)
+    return connection.execute(
+        "SELECT processed_at, file, section, part_id, part_name, thickness, qty, length_mm, cut_length_mm, "
+        f"price, status FROM quote_parts{where} ORDER BY processed_at DESC{_limit(limit)}", params)
+
+def query_rates(connection, thickness=None, name=None, since=None, until=None, limit=None):
+    """Итоги рассчитанных секций по толщинам: стоимость за метр резки и за метр длины."""
+    where, params = _where(thickness, "section", name, since, until, extra=[f"status = '{PRICED}'"])
+    return connection.execute(
+        "SELECT ROUND(thickness, 2) AS thickness, COUNT(*) AS sections, SUM(total_price) AS total_price, "
+        "SUM(total_cut_mm) / 1000.0 AS cut_m, SUM(total_price) / NULLIF(SUM(total_cut_mm) / 1000.0, 0) AS per_cut_m, "
+        "SUM(total_length_mm) / 1000.0 AS length_m, "
+        "SUM(total_price) / NULLIF(SUM(total_length_mm) / 1000.0, 0) AS per_length_m "
+        f"FROM quote_sections{where} GROUP BY ROUND(thickness, 2) ORDER BY 1{_limit(limit)}", params)
+
+QUERIES = {
+    "runs": query_runs,
+    "sections": query_sections,
+    "parts": query_parts,
+    "rates": query_rates,
+}
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return "—" if value is None else str(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Запросы к истории расчётов Nest-файлов.")
+    parser.add_argument("query", choices=tuple(QUERIES),
+                        help="runs — запуски, sections — секции, parts — детали, rates — итоги по толщинам")
+    parser.add_argument("--db", default=None, help="База истории (по умолчанию — из config)")
+    parser.add_argument("--thickness", type=float, default=None, help=f"Толщина, мм (±{THICKNESS_TOLERANCE})")
+    parser.add_argument("--name", default=None, help="Имя файла, секции или детали: шаблон LIKE")
+    parser.add_argument("--since", default=None, help="С даты (ГГГГ-ММ-ДД)")
+    parser.add_argument("--until", default=None, help="До даты, не включая её (ГГГГ-ММ-ДД)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Вывести JSON вместо таблицы")
+    args = parser.parse_args(argv)
+
+    path = history_path(args.db)
+    if path is None:
+        print("❌ История расчётов отключена (QUOTE_HISTORY_DB); укажите базу через --db", file=sys.stderr)
+        return 1
+    if not os.path.exists(path):
+        print(f"❌ База истории не найдена: {path}", file=sys.stderr)
+        return 1
+    connection = connect(args.db)
+    try:
+        kwargs = {"name": args.name, "since": args.since, "until": args.until, "limit": args.limit}
+        if args.query != "runs":
+            kwargs["thickness"] = args.thickness
+        cursor = QUERIES[args.query](connection, **kwargs)
+        names = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        connection.close()
+    if args.json:
+        json.dump([dict(zip(names, row)) for row in rows], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    print("\t".join(names))
+    for row in rows:
+        print("\t".join(_format(value) for value in row))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+# run_report.py
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from config import RUN_REPORT_DIR
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows: модуля resource нет, пиковая память не измеряется
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb():
+    """Пиковый RSS процесса в МБ или None, если платформа его не сообщает."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1)
+
+class RunReport:
+    """Отчёт о запуске конвейера: время (настенное и CPU) и пиковая память по этапам, счётчики.
+
+    Замер этапа — два вызова таймеров и один getrusage, поэтому отчёт можно не отключать.
+    Этап, выполняемый для каждого листа, суммируется. Если запущен tracemalloc, для этапа
+    пишется и пик памяти Python (py_peak_mb) — максимум по вызовам этапа; в отличие от
+    пикового RSS, он не остаётся на уровне самого тяжёлого из предыдущих этапов.
+    """
+
+    def __init__(self, input_path):
+        self.input_path = input_path
+        self.started = datetime.now()
+        self.stages = {}
+        self.counters = {}
+        self.status = "ok"
+        self.error = None
+        self.path = None
+        self.profile_path = None
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        # Пики памяти Python открытых этапов до последнего tracemalloc.reset_peak() (вложенные этапы)
+        self._trace_peaks = []
+        self._py_peak = 0
+
+    @contextmanager
+    def stage(self, name):
+        """Замеряет блок кода как этап name."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        traced = tracemalloc.is_tracing()
+        if traced:
+            self._trace_enter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0, "peak_rss_mb": None})
+            entry["wall"] += time.perf_counter() - wall
+            entry["cpu"] += time.process_time() - cpu
+            entry["calls"] += 1
+            entry["peak_rss_mb"] = peak_rss_mb()
+            if traced and self._trace_peaks:
+                entry["py_peak_mb"] = max(entry.get("py_peak_mb") or 0, _mb(self._trace_exit()))
+
+    def _trace_enter(self):
+        # reset_peak сбрасывает пик и для объемлющих этапов — сохраняем его в их записях
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        self._trace_peaks = [max(previous, peak) for previous in self._trace_peaks]
+        self._py_peak = max(self._py_peak, peak)
+        self._trace_peaks.append(0)
+        tracemalloc.reset_peak()
+
+    def _trace_exit(self):
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        peak = max(self._trace_peaks.pop(), peak)
+        self._py_peak = max(self._py_peak, peak)
+        return peak
+
+    def py_peak_mb(self):
+        """Пик памяти Python за запуск (tracemalloc) в МБ или None, если трассировка не велась."""
+        if tracemalloc.is_tracing():
+            self._py_peak = max(self._py_peak, tracemalloc.get_traced_memory()[1])
+        return _mb(self._py_peak) if self._py_peak else None
+
+    def count(self, name, value=1):
+        """Увеличивает счётчик name (ячейки, секции и т.п.)."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def fail(self, error):
+        self.status = "failed"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self):
+        return {
+            "file": self.input_path,
+            "started": self.started.isoformat(timespec="seconds"),
+            "status": self.status,
+            "error": self.error,
+            "wall": round(time.perf_counter() - self._wall, 4),
+            "cpu": round(time.process_time() - self._cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "py_peak_mb": self.py_peak_mb(),
+            "stages": {name: {key: round(value, 4) if isinstance(value, float) else value
+                              for key, value in entry.items()}
+                       for name, entry in self.stages.items()},
+            "counters": dict(self.counters),
+            "profile": self.profile_path,
+        }
+
+    def default_path(self, suffix=".json"):
+        """Путь отчёта рядом с обрабатываемым файлом: reports/<имя>_<время><suffix>."""
+        report_dir = os.path.join(os.path.dirname(os.path.abspath(self.input_path)), RUN_REPORT_DIR)
+        stem = os.path.splitext(os.path.basename(self.input_path))[0]
+        return os.path.join(report_dir, f"{stem}_report_{self.started.strftime('%Y%m%d_%H%M%S')}{suffix}")
+
+    def write(self, path=None):
+        """Сохраняет отчёт в JSON и возвращает путь."""
+        path = path or self.default_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        self.path = path
+        logger.info(f"📊 Отчёт о запуске сохранён: {path}")
+        return path
+
+    @contextmanager
+    def profiled(self, enabled=True):
+        """При enabled запускает cProfile на время блока и сохраняет дамп pstats рядом с отчётом."""
+        if not enabled:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = self.default_path(".pstats")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profiler.dump_stats(path)
+            self.profile_path = path
+            logger.info(f"🔬 Профиль cProfile сохранён: {path} (python -m pstats {path})")
@@ -0,0 +1,105 @@
+# section_header.py
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ключевые слова толщины в порядке приоритета
+THICKNESS_KEYWORDS = ("толщина стенки", "средняя толщина ноги", "толщина")
+
+_THICKNESS_PATTERNS = {keyword: re.compile(rf"{re.escape(keyword)}[^\d]*([\d,\.]+)") for keyword in THICKNESS_KEYWORDS}
+_SECTION_NAME_PATTERN = re.compile(r'section:\s*(.+?)(?:\s*толщина|thickness|$)')
+_TUBE_COUNT_PATTERN = re.compile(r'tube count:\s*(\d+)')
+_LOGISTICS_COST_PATTERN = re.compile(r'Logistics Cost:\s*([\d\.]+)')
+
+class SectionHeader(namedtuple("SectionHeader", ["name", "thickness", "thicknesses", "tube_count", "logistics_cost"])):
+    """Разобранная строка секции.
+
+    thickness — толщина для расчёта цен (первая ячейка, где нашлось ключевое слово);
+    thicknesses — все найденные значения толщины по всем ячейкам и ключевым словам.
+    """
+
+    __slots__ = ()
+
+    @property
+    def max_thickness(self):
+        """Наибольшая из найденных толщин или None."""
+        return max(self.thicknesses) if self.thicknesses else None
+
+def _thickness_pattern(keyword):
+    pattern = _THICKNESS_PATTERNS.get(keyword)
+    if pattern is None:
+        pattern = _THICKNESS_PATTERNS[keyword] = re.compile(rf"{re.escape(keyword)}[^\d]*([\d,\.]+)")
+    return pattern
+
+def _thickness_in(lower_text, keyword):
+    matches = _thickness_pattern(keyword).findall(lower_text)
+    if matches:
+        try:
+            return float(matches[-1].replace(',', '.'))
+        except ValueError as e:
+            logger.warning(f"⚠️ Не удалось извлечь толщину из текста: {lower_text}, ошибка: {e}")
+    return None
+
+def extract_thickness_value(text, keyword):
+    """Извлекает значение толщины из текста по ключевому слову."""
+    value = _thickness_in(str(text).lower(), keyword)
+    if value is not None:
+        logger.debug("📐 Извлечена толщина: %s", value)
+    return value
+
+@lru_cache(maxsize=4096)
+def get_section_name(cell_value):
+    """Извлекает название секции."""
+    if not isinstance(cell_value, str):
+        return None
+    match = _SECTION_NAME_PATTERN.search(cell_value.lower())
+    if match:
+        name = match.group(1).strip()
+        logger.debug("🔖 Извлечено имя секции: %s", name)
+        return name
+    return None
+
+def parse_tube_count(text):
+    """Число из 'Tube Count: N' или None."""
+    lower = text.lower()
+    if "tube count:" not in lower:
+        return None
+    match = _TUBE_COUNT_PATTERN.search(lower)
+    return int(match.group(1)) if match else None
+
+@lru_cache(maxsize=4096)
+def _parse_texts(texts):
+    name = None
+    thickness = None
+    thicknesses = []
+    tube_count = None
+    logistics_cost = 0
+    for text in texts:
+        lower = text.lower()
+        if name is None and "section:" in lower:
+            name = get_section_name(text)
+        found = [value for value in (_thickness_in(lower, keyword) for keyword in THICKNESS_KEYWORDS) if value is not None]
+        if found and thickness is None:
+            thickness = found[0]
+        thicknesses.extend(found)
+        count = parse_tube_count(text)
+        if count is not None:
+            tube_count = count
+        if "Logistics Cost:" in text:
+            match = _LOGISTICS_COST_PATTERN.search(text)
+            try:
+                logistics_cost = float(match.group(1))
+            except (AttributeError, ValueError) as e:
+                logger.error(f"❌ Ошибка при извлечении Logistics Cost: {e}")
+                logistics_cost = 0
+    header = SectionHeader(name, thickness, tuple(thicknesses), tube_count, logistics_cost)
+    logger.debug("🔖 Разобрана строка секции: %s", header)
+    return header
+
+def parse_section_row(cells):
+    """Разбирает строку секции один раз; результат кэшируется по тексту ячеек."""
+    return _parse_texts(tuple(cell.value for cell in cells if cell.value and isinstance(cell.value, str)))
@@ -0,0 +1,193 @@
+# section_model.py
+"""Модель данных листа Part Info без openpyxl: секции, детали и результаты расчёта.
+
+Лист обрабатывается тремя этапами:
+1. extract_sections — чтение: строка секции разбирается в SectionHeader, значения
+   столбцов деталей читаются списками (SectionValues) одним проходом;
+2. price_sections — цены, итоги и Logistics Cost только по модели; на больших листах
+   секции раздаются пулу процессов, результаты возвращаются в исходном порядке;
+3. запись в лист — pricing.apply_section_prices и part_info_processor.
+
+Расчёт в рабочих процессах ничего не пишет в лог: всё, что нужно для сообщений,
+лежит в SectionResult, и сообщения выводит основной процесс при записи.
+"""
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import PRICING_WORKERS, PRICING_PARALLEL_MIN_SECTIONS
+from log_setup import setup_worker_logging
+from pricing_engine import read_section_values, compute_section_prices, section_totals
+from section_header import parse_section_row
+from sheet_layout import section_row_cells
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Столбцы, без которых цены секции не считаются
+REQUIRED_HEADERS = ("ID", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)")
+
+# Исход расчёта цен секции
+PRICED = "priced"
+NO_THICKNESS = "no_thickness"    # нет толщины в строке секции или нет Price Data
+NO_RATES = "no_rates"            # для толщины не нашлось цен
+NO_HEADERS = "no_headers"        # нет строки заголовков или обязательных столбцов
+
+class Part:
+    """Строка детали: сырые значения столбцов, как в листе."""
+
+    __slots__ = ("row", "id", "qty", "length", "contour", "cut")
+
+    def __init__(self, row, id, qty, length, contour, cut):
+        self.row = row
+        self.id = id
+        self.qty = qty
+        self.length = length
+        self.contour = contour
+        self.cut = cut
+
+    def __repr__(self):
+        return f"Part(row={self.row}, id={self.id!r}, qty={self.qty!r}, length={self.length!r})"
+
+class Section:
+    """Секция Part Info: разметка (номера строк и столбцов), разобранная строка секции
+    и значения деталей столбцами. Ссылок на лист нет — объект передаётся в другой процесс.
+    """
+
+    __slots__ = ("row", "label", "end_row", "header_row", "id_col", "columns",
+                 "last_data_row", "result_row", "max_column", "header", "values")
+
+    def __init__(self, layout, header, values=None):
+        self.row = layout.row
+        self.label = layout.label
+        self.end_row = layout.end_row
+        self.header_row = layout.header_row
+        self.id_col = layout.id_col
+        # В SectionLayout столбцы — MappingProxyType, он не сериализуется pickle
+        self.columns = dict(layout.columns)
+        self.last_data_row = layout.last_data_row
+        self.result_row = layout.result_row
+        self.max_column = layout.max_column
+        self.header = header
+        self.values = values
+
+    @classmethod
+    def from_sheet(cls, ws, layout, header=None):
+        """Читает секцию layout (SectionLayout) из листа."""
+        if header is None:
+            header = parse_section_row(section_row_cells(ws, layout))
+        values = read_section_values(ws, layout) if layout.header_row else None
+        return cls(layout, header, values)
+
+    @property
+    def data_rows(self):
+        """Число строк непрерывного блока деталей."""
+        return self.last_data_row - self.header_row if self.header_row else 0
+
+    def column(self, name):
+        """Номер столбца заголовка name или None (ID — по строке заголовков)."""
+        if name == "ID":
+            return self.columns.get(name, self.id_col)
+        return self.columns.get(name)
+
+    def parts(self):
+        """Строки деталей секции (Part) от строки заголовков до конца секции."""
+        values = self.values
+        if values is None:
+            return
+        for i, row_values in enumerate(zip(values.ids, values.qty, values.length, values.contour, values.cut)):
+            yield Part(values.first_row + i, *row_values)
+
+    def __repr__(self):
+        return f"Section(row={self.row}, label={self.label!r}, parts={len(self.values.ids) if self.values else 0})"
+
+class SectionResult:
+    """Результат расчёта секции; в лист записывается отдельным этапом."""
+
+    __slots__ = ("status", "thickness", "prices", "priced", "errors", "total_price",
+                 "skipped_rows", "totals", "logistics_cost")
+
+    def __init__(self, status, thickness=None):
+        self.status = status
+        self.thickness = thickness
+        self.prices = None
+        self.priced = None
+        self.errors = None
+        self.total_price = None      # общая стоимость без округления (при status == PRICED)
+        self.skipped_rows = 0        # строк, пропущенных при расчёте total_length
+        self.totals = None           # SectionTotals или None, если строку итогов не пишем
+        self.logistics_cost = None   # Tube Count × цена трубы или None
+
+def extract_sections(ws, layout):
+    """Секции листа в порядке layout.sections (layout — результат scan_layout)."""
+    return [Section.from_sheet(ws, section) for section in layout.sections]
+
+def price_section_model(section, price_index):
+    """Цены, итоги и Logistics Cost секции. Лист и лог не используются."""
+    header = section.header
+    rates = None
+    if header.thickness is not None and price_index is not None:
+        rates = price_index.nearest(header.thickness)
+    if header.thickness is None or price_index is None:
+        result = SectionResult(NO_THICKNESS, header.thickness)
+    elif not rates:
+        result = SectionResult(NO_RATES, header.thickness)
+    elif section.header_row is None or not all(key in section.columns for key in REQUIRED_HEADERS):
+        result = SectionResult(NO_HEADERS, header.thickness)
+    else:
+        result = SectionResult(PRICED, header.thickness)
+        (result.prices, result.priced, result.errors,
+         result.total_price, result.skipped_rows) = compute_section_prices(section.values, rates, header.logistics_cost)
+
+    if (section.header_row and section.column("Qty") and section.column("Part Length(mm)")
+            and section.data_rows > 0):
+        result.totals = section_totals(section.values, section.data_rows,
+                                       bool(section.column("Contour Qty")), bool(section.column("Cut Length(mm)")))
+
+    if header.tube_count is not None and price_index is not None and header.thicknesses:
+        price_per_tube = price_index.tube_price(math.ceil(header.max_thickness))
+        if price_per_tube is not None:
+            result.logistics_cost = header.tube_count * price_per_tube
+    return result
+
+# Индекс цен рабочего процесса: передаётся один раз при запуске, а не с каждой порцией секций
+_worker_price_index = None
+
+def _init_worker(price_index):
+    global _worker_price_index
+    _worker_price_index = price_index
+    setup_worker_logging()
+
+def _price_in_worker(section):
+    return price_section_model(section, _worker_price_index)
+
+def _default_workers():
+    if multiprocessing.parent_process() is not None:
+        # Уже в рабочем процессе (пакетная обработка) — вложенный пул только отнимет CPU у соседей
+        return 1
+    return PRICING_WORKERS or os.cpu_count() or 1
+
+def price_sections(sections, price_index, workers=None):
+    """SectionResult для каждой секции, в порядке sections.
+
+    workers — число процессов (None — PRICING_WORKERS из config или число CPU).
+    Пул запускается, только если секций не меньше PRICING_PARALLEL_MIN_SECTIONS:
+    на небольших листах запуск процессов и передача данных дороже самого расчёта.
+    """
+    workers = workers or _default_workers()
+    workers = min(workers, len(sections))
+    if workers <= 1 or len(sections) < PRICING_PARALLEL_MIN_SECTIONS:
+        return [price_section_model(section, price_index) for section in sections]
+
+    # Несколько порций на процесс: выравнивает нагрузку, если секции разного размера
+    chunksize = max(1, math.ceil(len(sections) / (workers * 4)))
+    logger.info(f"🧵 Расчёт цен {len(sections)} секций на {workers} процессах")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(price_index,)) as pool:
+            return list(pool.map(_price_in_worker, sections, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"⚠️ Пул процессов недоступен ({e}), цены считаются в одном процессе")
+        return [price_section_model(section, price_index) for section in sections]
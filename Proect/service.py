@@ -0,0 +1,419 @@
+# service.py
+"""Локальный HTTP-сервис обработки Nest-файлов: общий доступ вместо окон выбора Tk.
+
+    python service.py --price main=Price.xlsx --price old=Price_2023.csv --workers 2
+
+Прайс-листы загружаются один раз при запуске и передаются рабочим процессам пула;
+задание ссылается на прайс по идентификатору. API (ответы — JSON, кроме книги):
+
+    GET  /prices                        идентификаторы прайс-листов
+    POST /jobs?price=<id>&name=<файл>   тело — xlsx; 202 {"id": ..., "status": "queued"}
+    GET  /jobs/<id>                     состояние: queued / running / done / failed, сводка
+    GET  /jobs/<id>/result              обработанная книга (после status == done)
+
+    curl --data-binary @a_Nest.xlsx "http://127.0.0.1:8765/jobs?price=main&name=a_Nest.xlsx"
+
+Задания ждут в очереди ограниченной длины (при переполнении — 503) и выполняются
+на пуле из SERVICE_WORKERS процессов. Нагрузочный замер — benchmarks/bench_service.py.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+import openpyxl
+from config import (PART_INFO_SHEET, SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_QUEUE_LIMIT,
+                    SERVICE_MAX_UPLOAD_MB, SERVICE_JOB_DIR, SERVICE_KEEP_JOBS)
+from log_setup import setup_logging, setup_worker_logging
+from main import process_workbook
+from price_cache import load_price_table
+from price_export import PriceRecords
+from quote_history import history_target, record_run
+from run_report import RunReport
+from sheet_layout import TOTAL_PRICE_LABEL
+from workbook_writer import save_workbook
+import logging
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Прайс-листы рабочего процесса: передаются один раз при запуске пула
+_price_tables = {}
+
+def _init_worker(price_tables):
+    global _price_tables
+    _price_tables = price_tables
+    # Слушатель очереди логов — один на рабочий процесс, на всё время его жизни
+    setup_worker_logging()
+
+def section_totals_summary(ws):
+    """[{"section": текст строки секции, "total_price": число}] по строкам Total Price Section."""
+    summary = []
+    label = None
+    for row in ws.iter_rows(values_only=True):
+        for value in row:
+            if not isinstance(value, str):
+                continue
+            lower = value.lower()
+            if lower.startswith(TOTAL_PRICE_LABEL):
+                try:
+                    total = float(value.split(":", 1)[1])
+                except ValueError:
+                    continue
+                summary.append({"section": label, "total_price": total})
+            elif "section:" in lower:
+                label = value
+                break
+    return summary
+
+def _run_job(input_path, output_path, price_id, compresslevel, name=None, price_file=None):
+    """Обрабатывает книгу задания в рабочем процессе; возвращает сводку (отчёт RunReport).
+
+    name — имя загруженного файла, price_file — путь прайс-листа price_id: под ними запуск
+    записывается в историю расчётов (каталог задания временный).
+    """
+    report = RunReport(input_path)
+    history = history_target()
+    records = PriceRecords(name or os.path.basename(input_path)) if history else None
+    try:
+        with report.stage("load"):
+            wb = openpyxl.load_workbook(input_path)
+        process_workbook(wb, _price_tables[price_id], report, records=records)
+        with report.stage("save"):
+            save_workbook(wb, output_path, compresslevel)
+        if history:
+            with report.stage("history"):
+                record_run(records, None, price_file, history)
+        summary = report.to_dict()
+        summary["sections"] = section_totals_summary(wb[PART_INFO_SHEET]) if PART_INFO_SHEET in wb.sheetnames else []
+    except Exception as e:
+        report.fail(e)
+        logger.error(f"❌ Ошибка при обработке задания {input_path}: {e}")
+        summary = report.to_dict()
+    return summary
+
+class Job:
+    """Задание сервиса: файлы в собственном каталоге, состояние и сводка."""
+
+    def __init__(self, job_id, name, price_id, directory):
+        self.id = job_id
+        self.name = name
+        self.price_id = price_id
+        self.directory = directory
+        self.input_path = os.path.join(directory, name)
+        self.output_path = os.path.join(directory, f"result_{name}")
+        self.status = QUEUED
+        self.error = None
+        self.summary = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "price": self.price_id,
+            "status": self.status,
+            "error": self.error,
+            "queued_seconds": round((self.started or time.time()) - self.created, 3),
+            "run_seconds": round((self.finished or time.time()) - self.started, 3) if self.started else None,
+            "summary": self.summary,
+        }
+
+class JobService:
+    """Очередь заданий и HTTP-обработчик на asyncio; обработка — на пуле процессов."""
+
+    def __init__(self, price_tables, work_dir, workers=None, queue_limit=SERVICE_QUEUE_LIMIT,
+                 max_upload_mb=SERVICE_MAX_UPLOAD_MB, keep_jobs=SERVICE_KEEP_JOBS, compresslevel=None,
+                 price_files=None):
+        self.price_tables = price_tables
+        # {id: путь} прайс-листов — для истории расчётов (price_sources)
+        self.price_files = price_files or {}
+        self.work_dir = work_dir
+        self.workers = workers or SERVICE_WORKERS or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.max_upload = int(max_upload_mb * 1024 * 1024)
+        self.keep_jobs = keep_jobs
+        self.compresslevel = compresslevel
+        self.jobs = {}
+        self._queue = None
+        self._pool = None
+        self._dispatchers = []
+        self._server = None
+
+    async def start(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """Запускает пул, обработчики очереди и HTTP-сервер; возвращает фактический порт."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_limit)
+        self._pool = self._new_pool()
+        # Одновременно выполняется не больше заданий, чем процессов в пуле
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🌐 Сервис запущен: http://{host}:{port} (процессов: {self.workers}, "
+                    f"прайс-листов: {len(self.price_tables)})")
+        return port
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.price_tables,))
+
+    def _restart_pool(self, broken):
+        """Заменяет пул, в котором упал рабочий процесс: иначе все следующие задания сразу
+        завершались бы BrokenProcessPool. Пул меняется один раз, сколько бы заданий его ни ждало."""
+        if self._pool is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+        logger.warning("⚠️ Рабочий процесс сервиса упал — пул процессов перезапущен")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def submit(self, data, name, price_id):
+        """Ставит книгу в очередь. Возвращает Job; при полной очереди — asyncio.QueueFull."""
+        if self._queue.full():
+            raise asyncio.QueueFull
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, name, price_id, os.path.join(self.work_dir, job_id))
+        await asyncio.to_thread(_write_file, job.input_path, data)
+        try:
+            # Пока файл писался, очередь могла заполниться
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            shutil.rmtree(job.directory, ignore_errors=True)
+            raise
+        self.jobs[job_id] = job
+        logger.info(f"📥 Задание {job_id}: {name}, прайс '{price_id}', в очереди {self._queue.qsize()}")
+        return job
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started = time.time()
+            pool = self._pool
+            try:
+                job.summary = await loop.run_in_executor(pool, _run_job, job.input_path, job.output_path,
+                                                         job.price_id, self.compresslevel, job.name,
+                                                         self.price_files.get(job.price_id))
+                job.status = DONE if job.summary["status"] == "ok" else FAILED
+                job.error = job.summary["error"]
+            except Exception as e:
+                # Рабочий процесс упал целиком (BrokenProcessPool и т.п.)
+                job.status = FAILED
+                job.error = f"{type(e).__name__}: {e}"
+                if isinstance(e, BrokenProcessPool):
+                    self._restart_pool(pool)
+            job.finished = time.time()
+            self._queue.task_done()
+            if job.status == DONE:
+                logger.info(f"✅ Задание {job.id} выполнено за {job.finished - job.started:.2f} с")
+            else:
+                logger.error(f"❌ Задание {job.id}: {job.error}")
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self):
+        finished = [job for job in self.jobs.values() if job.status in (DONE, FAILED)]
+        for job in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[job.id]
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request = await _read_request(reader)
+            except ValueError as e:
+                await _respond(writer, HTTPStatus.BAD_REQUEST, _json({"error": str(e)}))
+                return
+            if request is not None:
+                method, target, headers = request
+                status, body, content_type = await self._route(method, target, headers, reader)
+                await _respond(writer, status, body, content_type)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработки запроса: {e}")
+            await _respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, _json({"error": str(e)}))
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, headers, reader):
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        if method == "GET" and parts == ["prices"]:
+            return HTTPStatus.OK, _json({"prices": sorted(self.price_tables)}), None
+        if method == "POST" and parts == ["jobs"]:
+            return await self._post_job(parse_qs(url.query), headers, reader)
+        if method == "GET" and len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return HTTPStatus.NOT_FOUND, _json({"error": "Задание не найдено"}), None
+            if len(parts) == 2:
+                return HTTPStatus.OK, _json(job.to_dict()), None
+            if parts[2] == "result":
+                if job.status != DONE:
+                    return HTTPStatus.CONFLICT, _json({"error": f"Задание в состоянии {job.status}"}), None
+                data = await asyncio.to_thread(_read_file, job.output_path)
+                return HTTPStatus.OK, data, XLSX_CONTENT_TYPE
+        return HTTPStatus.NOT_FOUND, _json({"error": "Неизвестный адрес"}), None
+
+    async def _post_job(self, query, headers, reader):
+        price_id = query.get("price", [None])[0]
+        if price_id not in self.price_tables:
+            return HTTPStatus.BAD_REQUEST, _json({"error": f"Неизвестный прайс-лист: {price_id}",
+                                                  "prices": sorted(self.price_tables)}), None
+        length = headers.get("content-length")
+        if length is None:
+            return HTTPStatus.LENGTH_REQUIRED, _json({"error": "Нужен заголовок Content-Length"}), None
+        # Только неотрицательное целое: int() принял бы и "-1", и "+5", и " 5_0"
+        if not (length.isascii() and length.isdigit()):
+            return HTTPStatus.BAD_REQUEST, _json({"error": f"Некорректный Content-Length: {length!r}"}), None
+        length = int(length)
+        if length > self.max_upload:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _json({"error": "Файл слишком большой"}), None
+        data = await reader.readexactly(length)
+        name = os.path.basename(query.get("name", ["upload_Nest.xlsx"])[0]) or "upload_Nest.xlsx"
+        try:
+            job = await self.submit(data, name, price_id)
+        except asyncio.QueueFull:
+            return HTTPStatus.SERVICE_UNAVAILABLE, _json({"error": "Очередь заданий заполнена"}), None
+        return HTTPStatus.ACCEPTED, _json({"id": job.id, "status": job.status}), None
+
+def _json(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def _read_request(reader):
+    """(метод, адрес, {заголовок: значение}) или None, если соединение закрыто.
+
+    ValueError — строка запроса не вида "МЕТОД /адрес HTTP/x.y" (ответ 400).
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").rstrip("\r\n").split(" ")
+    if len(parts) != 3 or not parts[0].isalpha() or not parts[1] or not parts[2].startswith("HTTP/"):
+        raise ValueError(f"Некорректная строка запроса: {line[:100]!r}")
+    method, target, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+async def _respond(writer, status, body, content_type=None):
+    status = HTTPStatus(status)
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type or 'application/json; charset=utf-8'}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+async def http_request(host, port, method, path, body=b""):
+    """Простой клиент для сервиса (тесты, нагрузочный замер): (код, заголовки, тело)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                      f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        data = await reader.readexactly(int(headers.get("content-length", 0)))
+        return int(status_line.split()[1]), headers, data
+    finally:
+        writer.close()
+
+def price_sources(specs):
+    """{id: путь} из описаний "id=путь" (без "id=" идентификатор — имя файла без расширения)."""
+    sources = {}
+    for spec in specs:
+        price_id, sep, path = spec.partition("=")
+        if not sep:
+            path = spec
+            price_id = os.path.splitext(os.path.basename(spec))[0]
+        sources[price_id] = os.path.abspath(path)
+    return sources
+
+def load_price_tables(specs):
+    """{id: PriceTable} из описаний "id=путь" (см. price_sources)."""
+    tables = {}
+    for price_id, path in price_sources(specs).items():
+        tables[price_id] = load_price_table(path)
+        logger.info(f"💲 Прайс-лист '{price_id}' загружен: {path}")
+    return tables
+
+async def serve(price_tables, host, port, work_dir, workers=None, queue_limit=SERVICE_QUEUE_LIMIT,
+                compresslevel=None, price_files=None):
+    service = JobService(price_tables, work_dir, workers, queue_limit, compresslevel=compresslevel,
+                         price_files=price_files)
+    await service.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный HTTP-сервис обработки Nest-файлов.")
+    parser.add_argument("--price", action="append", required=True, metavar="ID=ПУТЬ",
+                        help="Прайс-лист (xlsx, csv, json); можно указать несколько")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Число рабочих процессов (по умолчанию — число CPU)")
+    parser.add_argument("--queue-limit", type=int, default=SERVICE_QUEUE_LIMIT, help="Наибольшая длина очереди заданий")
+    parser.add_argument("--work-dir", default=SERVICE_JOB_DIR, help="Каталог файлов заданий")
+    parser.add_argument("--compresslevel", type=int, choices=range(10), default=None, metavar="0-9",
+                        help="Уровень сжатия xlsx при сохранении (по умолчанию — из config)")
+    args = parser.parse_args(argv)
+
+    price_tables = load_price_tables(args.price)
+    try:
+        asyncio.run(serve(price_tables, args.host, args.port, args.work_dir, args.workers, args.queue_limit,
+                          args.compresslevel, price_sources(args.price)))
+    except KeyboardInterrupt:
+        logger.info("🛑 Сервис остановлен")
+    return 0
+
+if __name__ == "__main__":
+    setup_logging()
+    raise SystemExit(main())
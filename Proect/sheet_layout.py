@@ -0,0 +1,165 @@
+# sheet_layout.py
+
+from collections import namedtuple
+from types import MappingProxyType
+from config import HEADER_NAMES, PRICE_HEADER_NAMES, LOGISTICS_COL
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Типы строк (в порядке приоритета при классификации)
+ROW_SECTION = "section"
+ROW_HEADER = "header"
+ROW_RESULT = "result"
+ROW_EMPTY = "empty"
+ROW_PLAIN = "plain"
+
+SectionLayout = namedtuple("SectionLayout", [
+    "row",             # строка с "Section:"
+    "label",           # текст первой ячейки с "Section:"
+    "end_row",         # последняя строка перед следующей секцией
+    "header_row",      # строка заголовков (ID / Part Name / Qty) или None
+    "id_col",          # столбец ID в строке заголовков
+    "columns",         # имя заголовка -> номер столбца
+    "last_data_row",   # последняя строка непрерывного блока деталей
+    "result_row",      # уже существующая строка итогов сразу после деталей или None
+    "max_column",      # ширина листа на момент сканирования
+])
+
+class SheetLayout(namedtuple("SheetLayout", ["title", "min_row", "max_row", "max_column", "price_col", "sections", "row_kinds"])):
+    """Неизменяемый индекс разметки листа, построенный за один проход."""
+
+    __slots__ = ()
+
+    def row_kind(self, row):
+        """Тип строки (ROW_*) по её номеру."""
+        index = row - self.min_row
+        if 0 <= index < len(self.row_kinds):
+            return self.row_kinds[index]
+        return ROW_EMPTY
+
+    def rows_of_kind(self, kind):
+        """Номера строк заданного типа."""
+        return [self.min_row + i for i, k in enumerate(self.row_kinds) if k == kind]
+
+# Итог цены секции содержит "section:", но новую секцию не начинает
+TOTAL_PRICE_LABEL = "total price section:"
+
+def _is_data_id(value):
+    return value is not None and not (isinstance(value, str) and not value.strip().isdigit())
+
+def classify_row(values):
+    """Классифицирует строку значений и возвращает (тип ROW_*, текст первой ячейки секции или None).
+
+    Строка "Total Price Section: …" получает ROW_SECTION (так её оформляют стили); где она
+    итоговая, вызывающий код проверяет подпись по TOTAL_PRICE_LABEL, как scan_layout.
+    """
+    section_label = None
+    is_header = is_result = False
+    is_empty = True
+    for value in values:
+        if value is None:
+            continue
+        is_empty = False
+        if isinstance(value, str):
+            lower = value.lower()
+            if section_label is None and "section:" in lower:
+                section_label = value
+            if "total" in lower or "logistics cost:" in lower:
+                is_result = True
+        if value in HEADER_NAMES:
+            is_header = True
+    if section_label is not None:
+        return ROW_SECTION, section_label
+    if is_header:
+        return ROW_HEADER, None
+    if is_result:
+        return ROW_RESULT, None
+    if is_empty:
+        return ROW_EMPTY, None
+    return ROW_PLAIN, None
+
+def _header_columns(values, first_col):
+    """Если строка — заголовок таблицы деталей, возвращает (id_col, {имя: столбец})."""
+    lowered = [str(value).strip().lower() if value else "" for value in values]
+    if "id" not in lowered or "part name" not in lowered or "qty" not in lowered:
+        return None
+    id_col = first_col + lowered.index("id")
+    columns = {}
+    for offset, value in enumerate(values):
+        if value in HEADER_NAMES:
+            columns[value] = first_col + offset
+    return id_col, columns
+
+def scan_layout(ws):
+    """Один проход по листу: секции, заголовки, диапазоны данных, типы строк."""
+    min_row, min_col, max_col = ws.min_row, ws.min_column, ws.max_column
+    row_kinds = []
+    price_col = None
+    sections = []
+    current = None
+    data_open = False
+    # Строки итогов с "Total Price Section:" — по стилю строки секции, по разметке итоговые
+    total_price_rows = set()
+
+    def close(section, end_row):
+        result_row = None
+        if section["last_data_row"] is not None:
+            candidate = section["last_data_row"] + 1
+            if candidate <= end_row and (row_kinds[candidate - min_row] == ROW_RESULT or candidate in total_price_rows):
+                result_row = candidate
+        sections.append(SectionLayout(end_row=end_row, result_row=result_row, max_column=max_col,
+                                      columns=MappingProxyType(section.pop("columns")), **section))
+
+    row_num = min_row - 1
+    for row_num, values in enumerate(ws.iter_rows(max_col=max_col, values_only=True), start=min_row):
+        kind, label = classify_row(values)
+        row_kinds.append(kind)
+
+        if row_num == 1:
+            for offset, value in enumerate(values):
+                if value and str(value).strip().lower() in PRICE_HEADER_NAMES:
+                    price_col = min_col + offset
+                    break
+
+        if kind == ROW_SECTION and label.lower().lstrip().startswith(TOTAL_PRICE_LABEL):
+            total_price_rows.add(row_num)
+            label = None
+        if label is not None:
+            if current is not None:
+                close(current, row_num - 1)
+            current = {"row": row_num, "label": label, "header_row": None, "id_col": None,
+                       "columns": {}, "last_data_row": None}
+            data_open = False
+            continue
+        if current is None:
+            continue
+        if current["header_row"] is None:
+            header = _header_columns(values, min_col)
+            if header:
+                current["header_row"] = row_num
+                current["id_col"], current["columns"] = header
+                current["last_data_row"] = row_num
+                data_open = True
+        elif data_open:
+            id_index = current["id_col"] - min_col
+            if id_index < len(values) and _is_data_id(values[id_index]):
+                current["last_data_row"] = row_num
+            else:
+                data_open = False
+
+    if current is not None:
+        close(current, row_num)
+
+    layout = SheetLayout(ws.title, min_row, row_num, max_col, price_col, tuple(sections), tuple(row_kinds))
+    logger.debug(f"🗺️ Разметка листа '{ws.title}': секций {len(sections)}, строк {len(row_kinds)}")
+    return layout
+
+
+def section_row_cells(ws, section):
+    """Ячейки строки секции без пересчёта ширины листа (ws[row] каждый раз вычисляет max_column).
+
+    Захватываются и служебные столбцы, которые могли быть записаны уже после сканирования.
+    """
+    max_col = max(section.max_column, LOGISTICS_COL)
+    return next(ws.iter_rows(min_row=section.row, max_row=section.row, max_col=max_col))
\ No newline at end of file
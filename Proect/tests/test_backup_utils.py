@@ -0,0 +1,126 @@
+# tests/test_backup_utils.py
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import backup_utils
+from backup_utils import create_backup, read_runs, restore_backup, apply_retention, start_backup
+
+class TestBackupStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a_Nest.xlsx")
+        self.write(b"first")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def objects(self):
+        found = []
+        for root, _, files in os.walk(os.path.join(self.tmp.name, "backups", "objects")):
+            found.extend(files)
+        return found
+
+    def test_identical_content_is_stored_once(self):
+        first = create_backup(self.path)
+        second = start_backup(self.path).result()
+        self.assertEqual(first, second)
+        self.assertEqual(len(read_runs(self.path)), 2)
+        self.assertEqual(len(self.objects()), 1)
+
+    def test_restore_run(self):
+        create_backup(self.path)
+        first_run = read_runs(self.path)[0]["run"]
+        self.write(b"second")
+        create_backup(self.path)
+        self.write(b"processed")
+
+        restore_backup(self.path, first_run)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"first")
+        restore_backup(self.path)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"second")
+        with self.assertRaises(LookupError):
+            restore_backup(self.path, "missing")
+
+    def test_gzip_objects(self):
+        with mock.patch.object(backup_utils, "BACKUP_COMPRESSION", "gzip"):
+            object_path = create_backup(self.path)
+        self.assertTrue(object_path.endswith(".xlsx.gz"))
+        self.write(b"processed")
+        restore_backup(self.path)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"first")
+
+    def test_retention_drops_old_runs_and_objects(self):
+        for i in range(4):
+            self.write(f"version {i}".encode())
+            create_backup(self.path)
+        for name in self.objects():
+            path = os.path.join(self.tmp.name, "backups", "objects", name[:2], name)
+            os.utime(path, (0, 0))
+
+        apply_retention(self.path, keep_last=2)
+
+        self.assertEqual(len(read_runs(self.path)), 2)
+        self.assertEqual(len(self.objects()), 2)
+        restore_backup(self.path)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"version 3")
+
+    def test_hardlink_object_survives_replaced_source(self):
+        object_path = create_backup(self.path, hardlink=True)
+        self.assertTrue(os.path.samefile(object_path, self.path))
+        # Исходник сохраняется заменой файла — объект хранилища остаётся прежним
+        replaced = self.path + ".tmp"
+        with open(replaced, "wb") as f:
+            f.write(b"processed")
+        os.replace(replaced, self.path)
+        restore_backup(self.path)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"first")
+
+    def test_shared_store_restores_moved_file(self):
+        store = os.path.join(self.tmp.name, "store")
+        create_backup(self.path, backup_dir=store)
+        moved = os.path.join(self.tmp.name, "done", "a_Nest.xlsx")
+        os.makedirs(os.path.dirname(moved))
+        with open(moved, "wb") as f:
+            f.write(b"processed")
+
+        restore_backup(moved, backup_dir=store)
+
+        with open(moved, "rb") as f:
+            self.assertEqual(f.read(), b"first")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "backups")))
+
+    def test_concurrent_backups_keep_journal(self):
+        # Потоки одновременно дописывают журнал и обрезают его по политике хранения
+        results = []
+
+        def backups():
+            for _ in range(15):
+                results.append(create_backup(self.path))
+
+        threads = [threading.Thread(target=backups) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(None), 0)
+        self.assertEqual(len(read_runs(self.path)), backup_utils.BACKUP_KEEP_LAST)
+        runs_dir = os.path.join(self.tmp.name, "backups", "runs")
+        self.assertEqual(os.listdir(runs_dir).count("a_Nest.xlsx.jsonl"), 1)
+        self.assertFalse([name for name in os.listdir(runs_dir) if name.endswith(".tmp")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_batch.py
+
+import json
+import os
+import tempfile
+import unittest
+from openpyxl import Workbook
+from unittest import mock
+import batch
+import quote_history
+from batch import collect_inputs, run_batch
+
+def make_nest_file(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Part Info"
+    ws.append(["Part Info"])
+    ws.append(["Section: R25 Толщина стенки: 5"])
+    ws.append(["ID", "Part Name", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)"])
+    ws.append([1, "A", 2, 1000, 1, 2000, None])
+    wb.save(path)
+
+def make_price_file(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Thickness", "Tube", "Contour", "Cut"])
+    ws.append([5, 300, 100, 20])
+    wb.save(path)
+
+def _crash(*args):
+    os._exit(1)   # рабочий процесс погибает, как при OOM kill
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.price = os.path.join(self.dir, "Price.xlsx")
+        make_price_file(self.price)
+        # История расчётов — во временном каталоге, а не в базе пользователя
+        self.history = os.path.join(self.dir, "history.sqlite")
+        patcher = mock.patch.object(quote_history, "QUOTE_HISTORY_DB", self.history)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_collect_inputs_directory_and_glob(self):
+        make_nest_file(os.path.join(self.dir, "a_Nest.xlsx"))
+        make_nest_file(os.path.join(self.dir, "b_Nest.xlsx"))
+        self.assertEqual(len(collect_inputs(self.dir)), 2)
+        self.assertEqual(len(collect_inputs(os.path.join(self.dir, "a_*.xlsx"))), 1)
+
+    def test_bad_file_does_not_stop_batch(self):
+        good = os.path.join(self.dir, "good_Nest.xlsx")
+        bad = os.path.join(self.dir, "bad_Nest.xlsx")
+        make_nest_file(good)
+        with open(bad, "w") as f:
+            f.write("not a workbook")
+        manifest = os.path.join(self.dir, "manifest.jsonl")
+
+        results = run_batch(collect_inputs(self.dir), self.price, workers=2, manifest_path=manifest)
+
+        statuses = {os.path.basename(entry["file"]): entry["status"] for entry in results}
+        self.assertEqual(statuses, {"good_Nest.xlsx": "ok", "bad_Nest.xlsx": "failed"})
+        with open(manifest, encoding="utf-8") as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 2)
+        connection = quote_history.connect(self.history)
+        try:
+            self.assertEqual([row[2] for row in quote_history.query_runs(connection)], ["good_Nest.xlsx"])
+        finally:
+            connection.close()
+
+    def test_dead_worker_still_in_manifest(self):
+        for name in ("a_Nest.xlsx", "b_Nest.xlsx", "c_Nest.xlsx"):
+            make_nest_file(os.path.join(self.dir, name))
+        manifest = os.path.join(self.dir, "manifest.jsonl")
+
+        with mock.patch.object(batch, "process_file", _crash):
+            results = run_batch(collect_inputs(self.dir), self.price, workers=2, manifest_path=manifest)
+
+        self.assertEqual(sorted(os.path.basename(entry["file"]) for entry in results),
+                         ["a_Nest.xlsx", "b_Nest.xlsx", "c_Nest.xlsx"])
+        self.assertTrue(all(entry["status"] == "failed" for entry in results))
+        with open(manifest, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_consolidate.py
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import openpyxl
+from config import PART_INFO_SHEET
+from consolidate import consolidate, THICKNESS_SHEET, SECTION_SHEET, FILES_SHEET
+from main import run_pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+def sheet_total(path):
+    """Сумма "Total Price Section: …" обработанного листа."""
+    ws = openpyxl.load_workbook(path, read_only=True)[PART_INFO_SHEET]
+    return sum(float(value.split(":")[1]) for row in ws.iter_rows(values_only=True) for value in row
+               if isinstance(value, str) and value.startswith("Total Price Section:"))
+
+class TestConsolidate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.inputs = []
+        for count in (5, 8, 12):
+            directory = os.path.join(self.tmp, str(count))
+            os.makedirs(directory)
+            path, price_path = write_nest_files(directory, count, 4, price_count=10)
+            run_pipeline(path, price_path)
+            self.inputs.append(path)
+        self.broken = os.path.join(self.tmp, "broken_Nest.xlsx")
+        with open(self.broken, "wb") as f:
+            f.write(b"not a zip")
+
+    def check_report(self, output):
+        wb = openpyxl.load_workbook(output)
+        rows = list(wb[THICKNESS_SHEET].iter_rows(min_row=2, values_only=True))
+        total = rows[-1]
+        self.assertEqual(total[0], "Итого")
+        self.assertEqual(total[1], 3)
+        self.assertEqual(total[2], 5 + 8 + 12)
+        self.assertAlmostEqual(total[7], sum(sheet_total(path) for path in self.inputs), places=2)
+        self.assertAlmostEqual(sum(row[7] for row in rows[:-1]), total[7], places=2)
+        sections = list(wb[SECTION_SHEET].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(sum(row[3] for row in sections), 25)
+        files = list(wb[FILES_SHEET].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(len(files), 4)
+        self.assertEqual(sum(1 for row in files if row[3]), 1)
+
+    def test_inline_and_pool_match(self):
+        outputs = []
+        for workers in (1, 2):
+            output = os.path.join(self.tmp, f"report_{workers}.xlsx")
+            stats = consolidate(self.inputs + [self.broken], output, workers=workers)
+            self.assertEqual(stats, {"files": 3, "failed": 1, "sections": 25})
+            self.check_report(output)
+            outputs.append(output)
+        first, second = (openpyxl.load_workbook(path) for path in outputs)
+        for name in (THICKNESS_SHEET, SECTION_SHEET):
+            self.assertEqual(list(first[name].values), list(second[name].values))
+
+    def test_period_filter(self):
+        old = self.inputs[0]
+        os.utime(old, (0, 0))
+        stats = consolidate(self.inputs, os.path.join(self.tmp, "report.xlsx"), workers=1, since="2000-01-01")
+        self.assertEqual(stats["files"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# tests/test_data_processing.py
+
+import unittest
+import openpyxl
+from data_processing import ValueConverter, try_convert
+
+class TestValueConverter(unittest.TestCase):
+
+    def test_matches_try_convert(self):
+        converter = ValueConverter()
+        values = [None, 0, 5, -3, 12.3, 2.0, True, "12", " 12,5 ", "-0.4", "1/2", "3 1/2",
+                  "1e3", "1_000", "abc", "Section: A1", "Tube Count: 3", "ERROR:#VALUE!",
+                  "١٢", "", "  ", "12,5", "12,5"]
+        for value in values:
+            expected = try_convert(value)
+            actual = converter.convert(value)
+            self.assertEqual(actual, expected, msg=repr(value))
+            self.assertIs(type(actual[0]), type(expected[0]), msg=repr(value))
+
+    def test_second_pass_writes_nothing(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for row in (["Part", "12,5", 3.2, "abc"], ["x", "1/2", 7, None], ["Section: A1", "4", "4", "y"]):
+            ws.append(row)
+
+        first = ValueConverter()
+        converted = first.convert_sheet(ws)
+        self.assertEqual(converted, 6)
+        self.assertEqual([cell.value for cell in ws[1]], ["Part", 13, 4, "abc"])
+        self.assertEqual(ws["B1"].number_format, "0")
+        self.assertGreater(first.rewritten, 0)
+
+        second = ValueConverter()
+        self.assertEqual(second.convert_sheet(ws), converted)
+        self.assertEqual(second.rewritten, 0)
+
+        # Пропущенные строки не трогаются
+        ws["B2"] = "2,5"
+        third = ValueConverter()
+        third.convert_sheet(ws, skip_rows={2})
+        self.assertEqual(ws["B2"].value, "2,5")
+        self.assertEqual(third.rewritten, 0)
+
+if __name__ == "__main__":
+    unittest.main()
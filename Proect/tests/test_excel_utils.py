@@ -0,0 +1,138 @@
+# tests/test_excel_utils.py
+
+import io
+import unittest
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from data_processing import convert_sheet_values
+from excel_utils import insert_blank_rows, ColumnWidthTracker
+from part_info_processor import process_part_info_sheet
+from price_index import PriceIndex
+from sheet_layout import scan_layout
+
+def make_sheet(rows=12, cols=4):
+    wb = Workbook()
+    ws = wb.active
+    for r in range(1, rows + 1):
+        ws.append([f"{r}:{c}" for c in range(1, cols + 1)])
+    return ws
+
+def full_pass_widths(ws):
+    """Ширина столбцов полным проходом по итоговым значениям листа: максимум + 2."""
+    return {get_column_letter(column[0].column): max((len(str(cell.value)) for cell in column if cell.value), default=0) + 2
+            for column in ws.columns}
+
+def sheet_values(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+class TestInsertBlankRows(unittest.TestCase):
+
+    def test_matches_sequential_insert_rows(self):
+        positions = [3, 7, 8, 13]
+        expected = make_sheet()
+        for position in sorted(positions, reverse=True):
+            expected.insert_rows(position)
+
+        actual = make_sheet()
+        new_rows = insert_blank_rows(actual, positions)
+
+        self.assertEqual(sheet_values(actual), sheet_values(expected))
+        self.assertEqual(new_rows, {3: 3, 7: 8, 8: 10, 13: 16})
+        self.assertEqual(actual.max_row, expected.max_row)
+        values = sheet_values(actual)
+        for row in (3, 8, 10):
+            self.assertTrue(all(value is None for value in values[row - 1]))
+
+    def test_moves_merged_cells_dimensions_and_hyperlinks(self):
+        ws = make_sheet()
+        ws.merge_cells("B9:C10")
+        ws.merge_cells("A4:A6")
+        ws.row_dimensions[9].height = 30
+        ws["D10"].hyperlink = "https://example.com"
+
+        insert_blank_rows(ws, [3, 5, 7])
+
+        self.assertEqual(sorted(str(merged) for merged in ws.merged_cells.ranges), ["A5:A8", "B12:C13"])
+        self.assertEqual(ws["B12"].value, "9:2")
+        self.assertEqual(ws.row_dimensions[12].height, 30)
+        self.assertIsNone(ws.row_dimensions[9].height)
+        self.assertEqual(ws["D13"].hyperlink.ref, "D13")
+
+        # Книга сохраняется и читается обратно с теми же объединениями
+        stream = io.BytesIO()
+        ws.parent.save(stream)
+        reloaded = load_workbook(stream).active
+        self.assertEqual(sorted(str(merged) for merged in reloaded.merged_cells.ranges), ["A5:A8", "B12:C13"])
+        self.assertEqual(reloaded["D13"].hyperlink.target, "https://example.com")
+
+    def test_no_rows(self):
+        ws = make_sheet(3, 2)
+        self.assertEqual(insert_blank_rows(ws, []), {})
+        self.assertEqual(ws.max_row, 3)
+
+
+class TestColumnWidthTracker(unittest.TestCase):
+
+    def test_matches_full_pass(self):
+        ws = make_sheet(5, 3)
+        ws["B4"] = "a much longer value"
+        widths = ColumnWidthTracker()
+        for row in ws.iter_rows():
+            widths.observe_cells(row)
+        widths.apply(ws)
+
+        for letter, width in full_pass_widths(ws).items():
+            self.assertEqual(ws.column_dimensions[letter].width, width)
+
+    def test_forgotten_maximum_is_remeasured(self):
+        ws = make_sheet(4, 2)
+        ws["A2"] = ws["A3"] = "longest"
+        widths = ColumnWidthTracker()
+        for row in ws.iter_rows():
+            widths.observe_cells(row)
+
+        widths.forget(1, ws["A2"].value)
+        ws["A2"] = "x"
+        widths.apply(ws)
+        self.assertEqual(ws.column_dimensions["A"].width, len("longest") + 2)
+
+        widths.forget(1, ws["A3"].value)
+        ws["A3"] = None
+        widths.apply(ws)
+        self.assertEqual(ws.column_dimensions["A"].width, len("4:1") + 2)
+
+    def test_incremental_rewrite_matches_full_pass(self):
+        # Итоговая строка прошлого запуска с длинной ценой перезаписывается на месте
+        ws = Workbook().active
+        ws.title = "Part Info"
+        ws.append(["Part Info"])
+        ws.append(["Section: R25 Толщина стенки: 5"])
+        ws.append(["ID", "Part Name", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)"])
+        ws.append([1, "A", 2, 1000, 1, 2000, 123456789012.5])
+        ws.append([None, None, "Total Qty: 2", "Total Length: 2000", None, None,
+                   "Total Price Section: 123456789012345.00"])
+        widths = ColumnWidthTracker()
+        convert_sheet_values(ws, widths)
+        process_part_info_sheet(ws, PriceIndex([(5, 300, 100, 20)]), scan_layout(ws), widths, incremental=True)
+        widths.apply(ws)
+
+        self.assertTrue(ws["G5"].value.startswith("Total Price Section:"))
+        for letter, width in full_pass_widths(ws).items():
+            self.assertEqual(ws.column_dimensions[letter].width, width, letter)
+
+    def test_sampling_and_explicit_writes(self):
+        ws = make_sheet(10, 1)
+        ws["A6"] = "skipped by sampling"
+        ws["A7"] = "sampled row"
+        widths = ColumnWidthTracker(sample_head=3, sample_step=2)
+        for row in ws.iter_rows():
+            widths.observe_cells(row)
+        self.assertEqual(widths.max_lengths[1], len("sampled row"))
+
+        widths.reset_column(1)
+        widths.observe(1, 12345.67)
+        widths.apply(ws)
+        self.assertEqual(ws.column_dimensions["A"].width, len("12345.67") + 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# tests/test_fingerprints.py
+
+import os
+import sys
+import tempfile
+import unittest
+import openpyxl
+from config import PART_INFO_SHEET, FINGERPRINT_SHEET
+from fingerprints import load_fingerprints
+from main import run_pipeline
+from run_report import RunReport
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+class TestIncrementalRecompute(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path, self.price_path = write_nest_files(self.tmp.name, 4, 3, price_count=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_once(self):
+        report = RunReport(self.path)
+        run_pipeline(self.path, self.price_path, report)
+        return report.counters
+
+    def part_info_values(self):
+        wb = openpyxl.load_workbook(self.path)
+        return [row for row in wb[PART_INFO_SHEET].iter_rows(values_only=True)]
+
+    def totals_rows(self, values):
+        return [i for i, row in enumerate(values) if str(row[0]).lower().startswith("total price section:")]
+
+    def test_unchanged_rerun_recomputes_nothing(self):
+        self.assertEqual(self.run_once()["sections_recomputed"], 4)
+        first = self.part_info_values()
+        self.assertEqual(self.run_once()["sections_recomputed"], 0)
+        self.assertEqual(self.part_info_values(), first)
+
+    def test_edited_section_is_recomputed_in_place(self):
+        self.run_once()
+        before = self.part_info_values()
+        wb = openpyxl.load_workbook(self.path)
+        ws = wb[PART_INFO_SHEET]
+        # Первая деталь второй секции: заголовок листа, секция 1 (подпись, шапка, 3 детали, пустая, итог)
+        part_row = next(row for row in range(1, ws.max_row + 1)
+                        if str(ws.cell(row=row, column=1).value).startswith("Section: R0001")) + 2
+        ws.cell(row=part_row, column=3).value = 40
+        wb.save(self.path)
+
+        self.assertEqual(self.run_once()["sections_recomputed"], 1)
+        after = self.part_info_values()
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(self.totals_rows(after), self.totals_rows(before))
+        changed = [i for i, (old, new) in enumerate(zip(before, after)) if old != new]
+        self.assertTrue(changed)
+        first_section, second_section = [i for i, row in enumerate(after) if str(row[0]).startswith("Section: R000")][1:3]
+        self.assertTrue(all(first_section <= i < second_section for i in changed))
+
+    def test_price_change_marks_sections_dirty(self):
+        self.run_once()
+        wb = openpyxl.load_workbook(self.price_path)
+        ws = wb.active
+        for row in range(2, ws.max_row + 1):
+            ws.cell(row=row, column=4).value = ws.cell(row=row, column=4).value * 2
+        wb.save(self.price_path)
+        self.assertEqual(self.run_once()["sections_recomputed"], 4)
+
+    def test_other_version_triggers_full_recompute(self):
+        self.run_once()
+        wb = openpyxl.load_workbook(self.path)
+        self.assertIsNotNone(load_fingerprints(wb))
+        wb[FINGERPRINT_SHEET].cell(row=1, column=2).value = -1
+        self.assertIsNone(load_fingerprints(wb))
+        wb.save(self.path)
+        self.assertEqual(self.run_once()["sections_recomputed"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
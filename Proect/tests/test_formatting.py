@@ -0,0 +1,35 @@
+# tests/test_formatting.py
+
+import unittest
+from openpyxl import Workbook
+from config import DARK_RED, LIGHT_YELLOW
+from sheet_layout import scan_layout
+from formatting import apply_styles_to_sheet
+
+class TestApplyStyles(unittest.TestCase):
+
+    def setUp(self):
+        self.wb = Workbook()
+        self.ws = self.wb.active
+        for row in [["Section: A"], ["ID", "Part Name", "Qty"], [1, "a", 2], [None, None, "Total Qty: 2"], [None, None]]:
+            self.ws.append(row)
+        apply_styles_to_sheet(self.ws, scan_layout(self.ws))
+
+    def test_row_styles(self):
+        ws = self.ws
+        self.assertTrue(ws["B1"].font.b)
+        self.assertEqual(ws["B1"].alignment.horizontal, "center")
+        self.assertTrue(ws["C2"].font.b)
+        self.assertFalse(ws["A3"].font.b)
+        self.assertEqual(ws["A4"].font.color.rgb, "00" + DARK_RED)
+        self.assertEqual(ws["A4"].fill.fgColor.rgb, "00" + LIGHT_YELLOW)
+        self.assertEqual([ws.row_dimensions[r].height for r in range(1, 6)], [35, 25, 15, 35, 35])
+
+    def test_styles_are_shared(self):
+        # стандартный шрифт + жирный + обычный (bold=False) + тёмно-красный
+        self.assertEqual(len(self.wb._fonts), 4)
+        self.assertEqual(self.ws["A1"]._style.fontId, self.ws["C2"]._style.fontId)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# tests/test_log_setup.py
+
+import logging
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler
+import log_setup
+
+def _log_job(index):
+    logging.getLogger("worker_job").info(f"задание {index} в процессе {os.getpid()}")
+    return os.getpid()
+
+class TestWorkerLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.root_level = logging.getLogger().level
+
+    def tearDown(self):
+        log_setup.stop_logging()
+        log_setup._config = None
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, QueueHandler):
+                root.removeHandler(handler)
+        root.setLevel(self.root_level)
+
+    def test_one_worker_logs_every_job_to_parent_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "parent.log")
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                log_setup.setup_logging(log_file=log_file)
+                with ProcessPoolExecutor(max_workers=1, initializer=log_setup.setup_worker_logging) as pool:
+                    pids = set(pool.map(_log_job, range(3)))
+                log_setup.stop_logging()
+            finally:
+                os.chdir(cwd)
+            with open(log_file, encoding="utf-8") as f:
+                text = f.read()
+            stray = os.path.exists(os.path.join(tmp, log_setup.LOG_FILE))
+
+        self.assertEqual(len(pids), 1)
+        for index in range(3):
+            self.assertIn(f"задание {index} в процессе", text)
+        self.assertFalse(stray)
+
+    def test_worker_without_configured_parent_does_nothing(self):
+        self.assertIsNone(log_setup.setup_worker_logging())
+
+if __name__ == "__main__":
+    unittest.main()
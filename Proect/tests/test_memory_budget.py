@@ -0,0 +1,73 @@
+# tests/test_memory_budget.py
+
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import unittest
+import zipfile
+from unittest import mock
+import openpyxl
+from openpyxl.comments import Comment
+from config import PART_INFO_SHEET
+from main import run_pipeline
+from run_report import RunReport
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+def sheet_parts(path):
+    """Содержимое частей xlsx, кроме времени изменения в свойствах документа."""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if name != "docProps/core.xml"}
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        path, self.price_path = write_nest_files(self.tmp, 30, 5, price_count=10)
+        wb = openpyxl.load_workbook(path)
+        ws = wb[PART_INFO_SHEET]
+        ws["B5"].comment = Comment("проверить", "ОТК")
+        ws["C40"].hyperlink = "http://example.com/part"
+        wb.save(path)
+        self.full = os.path.join(self.tmp, "full_Nest.xlsx")
+        self.chunked = os.path.join(self.tmp, "chunked_Nest.xlsx")
+        shutil.copy(path, self.full)
+        shutil.copy(path, self.chunked)
+
+    def test_chunked_output_matches_in_memory(self):
+        # Второй запуск — инкрементальный, по отпечаткам секций из первого
+        for _ in range(2):
+            run_pipeline(self.full, self.price_path)
+            report = RunReport(self.chunked)
+            run_pipeline(self.chunked, self.price_path, report, memory_budget_mb=0.05)
+            self.assertGreater(report.counters["chunks"], 5)
+            self.assertEqual(sheet_parts(self.chunked), sheet_parts(self.full))
+
+    def test_unsupported_openpyxl_loads_whole_workbook(self):
+        run_pipeline(self.full, self.price_path)
+        report = RunReport(self.chunked)
+        with mock.patch.object(openpyxl, "__version__", "3.2.0"):
+            run_pipeline(self.chunked, self.price_path, report, memory_budget_mb=0.05)
+        self.assertNotIn("chunks", report.counters)
+        self.assertEqual(list(openpyxl.load_workbook(self.chunked)[PART_INFO_SHEET].iter_rows(values_only=True)),
+                         list(openpyxl.load_workbook(self.full)[PART_INFO_SHEET].iter_rows(values_only=True)))
+
+    def test_stage_peaks_reported(self):
+        report = RunReport(self.chunked)
+        tracemalloc.start()
+        try:
+            run_pipeline(self.chunked, self.price_path, report, memory_budget_mb=1)
+        finally:
+            tracemalloc.stop()
+        for stage in ("read_chunk", "convert", "part_info", "styling", "spill", "save"):
+            self.assertIsNotNone(report.stages[stage].get("py_peak_mb"), stage)
+        wb = openpyxl.load_workbook(self.chunked)
+        self.assertEqual(wb.sheetnames[0], PART_INFO_SHEET)
+        self.assertEqual(wb[PART_INFO_SHEET]["B5"].comment.text, "проверить")
+
+if __name__ == "__main__":
+    unittest.main()
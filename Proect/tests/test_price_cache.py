@@ -0,0 +1,106 @@
+# tests/test_price_cache.py
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+import openpyxl
+from openpyxl.styles import Font
+import price_cache
+from price_cache import load_price_table
+from price_data_handler import attach_price_file
+from price_index import PriceIndex
+
+class TestPriceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write_xlsx(self, cut_price):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["Толщина", "Цена за трубу", "Контур", "Резка"])
+        ws["A1"].font = Font(bold=True)
+        ws.append([2, 100, "2,5", cut_price])
+        ws.append([3, 140, "3,25", cut_price + 1])
+        wb.save(self.path("Price.xlsx"))
+        return self.path("Price.xlsx")
+
+    def test_repeat_load_skips_parsing(self):
+        price_file = self.write_xlsx(15)
+        first = load_price_table(price_file)
+        with mock.patch.object(price_cache, "parse_price_file", side_effect=AssertionError("parsed again")):
+            second = load_price_table(price_file)
+        self.assertEqual(first.rows, second.rows)
+        self.assertEqual(second.rows[1], (2, 100, 2.5, 15))
+
+    def test_cache_is_plain_json_and_restores_full_table(self):
+        price_file = self.write_xlsx(15)
+        wb = openpyxl.load_workbook(price_file)
+        wb.active["E1"] = datetime(2026, 1, 15, 8, 30)
+        wb.active.column_dimensions["B"].width = 21
+        wb.save(price_file)
+        parsed = load_price_table(price_file)
+        with open(price_cache._cache_path(price_file), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["version"], price_cache.PRICE_CACHE_VERSION)
+
+        cached = load_price_table(price_file)
+
+        self.assertEqual(cached, parsed)
+        self.assertEqual(cached.rows[0][4], datetime(2026, 1, 15, 8, 30))
+        self.assertTrue(cached.styles[cached.cell_styles[(0, 0)]][0].b)
+
+    def test_foreign_cache_file_is_rebuilt(self):
+        price_file = self.write_xlsx(15)
+        cache_path = price_cache._cache_path(price_file)
+        os.makedirs(os.path.dirname(cache_path))
+        with open(cache_path, "wb") as f:
+            f.write(b"\x80\x04garbage")
+        self.assertEqual(load_price_table(price_file).rows[1][3], 15)
+        with open(cache_path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["version"], price_cache.PRICE_CACHE_VERSION)
+
+    def test_changed_file_is_parsed_again(self):
+        price_file = self.write_xlsx(15)
+        load_price_table(price_file)
+        os.utime(price_file, ns=(0, 0))
+        self.write_xlsx(20)
+        self.assertEqual(load_price_table(price_file).rows[1][3], 20)
+
+    def test_attached_sheet_keeps_styles_and_formats(self):
+        price_file = self.write_xlsx(15)
+        for _ in range(2):
+            wb = openpyxl.Workbook()
+            ws = attach_price_file(wb, price_file)
+            self.assertTrue(ws["A1"].font.b)
+            self.assertEqual(ws["C2"].value, 2.5)
+            self.assertEqual(ws["C2"].number_format, "0.00")
+
+    def test_csv_price_list(self):
+        price_file = self.path("price.csv")
+        with open(price_file, "w", encoding="utf-8") as f:
+            f.write("Толщина;Цена за трубу;Контур;Резка\n2;100;2,5;15\n3,5;;3;\n")
+        ws = attach_price_file(openpyxl.Workbook(), price_file)
+        index = PriceIndex.from_sheet(ws)
+        self.assertEqual(index.nearest(3.4), {'C': 3.0, 'D': 0})
+        self.assertEqual(index.tube_price(2), 100)
+
+    def test_json_price_list_of_objects(self):
+        price_file = self.path("price.json")
+        with open(price_file, "w", encoding="utf-8") as f:
+            json.dump([{"thickness": "2", "tube": 100, "contour": 2.5, "cut": 15},
+                       {"thickness": 4, "tube": 180, "contour": 4, "cut": 22}], f)
+        table = load_price_table(price_file)
+        self.assertEqual(table.rows[0], ("thickness", "tube", "contour", "cut"))
+        self.assertEqual(table.rows[1], (2.0, 100, 2.5, 15))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_price_export.py
+
+import csv
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+import openpyxl
+from config import PART_INFO_SHEET, EXPORT_DIR, EXPORT_SQLITE_NAME
+from main import run_pipeline
+from price_export import pandas, PART_PRICED
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+def sheet_totals(path):
+    """Итоги "Total Price Section: …" из обработанного листа по порядку секций."""
+    ws = openpyxl.load_workbook(path, read_only=True)[PART_INFO_SHEET]
+    totals = []
+    for row in ws.iter_rows(values_only=True):
+        for value in row:
+            if isinstance(value, str) and value.startswith("Total Price Section:"):
+                totals.append(round(float(value.split(":")[1]), 2))
+    return totals
+
+class TestPriceExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path, self.price_path = write_nest_files(self.tmp, 12, 4, price_count=10)
+        self.export_dir = os.path.join(self.tmp, EXPORT_DIR)
+
+    def read_csv(self, suffix):
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        with open(os.path.join(self.export_dir, f"{stem}_{suffix}.csv"), encoding="utf-8-sig") as f:
+            return list(csv.DictReader(f))
+
+    def test_csv_and_sqlite_match_sheet(self):
+        # Второй запуск инкрементальный: в выгрузку попадают и неизменённые секции
+        for _ in range(2):
+            run_pipeline(self.path, self.price_path, export=("csv", "sqlite"))
+            sections = self.read_csv("sections")
+            parts = self.read_csv("parts")
+            self.assertEqual(len(sections), 12)
+            self.assertEqual(len(parts), 12 * 4)
+            priced = [round(float(s["total_price"]), 2) for s in sections if s["total_price"]]
+            self.assertEqual(priced, sheet_totals(self.path))
+            for section in sections:
+                part_sum = sum(float(p["price"]) * float(p["qty"]) for p in parts
+                               if p["section_row"] == section["row"] and p["status"] == PART_PRICED)
+                if section["total_price"]:
+                    self.assertAlmostEqual(part_sum, float(section["total_price"]), delta=0.01 * len(parts))
+
+            connection = sqlite3.connect(os.path.join(self.export_dir, EXPORT_SQLITE_NAME))
+            try:
+                # Повторная выгрузка файла заменяет его строки, а не дублирует
+                self.assertEqual(connection.execute("SELECT COUNT(*) FROM priced_sections").fetchone()[0], 12)
+                self.assertEqual(connection.execute("SELECT COUNT(*) FROM priced_parts").fetchone()[0], 48)
+            finally:
+                connection.close()
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            run_pipeline(self.path, self.price_path, export=("xls",))
+
+    @unittest.skipUnless(pandas, "pandas не установлен")
+    def test_price_frames(self):
+        from price_export import price_frames
+        parts, sections = price_frames(self.path, self.price_path)
+        self.assertEqual(len(sections), 12)
+        self.assertEqual(len(parts), 48)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# tests/test_price_index.py
+
+import random
+import unittest
+from price_index import PriceIndex
+
+def scan_closest(rows, thickness):
+    """Эталон: линейный поиск по строкам листа, строки с нечитаемыми ценами пропускаются."""
+    closest_data = None
+    min_diff = float('inf')
+    for row in rows:
+        try:
+            diff = abs(float(row[0]) - thickness)
+            data = {'C': float(row[2]) if row[2] else 0, 'D': float(row[3]) if row[3] else 0}
+        except (ValueError, TypeError):
+            continue
+        if diff < min_diff:
+            min_diff = diff
+            closest_data = data
+    return closest_data
+
+def scan_tube_price(rows, thickness):
+    for row in rows:
+        if row[0] is not None and row[1] is not None:
+            try:
+                if abs(float(row[0]) - thickness) < 0.01:
+                    return float(row[1])
+            except ValueError:
+                pass
+    return None
+
+class TestPriceIndex(unittest.TestCase):
+
+    def test_nearest_prefers_upper_row_on_tie(self):
+        index = PriceIndex([(3, 0, 30, 3), (2, 0, 20, 2), (2, 0, 99, 9)])
+        self.assertEqual(index.nearest(2.5), {'C': 30.0, 'D': 3.0})
+        self.assertEqual(index.nearest(1.0), {'C': 20.0, 'D': 2.0})
+
+    def test_skips_unparsable_rows(self):
+        index = PriceIndex([("Толщина", "Труба", "Контур", "Резка"), (5, "abc", "x", 1), (6, 600, None, "")])
+        self.assertEqual(index.nearest(5), {'C': 0, 'D': 0})
+        self.assertIsNone(index.tube_price(5))
+        self.assertEqual(index.tube_price(6), 600.0)
+
+    def test_empty_index(self):
+        index = PriceIndex([])
+        self.assertIsNone(index.nearest(5))
+        self.assertIsNone(index.tube_price(5))
+
+    def test_matches_linear_scan(self):
+        rnd = random.Random(7)
+        values = [None, "", "abc", "1,5", 0, 1, 2.5, 3, 3.005, 4, 10]
+        rows = [tuple(rnd.choice(values) for _ in range(4)) for _ in range(200)]
+        index = PriceIndex(rows)
+        for thickness in [0, 0.5, 1, 2.5, 2.75, 3, 3.004, 3.5, 5, 7, 12]:
+            self.assertEqual(index.nearest(thickness), scan_closest(rows, thickness))
+            self.assertEqual(index.tube_price(thickness), scan_tube_price(rows, thickness))
+
+
+if __name__ == '__main__':
+    unittest.main()
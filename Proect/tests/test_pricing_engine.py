@@ -0,0 +1,87 @@
+# tests/test_pricing_engine.py
+
+import random
+import unittest
+from pricing_engine import SectionValues, price_section, section_totals
+
+def reference_prices(values, rates, logistics_cost):
+    """Прежний построчный расчёт из calculate_prices_for_section."""
+    total_length = 0
+    for length, qty in zip(values.length, values.qty):
+        try:
+            total_length += (float(length) if length else 0) * (float(qty) if qty else 0)
+        except (ValueError, TypeError):
+            continue
+    prices = {}
+    total_price_section = 0
+    for i, row_id in enumerate(values.ids):
+        if not row_id:
+            continue
+        try:
+            qty = float(values.qty[i]) if values.qty[i] else 0
+            part_length = float(values.length[i]) if values.length[i] else 0
+            contour_qty = float(values.contour[i]) if values.contour[i] else 0
+            cut_length = float(values.cut[i]) if values.cut[i] else 0
+            logistics_part = part_length / total_length * logistics_cost if total_length > 0 else 0
+            price = contour_qty * rates['C'] + cut_length / 1000 * rates['D'] + logistics_part
+            prices[i] = round(price, 2)
+            total_price_section += price * qty
+        except (ValueError, TypeError):
+            prices[i] = "ERROR"
+    return prices, round(total_price_section, 2)
+
+def reference_totals(values, n):
+    """Прежний расчёт Total Qty/Length/Contour/Cut из process_part_info_sheet."""
+    totals = [0, 0, 0, 0]
+    for i in range(n):
+        try:
+            qty = float(values.qty[i]) or 0
+            part_length = float(values.length[i]) or 0
+            contour_qty = float(values.contour[i]) or 0
+            cut_length = float(values.cut[i]) or 0
+        except (ValueError, TypeError):
+            continue
+        totals[0] += qty
+        totals[1] += qty * part_length
+        totals[2] += qty * contour_qty
+        totals[3] += qty * cut_length
+    return totals
+
+def random_section(rnd, rows):
+    pick = lambda choices: [rnd.choice(choices) for _ in range(rows)]
+    return SectionValues(
+        first_row=3,
+        ids=pick([1, 2, "3", None, "", 0]),
+        qty=pick([1, 2, 3, 0, None, "4", 1.5, "x"]),
+        length=pick([1000, 1234.567, 0.1, None, "abc", 0, "0"]),
+        contour=pick([0, 1, 2, None, 3.3]),
+        cut=pick([2000, 1500.5, None, 0.7, "1,5"]),
+    )
+
+class TestPricingEngine(unittest.TestCase):
+
+    def test_prices_match_row_by_row_formulas(self):
+        rnd = random.Random(42)
+        rates = {'C': 10.5, 'D': 22.0}
+        for _ in range(200):
+            values = random_section(rnd, rnd.randint(0, 30))
+            logistics_cost = rnd.choice([0, 250.5, 1200.0])
+            prices, priced, errors, total = price_section(values, rates, logistics_cost)
+            expected_prices, expected_total = reference_prices(values, rates, logistics_cost)
+            actual = {i: (round(float(prices[i]), 2) if priced[i] else "ERROR")
+                      for i in range(len(prices)) if priced[i] or errors[i]}
+            self.assertEqual(actual, expected_prices)
+            self.assertEqual(round(total, 2), expected_total)
+
+    def test_totals_match_including_int_zero(self):
+        rnd = random.Random(3)
+        for _ in range(200):
+            values = random_section(rnd, rnd.randint(0, 30))
+            n = len(values.ids)
+            expected = reference_totals(values, n)
+            actual = section_totals(values, n, True, True)
+            self.assertEqual([f"{value}" for value in actual], [f"{value}" for value in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_quote_history.py
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from main import run_pipeline
+import quote_history
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+class TestQuoteHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.path, self.price_path = write_nest_files(self.tmp, 12, 4, price_count=10)
+        self.db = os.path.join(self.tmp, "history.sqlite")
+
+    def test_runs_are_appended(self):
+        for _ in range(2):
+            run_pipeline(self.path, self.price_path, history=self.db)
+        connection = quote_history.connect(self.db)
+        try:
+            runs = quote_history.query_runs(connection).fetchall()
+            self.assertEqual(len(runs), 2)
+            # Тот же прайс — та же версия
+            self.assertEqual(runs[0][4], runs[1][4])
+            self.assertIsNotNone(runs[0][4])
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM quote_sections").fetchone()[0], 24)
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM quote_parts").fetchone()[0], 96)
+            thickness = connection.execute("SELECT thickness FROM quote_sections LIMIT 1").fetchone()[0]
+            sections = quote_history.query_sections(connection, thickness=thickness).fetchall()
+            self.assertTrue(sections)
+            self.assertTrue(all(abs(row[3] - thickness) <= quote_history.THICKNESS_TOLERANCE for row in sections))
+            plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM quote_sections WHERE thickness BETWEEN ? AND ? "
+                                      "AND processed_at >= ?", (4.95, 5.05, "2026-01-01")).fetchall()
+            self.assertIn("quote_sections_thickness", " ".join(str(row) for row in plan))
+        finally:
+            connection.close()
+
+    def test_unwritable_history_does_not_fail_run(self):
+        # Каталог базы не создать: на его месте файл
+        blocker = os.path.join(self.tmp, "not_a_dir")
+        with open(blocker, "w") as f:
+            f.write("x")
+        with self.assertLogs("quote_history", "WARNING"):
+            run_pipeline(self.path, self.price_path, history=os.path.join(blocker, "history.sqlite"))
+        self.assertFalse(os.path.exists(os.path.join(blocker, "history.sqlite")))
+
+    def test_cli_rates(self):
+        run_pipeline(self.path, self.price_path, history=self.db)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = quote_history.main(["rates", "--db", self.db, "--json"])
+        self.assertEqual(code, 0)
+        rates = json.loads(out.getvalue())
+        self.assertTrue(rates)
+        self.assertEqual(sum(rate["sections"] for rate in rates), 12)
+        self.assertEqual(quote_history.main(["runs", "--db", os.path.join(self.tmp, "missing.sqlite")]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
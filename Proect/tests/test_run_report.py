@@ -0,0 +1,62 @@
+# tests/test_run_report.py
+
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from run_report import RunReport
+
+class TestRunReport(unittest.TestCase):
+
+    def test_stages_accumulate_and_report_is_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report = RunReport(os.path.join(tmp, "a_Nest.xlsx"))
+            for _ in range(3):
+                with report.stage("convert"):
+                    sum(range(1000))
+            report.count("cells", 10)
+            report.count("cells", 5)
+            with self.assertRaises(ValueError):
+                with report.stage("save"):
+                    raise ValueError("boom")
+
+            path = report.write()
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+
+        self.assertEqual(os.path.basename(os.path.dirname(path)), "reports")
+        self.assertEqual(data["stages"]["convert"]["calls"], 3)
+        self.assertEqual(data["stages"]["save"]["calls"], 1)
+        self.assertGreaterEqual(data["stages"]["convert"]["wall"], 0)
+        self.assertEqual(data["counters"], {"cells": 15})
+        self.assertEqual(data["status"], "ok")
+
+    def test_profile_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report = RunReport(os.path.join(tmp, "a_Nest.xlsx"))
+            with report.profiled():
+                sorted(range(1000), reverse=True)
+            self.assertTrue(os.path.isfile(report.profile_path))
+
+    def test_tracemalloc_peaks_per_stage(self):
+        report = RunReport("a_Nest.xlsx")
+        tracemalloc.start()
+        try:
+            with report.stage("outer"):
+                with report.stage("inner"):
+                    block = bytearray(8 * 1024 * 1024)
+                    del block
+                with report.stage("small"):
+                    sum(range(1000))
+            data = report.to_dict()
+        finally:
+            tracemalloc.stop()
+        # Пик вложенного этапа входит в пик объемлющего, но не в пик следующего этапа
+        self.assertGreaterEqual(data["stages"]["inner"]["py_peak_mb"], 8)
+        self.assertGreaterEqual(data["stages"]["outer"]["py_peak_mb"], 8)
+        self.assertLess(data["stages"]["small"]["py_peak_mb"], 8)
+        self.assertGreaterEqual(data["py_peak_mb"], 8)
+
+if __name__ == '__main__':
+    unittest.main()
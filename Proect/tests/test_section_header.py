@@ -0,0 +1,46 @@
+# tests/test_section_header.py
+
+import unittest
+from openpyxl import Workbook
+from section_header import parse_section_row, get_section_name, extract_thickness_value
+
+def section_cells(*values):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(values))
+    return next(ws.iter_rows(min_row=1, max_row=1))
+
+class TestSectionHeader(unittest.TestCase):
+
+    def test_parses_all_fields(self):
+        header = parse_section_row(section_cells(
+            "Section: R12 Толщина стенки: 4,5", 7, None, None, "Средняя толщина ноги: 6",
+            "Tube Count: 3", "Logistics Cost: 120.50"))
+        self.assertEqual(header.name, "r12")
+        # первая ячейка: приоритетное ключевое слово и его общий префикс "толщина"
+        self.assertEqual(header.thickness, 4.5)
+        self.assertEqual(header.thicknesses, (4.5, 4.5, 6.0, 6.0))
+        self.assertEqual(header.max_thickness, 6.0)
+        self.assertEqual(header.tube_count, 3)
+        self.assertEqual(header.logistics_cost, 120.5)
+
+    def test_empty_row(self):
+        header = parse_section_row(section_cells("Section: A"))
+        self.assertEqual(header.name, "a")
+        self.assertIsNone(header.thickness)
+        self.assertIsNone(header.max_thickness)
+        self.assertIsNone(header.tube_count)
+        self.assertEqual(header.logistics_cost, 0)
+
+    def test_memoised_by_row_text(self):
+        first = parse_section_row(section_cells("Section: B толщина 2"))
+        second = parse_section_row(section_cells("Section: B толщина 2"))
+        self.assertIs(first, second)
+
+    def test_helpers(self):
+        self.assertEqual(get_section_name("Section: Труба 40x20 Толщина: 2"), "труба 40x20")
+        self.assertIsNone(get_section_name(5))
+        self.assertIsNone(extract_thickness_value("толщина: .", "толщина"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# tests/test_section_model.py
+
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from types import MappingProxyType
+from unittest import mock
+import openpyxl
+import section_model
+from config import PART_INFO_SHEET
+from main import process_workbook
+from price_index import PriceIndex
+from pricing_engine import SectionValues
+from section_header import SectionHeader
+from section_model import Section, price_section_model, price_sections, PRICED, NO_RATES, NO_HEADERS
+from sheet_layout import SectionLayout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+COLUMNS = {"ID": 1, "Part Name": 2, "Qty": 3, "Part Length(mm)": 4, "Contour Qty": 5, "Cut Length(mm)": 6, "Price(₽)": 7}
+
+def make_section(thickness=2.0, columns=COLUMNS, tube_count=3):
+    layout = SectionLayout(row=1, label="Section: R1", end_row=5, header_row=2, id_col=1,
+                           columns=MappingProxyType(columns), last_data_row=5, result_row=None, max_column=7)
+    header = SectionHeader("r1", thickness, (thickness,), tube_count, 100.0)
+    values = SectionValues(3, [1, 2, "3"], [2, "4", "x"], [1000, 500.0, 10], [2, 0, 1], [300, 100, None])
+    return Section(layout, header, values)
+
+class TestSectionModel(unittest.TestCase):
+
+    def setUp(self):
+        self.price_index = PriceIndex([(2.0, 50.0, 10.0, 20.0), (3.0, 60.0, 11.0, 21.0)])
+
+    def test_price_without_sheet(self):
+        result = price_section_model(make_section(), self.price_index)
+        self.assertEqual(result.status, PRICED)
+        self.assertEqual(list(result.priced), [True, True, False])
+        self.assertEqual(list(result.errors), [False, False, True])
+        self.assertEqual(result.skipped_rows, 1)
+        self.assertEqual(result.totals.qty, 6.0)
+        self.assertEqual(result.logistics_cost, 150.0)
+
+    def test_missing_headers_still_totals(self):
+        columns = {key: value for key, value in COLUMNS.items() if key != "Cut Length(mm)"}
+        result = price_section_model(make_section(columns=columns), self.price_index)
+        self.assertEqual(result.status, NO_HEADERS)
+        self.assertIsNotNone(result.totals)
+        self.assertEqual(price_section_model(make_section(), PriceIndex([])).status, NO_RATES)
+
+    def test_model_is_compact_and_picklable(self):
+        section = make_section()
+        self.assertFalse(hasattr(section, "__dict__"))
+        self.assertEqual([(part.row, part.id) for part in section.parts()], [(3, 1), (4, 2), (5, "3")])
+        copy = pickle.loads(pickle.dumps(section))
+        self.assertEqual((copy.row, copy.columns, copy.header), (section.row, section.columns, section.header))
+
+    def test_process_pool_matches_serial(self):
+        sections = [make_section(thickness) for thickness in (2.0, 2.4, 3.0, 7.0)] * 3
+        serial = price_sections(sections, self.price_index, workers=1)
+        with mock.patch.object(section_model, "PRICING_PARALLEL_MIN_SECTIONS", 1):
+            pooled = price_sections(sections, self.price_index, workers=2)
+        for expected, actual in zip(serial, pooled):
+            self.assertEqual(actual.total_price, expected.total_price)
+            self.assertEqual(list(actual.prices), list(expected.prices))
+            self.assertEqual((actual.totals, actual.logistics_cost), (expected.totals, expected.logistics_cost))
+
+    def test_workbook_priced_on_pool_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, price_path = write_nest_files(tmp, 12, 5, price_count=10)
+
+            def processed():
+                wb = openpyxl.load_workbook(path)
+                process_workbook(wb, price_path)
+                return list(wb[PART_INFO_SHEET].iter_rows(values_only=True))
+
+            serial = processed()
+            with mock.patch.object(section_model, "PRICING_PARALLEL_MIN_SECTIONS", 1), \
+                    mock.patch.object(section_model, "PRICING_WORKERS", 2):
+                self.assertEqual(processed(), serial)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# tests/test_service.py
+
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import openpyxl
+import quote_history
+import service
+from config import PART_INFO_SHEET
+from main import process_workbook
+from price_cache import load_price_table
+from service import JobService, http_request, section_totals_summary, DONE, FAILED
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+_run_job = service._run_job
+
+def _crash_or_run(input_path, *args):
+    if "crash" in os.path.basename(input_path):
+        os._exit(1)   # рабочий процесс погибает, как при OOM kill
+    return _run_job(input_path, *args)
+
+async def _wait_job(port, job_id):
+    while True:
+        _, _, body = await http_request("127.0.0.1", port, "GET", f"/jobs/{job_id}")
+        job = json.loads(body)
+        if job["status"] in (DONE, FAILED):
+            return job
+        await asyncio.sleep(0.05)
+
+async def _raw_status(port, request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        return int((await reader.readline()).split()[1])
+    finally:
+        writer.close()
+
+class TestJobService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path, self.price_path = write_nest_files(self.tmp.name, 4, 3, price_count=10)
+        self.history = os.path.join(self.tmp.name, "history.sqlite")
+        patcher = mock.patch.object(quote_history, "QUOTE_HISTORY_DB", self.history)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def run_jobs(self, uploads):
+        service = JobService({"main": load_price_table(self.price_path, use_cache=False)},
+                             os.path.join(self.tmp.name, "jobs"), workers=1, price_files={"main": self.price_path})
+        port = await service.start("127.0.0.1", 0)
+        try:
+            status, _, body = await http_request("127.0.0.1", port, "GET", "/prices")
+            self.assertEqual((status, json.loads(body)), (200, {"prices": ["main"]}))
+            status, _, _ = await http_request("127.0.0.1", port, "POST", "/jobs?price=other", b"x")
+            self.assertEqual(status, 400)
+            status, _, _ = await http_request("127.0.0.1", port, "GET", "/jobs/missing")
+            self.assertEqual(status, 404)
+
+            ids = []
+            for data in uploads:
+                status, _, body = await http_request("127.0.0.1", port, "POST", "/jobs?price=main&name=a_Nest.xlsx", data)
+                self.assertEqual(status, 202)
+                ids.append(json.loads(body)["id"])
+            results = []
+            for job_id in ids:
+                job = await _wait_job(port, job_id)
+                status, _, data = await http_request("127.0.0.1", port, "GET", f"/jobs/{job_id}/result")
+                results.append((job, status, data))
+            return results
+        finally:
+            await service.close()
+
+    def test_jobs_are_processed_and_returned(self):
+        with open(self.path, "rb") as f:
+            upload = f.read()
+        (job, status, data), (broken, broken_status, _) = asyncio.run(self.run_jobs([upload, b"not a workbook"]))
+
+        expected = openpyxl.load_workbook(self.path)
+        process_workbook(expected, self.price_path)
+        self.assertEqual((job["status"], status), (DONE, 200))
+        self.assertEqual(job["summary"]["sections"], section_totals_summary(expected[PART_INFO_SHEET]))
+        self.assertEqual(len(job["summary"]["sections"]), 4)
+        result = openpyxl.load_workbook(io.BytesIO(data))
+        self.assertEqual(list(result[PART_INFO_SHEET].iter_rows(values_only=True)),
+                         list(expected[PART_INFO_SHEET].iter_rows(values_only=True)))
+
+        self.assertEqual((broken["status"], broken_status), (FAILED, 409))
+        self.assertIsNotNone(broken["error"])
+        connection = quote_history.connect(self.history)
+        try:
+            runs = quote_history.query_runs(connection).fetchall()
+            paths = connection.execute("SELECT path FROM quote_runs").fetchall()
+        finally:
+            connection.close()
+        # Имя загруженного файла и прайс-лист, а не временный каталог задания и идентификатор
+        self.assertEqual([(row[2], row[3]) for row in runs], [("a_Nest.xlsx", os.path.basename(self.price_path))])
+        self.assertEqual(paths, [(None,)])
+    async def run_after_crash(self, upload):
+        service = JobService({"main": load_price_table(self.price_path, use_cache=False)},
+                             os.path.join(self.tmp.name, "jobs"), workers=1)
+        port = await service.start("127.0.0.1", 0)
+        try:
+            jobs = []
+            for name in ("crash_Nest.xlsx", "a_Nest.xlsx"):
+                status, _, body = await http_request("127.0.0.1", port, "POST", f"/jobs?price=main&name={name}", upload)
+                self.assertEqual(status, 202)
+                jobs.append(await _wait_job(port, json.loads(body)["id"]))
+            return jobs
+        finally:
+            await service.close()
+
+    def test_pool_is_restarted_after_worker_crash(self):
+        with open(self.path, "rb") as f:
+            upload = f.read()
+        with mock.patch.object(service, "_run_job", _crash_or_run):
+            crashed, job = asyncio.run(self.run_after_crash(upload))
+        self.assertEqual(crashed["status"], FAILED)
+        self.assertIn("BrokenProcessPool", crashed["error"])
+        self.assertEqual(job["status"], DONE)
+    async def raw_statuses(self, requests):
+        service = JobService({"main": load_price_table(self.price_path, use_cache=False)},
+                             os.path.join(self.tmp.name, "jobs"), workers=1)
+        port = await service.start("127.0.0.1", 0)
+        try:
+            return [await _raw_status(port, request) for request in requests]
+        finally:
+            await service.close()
+
+    def test_malformed_requests_get_400(self):
+        post = "POST /jobs?price=main HTTP/1.1\r\n{}\r\n"
+        statuses = asyncio.run(self.raw_statuses([
+            b"garbage\r\n\r\n",
+            b"GET /prices\r\n\r\n",
+            post.format("Content-Length: -1\r\n").encode(),
+            post.format("Content-Length: abc\r\n").encode(),
+            post.format("").encode(),
+        ]))
+        self.assertEqual(statuses, [400, 400, 400, 400, 411])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_sheet_layout.py
+
+import unittest
+from openpyxl import Workbook
+from sheet_layout import scan_layout, ROW_SECTION, ROW_HEADER, ROW_RESULT, ROW_EMPTY, ROW_PLAIN
+
+HEADER = ["ID", "Part Name", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)"]
+
+class TestSheetLayout(unittest.TestCase):
+
+    def setUp(self):
+        wb = Workbook()
+        self.ws = wb.active
+        self.ws.title = "Part Info"
+        rows = [
+            ["Отчёт", None, None, None, None, None, "Цена"],
+            ["Section: A Толщина стенки: 5"],
+            HEADER,
+            [1, "a", 1, 100, 1, 10, None],
+            ["2", "b", 1, 100, 1, 10, None],
+            [None, None, "Total Qty: 2"],
+            [],
+            ["Section: B"],
+            HEADER,
+            [1, "c", 1, 100, 1, 10, None],
+            ["примечание", "d"],
+        ]
+        for row in rows:
+            self.ws.append(row)
+
+    def test_sections_and_columns(self):
+        layout = scan_layout(self.ws)
+        self.assertEqual(layout.price_col, 7)
+        first, second = layout.sections
+        self.assertEqual((first.row, first.header_row, first.last_data_row, first.result_row, first.end_row), (2, 3, 5, 6, 7))
+        self.assertEqual((second.row, second.header_row, second.last_data_row, second.result_row, second.end_row), (8, 9, 10, None, 11))
+        self.assertEqual(first.columns["Cut Length(mm)"], 6)
+        self.assertEqual(first.id_col, 1)
+        self.assertEqual(first.label, "Section: A Толщина стенки: 5")
+
+    def test_row_kinds(self):
+        layout = scan_layout(self.ws)
+        self.assertEqual(layout.row_kind(2), ROW_SECTION)
+        self.assertEqual(layout.row_kind(3), ROW_HEADER)
+        self.assertEqual(layout.row_kind(4), ROW_PLAIN)
+        self.assertEqual(layout.row_kind(6), ROW_RESULT)
+        self.assertEqual(layout.row_kind(7), ROW_EMPTY)
+        self.assertEqual(layout.rows_of_kind(ROW_SECTION), [2, 8])
+
+    def test_layout_is_immutable(self):
+        layout = scan_layout(self.ws)
+        with self.assertRaises(TypeError):
+            layout.sections[0].columns["Qty"] = 1
+        with self.assertRaises(AttributeError):
+            layout.sections[0].row = 5
+
+    def test_header_requires_part_name(self):
+        # Строка с "ID" и "Qty", но без "Part Name" — не заголовок таблицы деталей
+        self.ws.insert_rows(9)
+        self.ws.cell(row=9, column=1, value="ID")
+        self.ws.cell(row=9, column=3, value="Qty")
+        second = scan_layout(self.ws).sections[1]
+        self.assertEqual(second.header_row, 10)
+        self.assertEqual(second.id_col, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
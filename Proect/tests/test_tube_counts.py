@@ -0,0 +1,54 @@
+# tests/test_tube_counts.py
+
+import unittest
+import openpyxl
+from config import NESTING_SUMMARY_SHEET, TUBE_INFO_SHEET, PART_INFO_SHEET, TUBE_COUNT_COL
+from part_info_processor import copy_tube_counts_to_part_info
+from sheet_layout import scan_layout
+from tube_counts import collect_section_tube_counts, section_key
+
+class TestTubeCounts(unittest.TestCase):
+
+    def test_nesting_summary(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = NESTING_SUMMARY_SHEET
+        ws.append(["Section: A1  Толщина 2", None, "Tube Count: 3", None, "Tube Count: 4", "Tube Count: 9"])
+        ws.append([None, "Section: b2"])
+        ws.append([None, None, None, None, None, "Section: C3", "Tube Count: 7"])
+        max_column = ws.max_column
+        wb.create_sheet(TUBE_INFO_SHEET).append([5, "Section: zz"])
+
+        index = collect_section_tube_counts(wb)
+        # Проверяются 4 ячейки правее подписи: "Tube Count: 9" в шестом столбце уже не видна
+        self.assertEqual(index, {"a1": 4, "c3": 7})
+        self.assertEqual(index.source, NESTING_SUMMARY_SHEET)
+        self.assertEqual(ws.max_column, max_column)
+        self.assertEqual(index.lookup("Section:   A1 толщина 2"), 4)
+        self.assertIsNone(index.lookup("Section: b2"))
+        self.assertEqual(index.lookup(None, 0), 0)
+
+    def test_tube_info_fallback_and_part_info(self):
+        wb = openpyxl.Workbook()
+        tube_ws = wb.active
+        tube_ws.title = TUBE_INFO_SHEET
+        for row in ([None, "Section: first part"], [2, "труба"], [6, None], ["Section: second"], [1.0]):
+            tube_ws.append(row)
+        index = collect_section_tube_counts(wb)
+        self.assertEqual(index, {"first part": 6, "second": 1})
+        self.assertEqual(index.source, TUBE_INFO_SHEET)
+
+        ws = wb.create_sheet(PART_INFO_SHEET)
+        ws.append(["Part Info"])
+        ws.append(["Section: First  Part"])
+        ws.append(["Section: third"])
+        self.assertEqual(copy_tube_counts_to_part_info(ws, scan_layout(ws), index), 1)
+        self.assertEqual(ws.cell(row=2, column=TUBE_COUNT_COL).value, "Tube Count: 6")
+        self.assertIsNone(ws.cell(row=3, column=TUBE_COUNT_COL).value)
+
+    def test_section_key(self):
+        self.assertEqual(section_key("Section:  R 01\tтолщина 3"), "r 01")
+        self.assertIsNone(section_key("Part Info"))
+
+if __name__ == "__main__":
+    unittest.main()
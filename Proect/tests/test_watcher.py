@@ -0,0 +1,98 @@
+# tests/test_watcher.py
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+import openpyxl
+import quote_history
+from backup_utils import read_runs, restore_backup
+from config import BACKUP_DIR, PRICE_SHEET_NAME, WATCH_DONE_DIR, WATCH_FAILED_DIR, WATCH_PROCESSING_DIR
+from watcher import FolderWatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+class TestFolderWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source, self.price_path = write_nest_files(self.tmp.name, 3, 2, price_count=10)
+        self.drop = os.path.join(self.tmp.name, "drop")
+        os.makedirs(self.drop)
+        patcher = mock.patch.object(quote_history, "QUOTE_HISTORY_DB", os.path.join(self.tmp.name, "history.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.watcher = FolderWatcher(self.drop, self.price_path, workers=1, settle_seconds=0, use_inotify=False)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def step_until(self, condition, timeout=60):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            self.watcher.step()
+            time.sleep(0.05)
+
+    def listing(self, name):
+        return sorted(entry.name for entry in os.scandir(os.path.join(self.drop, name)) if entry.is_file())
+
+    def test_processes_settled_files_once(self):
+        self.watcher.start()
+        shutil.copyfile(self.source, os.path.join(self.drop, "a_Nest.xlsx"))
+        with open(os.path.join(self.drop, "b_Nest.xlsx"), "wb") as f:
+            f.write(b"broken")
+        with open(os.path.join(self.drop, "notes.txt"), "w") as f:
+            f.write("не Nest-файл")
+
+        # Первое сканирование только запоминает размеры — ничего не берётся в работу
+        self.watcher.step()
+        self.assertEqual(self.listing(WATCH_PROCESSING_DIR), [])
+        self.step_until(lambda: self.watcher.done + self.watcher.failed == 2)
+
+        self.assertEqual(self.listing(WATCH_DONE_DIR), ["a_Nest.xlsx"])
+        self.assertEqual(self.listing(WATCH_FAILED_DIR), ["b_Nest.xlsx"])
+        self.assertEqual(sorted(entry.name for entry in os.scandir(self.drop) if entry.is_file()), ["notes.txt"])
+        wb = openpyxl.load_workbook(os.path.join(self.drop, WATCH_DONE_DIR, "a_Nest.xlsx"))
+        self.assertIn(PRICE_SHEET_NAME, wb.sheetnames)
+        # Исходник обработанного файла восстанавливается из хранилища каталога наблюдения
+        done_path = os.path.join(self.drop, WATCH_DONE_DIR, "a_Nest.xlsx")
+        store = os.path.join(self.drop, BACKUP_DIR)
+        self.assertEqual(len(read_runs(done_path, store)), 1)
+        restore_backup(done_path, backup_dir=store)
+        with open(done_path, "rb") as restored, open(self.source, "rb") as original:
+            self.assertEqual(restored.read(), original.read())
+        for _ in range(3):
+            self.watcher.step()
+        self.assertEqual((self.watcher.done, self.watcher.failed), (1, 1))
+
+    def test_growing_file_waits(self):
+        path = os.path.join(self.drop, "a_Nest.xlsx")
+        self.watcher.settle_seconds = 0.3
+        self.watcher.start()
+        with open(path, "wb") as f:
+            f.write(b"PK")
+            f.flush()
+            self.watcher.step()
+            f.write(b"more")
+            f.flush()
+            self.watcher.step()
+        self.assertEqual(self.listing(WATCH_PROCESSING_DIR), [])
+        self.assertTrue(os.path.exists(path))
+
+    def test_stale_processing_file_is_not_rerun(self):
+        os.makedirs(os.path.join(self.drop, WATCH_PROCESSING_DIR))
+        shutil.copyfile(self.source, os.path.join(self.drop, WATCH_PROCESSING_DIR, "a_Nest.xlsx"))
+        self.watcher.start()
+        self.watcher.step()
+        self.assertEqual(self.listing(WATCH_PROCESSING_DIR), [])
+        self.assertEqual(self.listing(WATCH_FAILED_DIR), ["a_Nest.xlsx"])
+        self.assertEqual(self.watcher.done, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# tests/test_workbook_writer.py
+
+import datetime
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.comments import Comment
+from openpyxl.styles import Font
+import workbook_writer
+from workbook_writer import save_workbook
+
+def build_workbook():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Part Info"
+    ws.append(["ID", "Part Name", "Qty", " с пробелами ", "a < b & \"c\"", "", True, 2.5, 10 ** 15, 1 / 3])
+    ws.append([1, "=A1*2", datetime.datetime(2024, 5, 1, 12, 30), None, "ERROR", -0.0])
+    ws["B1"].font = Font(bold=True)
+    ws["C2"].comment = Comment("проверено", "tester")
+    ws["D2"].hyperlink = "https://example.com"
+    ws["J3"].font = Font(italic=True)
+    ws.row_dimensions[3].height = 30
+    ws.merge_cells("A4:C4")
+    hidden = wb.create_sheet("_hidden")
+    hidden.sheet_state = "veryHidden"
+    hidden.append(["version", 1])
+    return wb
+
+class TestSaveWorkbook(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_output_matches_openpyxl(self):
+        build_workbook().save(self.path("reference.xlsx"))
+        save_workbook(build_workbook(), self.path("fast.xlsx"))
+        with zipfile.ZipFile(self.path("reference.xlsx")) as reference, zipfile.ZipFile(self.path("fast.xlsx")) as fast:
+            self.assertEqual(reference.namelist(), fast.namelist())
+            for name in reference.namelist():
+                if name != "docProps/core.xml":  # время изменения
+                    self.assertEqual(reference.read(name), fast.read(name), name)
+
+    def test_failed_save_keeps_original(self):
+        target = self.path("a_Nest.xlsx")
+        with open(target, "wb") as f:
+            f.write(b"original")
+        with mock.patch.object(workbook_writer._Writer, "write_data", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                save_workbook(build_workbook(), target)
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"original")
+        self.assertEqual(os.listdir(self.tmp.name), ["a_Nest.xlsx"])
+
+    def test_compresslevel_zero_stores_entries(self):
+        target = self.path("stored.xlsx")
+        save_workbook(build_workbook(), target, compresslevel=0)
+        with zipfile.ZipFile(target) as archive:
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+
+    def test_version_check(self):
+        for version, supported in (("3.1.5", True), ("3.1.0", True), ("3.2.0", False), ("3.0.10", False),
+                                   ("4.0.0a1", False), ("dev", False)):
+            with mock.patch.object(openpyxl, "__version__", version):
+                self.assertEqual(workbook_writer.openpyxl_internals_supported(), supported, version)
+
+    def test_unsupported_openpyxl_saves_with_wb_save(self):
+        target = self.path("a_Nest.xlsx")
+        with open(target, "wb") as f:
+            f.write(b"original")
+        with mock.patch.object(openpyxl, "__version__", "3.2.0"), \
+                mock.patch.object(workbook_writer._Writer, "save", side_effect=AssertionError("fast writer used")):
+            save_workbook(build_workbook(), target)
+        wb = openpyxl.load_workbook(target)
+        self.assertEqual(wb["Part Info"]["C2"].comment.text, "проверено")
+        self.assertEqual(os.listdir(self.tmp.name), ["a_Nest.xlsx"])
+
+if __name__ == "__main__":
+    unittest.main()
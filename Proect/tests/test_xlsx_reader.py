@@ -0,0 +1,143 @@
+# tests/test_xlsx_reader.py
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import openpyxl
+import main
+from openpyxl import Workbook
+from config import PART_INFO_SHEET
+from main import run_pipeline
+from tube_counts import collect_section_tube_counts
+from quote import quote_file
+from xlsx_reader import XlsxValuesReader
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from nest_generator import write_nest_files
+
+_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Минимальная книга как из Excel: строки в sharedStrings.xml, форматированный текст, без r у ячеек
+EXCEL_LIKE_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_RELS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'),
+    "xl/workbook.xml": (
+        f'<workbook xmlns="{_MAIN}" xmlns:r="{_RELS}"><sheets>'
+        '<sheet name="Part Info" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{_RELS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_RELS}/sharedStrings" Target="sharedStrings.xml"/></Relationships>'),
+    "xl/sharedStrings.xml": (
+        f'<sst xmlns="{_MAIN}" count="3" uniqueCount="3">'
+        '<si><t>Section: R1 Толщина стенки: 2,5</t></si>'
+        '<si><r><rPr><b/></rPr><t>Tube </t></r><r><t xml:space="preserve">Count: 4</t></r></si>'
+        '<si><t>ID</t><rPh sb="0" eb="1"><t>x</t></rPh></si></sst>'),
+    "xl/worksheets/sheet1.xml": (
+        f'<worksheet xmlns="{_MAIN}"><sheetData>'
+        '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+        '<row><c t="s"><v>2</v></c><c><v>12.5</v></c><c t="b"><v>1</v></c><c t="e"><v>#VALUE!</v></c></row>'
+        '<row r="5"><c r="B5" t="str"><f>A1</f><v>cached</v></c><c r="D5" s="0"/></row>'
+        '</sheetData></worksheet>'),
+}
+
+class TestXlsxValuesReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertSameAsOpenpyxl(self, path):
+        wb = openpyxl.load_workbook(path)
+        with XlsxValuesReader(path) as book:
+            self.assertEqual(book.sheetnames, wb.sheetnames)
+            for name in wb.sheetnames:
+                expected, actual = wb[name], book[name]
+                # Размеры — до iter_rows: openpyxl создаёт недостающие ячейки при обходе
+                self.assertEqual((actual.min_row, actual.max_row, actual.min_column, actual.max_column),
+                                 (expected.min_row, expected.max_row, expected.min_column, expected.max_column))
+                self.assertEqual(list(actual.iter_rows(values_only=True)), list(expected.iter_rows(values_only=True)))
+
+    def test_values_match_openpyxl(self):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Лист"
+        ws["B2"] = "Section: R1 Толщина стенки: 2,5"
+        ws["C2"] = 3
+        ws["D2"] = 2.75
+        ws["E2"] = True
+        ws["B4"] = "Section: R1 Толщина стенки: 2,5"
+        ws["AB7"] = -1e-3
+        ws.merge_cells("B9:D10")
+        wb.create_sheet("Пустой")
+        path = os.path.join(self.tmp.name, "a.xlsx")
+        wb.save(path)
+        self.assertSameAsOpenpyxl(path)
+
+    def test_excel_shared_strings(self):
+        path = os.path.join(self.tmp.name, "excel.xlsx")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, text in EXCEL_LIKE_PARTS.items():
+                archive.writestr(name, text)
+        with XlsxValuesReader(path) as book:
+            ws = book["Part Info"]
+            self.assertEqual(ws.cell(row=1, column=3).value, "Tube Count: 4")
+            self.assertEqual(list(ws.iter_rows(values_only=True))[1], ("ID", 12.5, True, "#VALUE!"))
+            self.assertEqual(ws.cell(row=5, column=2).value, "cached")
+            self.assertEqual((ws.min_row, ws.max_row, ws.max_column), (1, 5, 4))
+
+    def test_synthetic_nest_workbook(self):
+        path, _ = write_nest_files(self.tmp.name, 6, 4)
+        self.assertSameAsOpenpyxl(path)
+        with XlsxValuesReader(path) as book:
+            self.assertEqual(collect_section_tube_counts(book), collect_section_tube_counts(openpyxl.load_workbook(path)))
+
+    def test_quote_matches_pipeline_totals(self):
+        path, price_path = write_nest_files(self.tmp.name, 6, 4, price_count=10)
+        quotes = {backend: quote_file(path, price_path, backend) for backend in ("openpyxl", "xml")}
+        self.assertEqual(quotes["xml"], quotes["openpyxl"])
+
+        work = os.path.join(self.tmp.name, "work_Nest.xlsx")
+        shutil.copyfile(path, work)
+        run_pipeline(work, price_path)
+        written = [float(value.split(":")[1]) for row in openpyxl.load_workbook(work)[PART_INFO_SHEET].iter_rows(values_only=True)
+                   for value in row if isinstance(value, str) and value.startswith("Total Price Section")]
+        self.assertEqual(written, [quote.total_price for quote in quotes["xml"] if quote.total_price is not None])
+
+    def test_pipeline_tube_counts_from_xml_reader(self):
+        path, price_path = write_nest_files(self.tmp.name, 6, 4, price_count=10)
+        outputs = {}
+        for backend in ("openpyxl", "xml"):
+            work = os.path.join(self.tmp.name, f"{backend}_Nest.xlsx")
+            shutil.copyfile(path, work)
+            books = []
+
+            def collect(book):
+                books.append(type(book))
+                return collect_section_tube_counts(book)
+
+            with mock.patch.object(main, "READER_BACKEND", backend), \
+                    mock.patch.object(main, "collect_section_tube_counts", side_effect=collect):
+                run_pipeline(work, price_path)
+            outputs[backend] = list(openpyxl.load_workbook(work)[PART_INFO_SHEET].iter_rows(values_only=True))
+            self.assertEqual(books, [XlsxValuesReader if backend == "xml" else openpyxl.Workbook])
+        self.assertEqual(outputs["xml"], outputs["openpyxl"])
+
+if __name__ == "__main__":
+    unittest.main()
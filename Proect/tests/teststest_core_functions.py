@@ -3,6 +3,8 @@
 import unittest
 from data_processing import try_convert, extract_thickness_value
 from pricing import calculate_prices_for_section
+from price_index import PriceIndex
+from sheet_layout import scan_layout
 from openpyxl import Workbook
 
 class TestCoreFunctions(unittest.TestCase):
@@ -43,10 +45,9 @@ class TestCoreFunctions(unittest.TestCase):
         ws.append(["ID", "Qty", "Part Length(mm)", "Contour Qty", "Cut Length(mm)", "Price(₽)"])
         ws.append([1, 2, 1000, 1, 2000, None])  # ID 1, Qty 2, Part Length 1m, Contour 1, Cut 2m
 
-        section_row = 1
-        next_section_row = 3
+        section = scan_layout(ws).sections[0]
 
-        total_price = calculate_prices_for_section(ws, price_ws, section_row, next_section_row)
+        total_price = calculate_prices_for_section(ws, PriceIndex.from_sheet(price_ws), section)
 
         # Проверяем цену: (1 * 100) + (2 / 1000 * 20) = 100 + 0.04 = ~100.04 за единицу * 2 шт = 200.08
         self.assertAlmostEqual(total_price, 200.08, delta=0.01)
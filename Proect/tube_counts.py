@@ -0,0 +1,83 @@
+# tube_counts.py
+"""Индекс Tube Count по секциям с листов Nesting Summary и Tube Info.
+
+Каждый лист читается одним проходом по значениям (iter_rows(values_only=True)) — соседние
+ячейки берутся из той же строки, а не отдельными ws.cell(), которые у openpyxl ещё и создают
+пустые ячейки. Ключ — нормализованное имя секции (section_key); Part Info размечается
+поиском в словаре по подписи секции (TubeCountIndex.lookup).
+
+Nesting Summary: в строке с "Section: …" Tube Count ищется в NEIGHBOUR_CELLS ячейках правее.
+Tube Info (только если в Nesting Summary ничего не нашлось): число в столбце A относится
+к последней встреченной выше секции.
+"""
+
+from functools import lru_cache
+from config import NESTING_SUMMARY_SHEET, TUBE_INFO_SHEET
+from section_header import get_section_name, parse_tube_count
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Сколько ячеек правее подписи секции в Nesting Summary проверяется на "Tube Count: N"
+NEIGHBOUR_CELLS = 4
+
+_SECTION_MARK = "section:"
+
+@lru_cache(maxsize=4096)
+def section_key(label):
+    """Ключ секции: имя из get_section_name с пробелами, сжатыми до одного; None — не секция."""
+    name = get_section_name(label)
+    return " ".join(name.split()) if name else None
+
+class TubeCountIndex(dict):
+    """{ключ секции: Tube Count}; source — лист, с которого взяты значения (или None)."""
+
+    def __init__(self, source=None):
+        super().__init__()
+        self.source = source
+
+    def lookup(self, label, default=None):
+        """Tube Count секции по подписи (текст ячейки "Section: …") или default."""
+        key = section_key(label) if isinstance(label, str) else None
+        return self.get(key, default) if key is not None else default
+
+def _section_key_of(value):
+    if isinstance(value, str) and _SECTION_MARK in value.lower():
+        return section_key(value)
+    return None
+
+def _scan_nesting_summary(ws, index):
+    for values in ws.iter_rows(values_only=True):
+        for column, value in enumerate(values):
+            key = _section_key_of(value)
+            if key is None:
+                continue
+            # При нескольких подписях правее побеждает последняя — как при проверке по одной ячейке
+            for neighbour in values[column + 1:column + 1 + NEIGHBOUR_CELLS]:
+                if neighbour and isinstance(neighbour, str):
+                    tube_count = parse_tube_count(neighbour)
+                    if tube_count is not None:
+                        index[key] = tube_count
+
+def _scan_tube_info(ws, index):
+    current = None
+    for values in ws.iter_rows(values_only=True):
+        for column, value in enumerate(values):
+            if value and isinstance(value, str) and _SECTION_MARK in value.lower():
+                current = section_key(value)
+            if current and column == 0 and isinstance(value, (int, float)):
+                index[current] = int(value)
+
+def collect_section_tube_counts(wb):
+    """TubeCountIndex книги (openpyxl или xlsx_reader.XlsxValuesReader)."""
+    index = TubeCountIndex()
+    if NESTING_SUMMARY_SHEET in wb.sheetnames:
+        _scan_nesting_summary(wb[NESTING_SUMMARY_SHEET], index)
+        if index:
+            index.source = NESTING_SUMMARY_SHEET
+    if not index and TUBE_INFO_SHEET in wb.sheetnames:
+        _scan_tube_info(wb[TUBE_INFO_SHEET], index)
+        if index:
+            index.source = TUBE_INFO_SHEET
+    logger.debug("🧮 Tube Count найден для секций: %s (%s)", len(index), index.source)
+    return index
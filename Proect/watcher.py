@@ -0,0 +1,296 @@
+# watcher.py
+"""Режим демона: следит за каталогом выгрузок и сам обрабатывает новые *_Nest.xlsx.
+
+    python watcher.py /mnt/share/nest --price Price.xlsx --workers 2
+
+Файл берётся в работу, только когда его размер и время изменения не менялись
+WATCH_SETTLE_SECONDS (программа раскроя ещё может его дописывать). Перед обработкой
+файл переносится в processing/ одним rename — это «захват»: второй экземпляр демона
+или повторное сканирование его уже не увидят. После обработки файл уходит в done/
+или failed/. Файлы, оставшиеся в processing/ после аварийной остановки, при запуске
+переносятся в failed/, а не обрабатываются повторно.
+
+На Linux о новых файлах сообщает inotify; каталог всё равно пересканируется каждые
+WATCH_POLL_SECONDS — на сетевых ресурсах (SMB, NFS) события inotify о чужих записях
+не приходят. Обработка — batch.process_file на пуле процессов; в работу берётся не
+больше файлов, чем процессов, остальные ждут в каталоге.
+
+Резервные копии исходников пишутся в backups/ каталога наблюдения (--backup-dir — в другой
+каталог); исходник обработанного файла восстанавливается по его имени:
+    python backup_utils.py restore /mnt/share/nest/done/a_Nest.xlsx --backup-dir /mnt/share/nest/backups
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from batch import DEFAULT_PATTERN, process_file
+from config import (BACKUP_DIR, WATCH_SETTLE_SECONDS, WATCH_POLL_SECONDS, WATCH_WORKERS, WATCH_STATS_SECONDS,
+                    WATCH_PROCESSING_DIR, WATCH_DONE_DIR, WATCH_FAILED_DIR)
+from log_setup import setup_worker_logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Inotify:
+    """Уведомления inotify о каталоге через libc (ctypes). Сами события не разбираются:
+    они только будят цикл раньше, а список файлов даёт сканирование."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch")
+
+    def wait(self, timeout):
+        """Ждёт событие не дольше timeout секунд; True, если оно было."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+def _open_notifier(directory):
+    """_Inotify или None, если inotify недоступен (не Linux, нет libc, исчерпан лимит)."""
+    try:
+        return _Inotify(directory)
+    except (OSError, AttributeError) as e:
+        logger.info(f"ℹ️ inotify недоступен ({e}), каталог опрашивается каждые {WATCH_POLL_SECONDS} с")
+        return None
+
+def _unique_path(directory, name):
+    """Путь в directory; при совпадении имени добавляется время."""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return path
+    stem, ext = os.path.splitext(name)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    counter = 0
+    while os.path.exists(path):
+        counter += 1
+        path = os.path.join(directory, f"{stem}_{stamp}{f'_{counter}' if counter > 1 else ''}{ext}")
+    return path
+
+class FolderWatcher:
+    """Цикл наблюдения за каталогом: ожидание стабильности, захват, пул процессов, разбор результатов."""
+
+    def __init__(self, directory, price_file, workers=None, pattern=DEFAULT_PATTERN,
+                 settle_seconds=WATCH_SETTLE_SECONDS, poll_seconds=WATCH_POLL_SECONDS,
+                 use_inotify=True, compresslevel=None, backup_dir=None):
+        self.directory = os.path.abspath(directory)
+        self.price_file = os.path.abspath(price_file)
+        self.workers = workers or WATCH_WORKERS or os.cpu_count() or 1
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify
+        self.compresslevel = compresslevel
+        self.processing_dir = os.path.join(self.directory, WATCH_PROCESSING_DIR)
+        self.done_dir = os.path.join(self.directory, WATCH_DONE_DIR)
+        self.failed_dir = os.path.join(self.directory, WATCH_FAILED_DIR)
+        # Хранилище копий — у каталога наблюдения, а не в processing/: по имени файла из done/
+        # или failed/ находится журнал его запусков
+        self.backup_dir = os.path.abspath(backup_dir or os.path.join(self.directory, BACKUP_DIR))
+        # имя файла -> (размер, mtime_ns, с какого момента не меняется)
+        self._observed = {}
+        # future -> (имя, путь в processing/)
+        self._running = {}
+        self._finished = deque()  # время завершения заданий за последнее окно статистики
+        self.done = 0
+        self.failed = 0
+        self._pool = None
+        self._notifier = None
+        self._last_stats = time.monotonic()
+
+    def start(self):
+        for directory in (self.processing_dir, self.done_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._recover_stale()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=setup_worker_logging)
+        self._notifier = _open_notifier(self.directory) if self.use_inotify else None
+        logger.info(f"👀 Наблюдение за {self.directory} ({self.pattern}), процессов: {self.workers}, "
+                    f"{'inotify' if self._notifier else 'опрос'}")
+
+    def close(self):
+        """Дожидается начатых заданий и разбирает их результаты."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._collect()
+            self._pool = None
+        if self._notifier is not None:
+            self._notifier.close()
+            self._notifier = None
+
+    def _recover_stale(self):
+        # Файл из processing/ мог быть уже сохранён обработанным — повторно не трогаем
+        for entry in os.scandir(self.processing_dir):
+            if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                target = _unique_path(self.failed_dir, entry.name)
+                os.replace(entry.path, target)
+                logger.warning(f"⚠️ {entry.name} остался в {WATCH_PROCESSING_DIR}/ после прошлой остановки, "
+                               f"перенесён в {WATCH_FAILED_DIR}/")
+
+    def _scan(self):
+        """Файлы, которые не менялись settle_seconds; остальные запоминаются для следующего сканирования."""
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        for entry in os.scandir(self.directory):
+            name = entry.name
+            if name.startswith(("~$", ".")) or not fnmatch.fnmatch(name, self.pattern):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            seen.add(name)
+            state = (stat.st_size, stat.st_mtime_ns)
+            previous = self._observed.get(name)
+            if previous is None or previous[:2] != state:
+                self._observed[name] = state + (now,)
+            elif stat.st_size > 0 and now - previous[2] >= self.settle_seconds:
+                ready.append(name)
+        for name in set(self._observed) - seen:
+            del self._observed[name]
+        return sorted(ready, key=lambda name: self._observed[name][2])
+
+    def _claim(self, name):
+        """Переносит файл в processing/; None, если его уже забрал другой процесс."""
+        target = _unique_path(self.processing_dir, name)
+        try:
+            os.rename(os.path.join(self.directory, name), target)
+        except FileNotFoundError:
+            return None
+        finally:
+            self._observed.pop(name, None)
+        return target
+
+    def _submit_ready(self):
+        for name in self._scan():
+            if len(self._running) >= self.workers:
+                break
+            path = self._claim(name)
+            if path is None:
+                continue
+            future = self._pool.submit(process_file, path, self.price_file, False, self.compresslevel, None,
+                                       self.backup_dir)
+            self._running[future] = (name, path)
+            logger.info(f"📥 {name} взят в работу; {self._depth()}")
+
+    def _collect(self):
+        for future in [f for f in self._running if f.done()]:
+            name, path = self._running.pop(future)
+            try:
+                entry = future.result()
+            except Exception as e:  # рабочий процесс упал целиком
+                entry = {"status": "failed", "error": f"{type(e).__name__}: {e}", "seconds": None}
+            ok = entry["status"] == "ok"
+            target = _unique_path(self.done_dir if ok else self.failed_dir, os.path.basename(path))
+            os.replace(path, target)
+            self._finished.append(time.monotonic())
+            if ok:
+                self.done += 1
+                logger.info(f"✅ {name} → {WATCH_DONE_DIR}/ ({entry['seconds']} с); {self._depth()}")
+            else:
+                self.failed += 1
+                logger.error(f"❌ {name} → {WATCH_FAILED_DIR}/: {entry['error']}; {self._depth()}")
+
+    def _depth(self):
+        return f"ожидают {len(self._observed)}, в работе {len(self._running)}"
+
+    def _log_stats(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_stats < WATCH_STATS_SECONDS:
+            return
+        while self._finished and now - self._finished[0] > WATCH_STATS_SECONDS:
+            self._finished.popleft()
+        rate = len(self._finished) / WATCH_STATS_SECONDS * 60
+        logger.info(f"📈 {rate:.1f} файлов/мин за {WATCH_STATS_SECONDS} с; {self._depth()}; "
+                    f"всего готово {self.done}, с ошибками {self.failed}")
+        self._last_stats = now
+
+    def step(self):
+        """Одна итерация: разбор завершённых заданий, сканирование, захват готовых файлов."""
+        self._collect()
+        self._submit_ready()
+        self._log_stats()
+
+    def _wait(self):
+        # Пока есть файлы в ожидании или в работе, проверяем чаще
+        timeout = self.poll_seconds
+        if self._observed or self._running:
+            timeout = min(timeout, max(self.settle_seconds / 2, 0.2))
+        if self._notifier is not None:
+            self._notifier.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def run(self, stop_event=None):
+        """Работает до stop_event (или Ctrl+C / SIGTERM при запуске из командной строки)."""
+        stop_event = stop_event or threading.Event()
+        self.start()
+        try:
+            while not stop_event.is_set():
+                self.step()
+                self._wait()
+        finally:
+            logger.info(f"🛑 Остановка: дожидаемся заданий в работе ({len(self._running)})")
+            self.close()
+            self._log_stats(force=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Демон: обработка новых Nest-файлов в каталоге.")
+    parser.add_argument("directory", help="Каталог, куда программа раскроя пишет выгрузки")
+    parser.add_argument("--price", required=True, help="Файл с ценами (xlsx, csv, json)")
+    parser.add_argument("--workers", type=int, default=None, help="Число рабочих процессов (по умолчанию — число CPU)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="Шаблон имён файлов")
+    parser.add_argument("--settle", type=float, default=WATCH_SETTLE_SECONDS,
+                        help="Сколько секунд файл не должен меняться перед обработкой")
+    parser.add_argument("--poll", type=float, default=WATCH_POLL_SECONDS, help="Интервал сканирования каталога, с")
+    parser.add_argument("--no-inotify", action="store_true", help="Только опрос каталога")
+    parser.add_argument("--compresslevel", type=int, choices=range(10), default=None, metavar="0-9",
+                        help="Уровень сжатия xlsx при сохранении (по умолчанию — из config)")
+    parser.add_argument("--backup-dir", default=None,
+                        help=f"Каталог хранилища резервных копий (по умолчанию — {BACKUP_DIR} в каталоге наблюдения)")
+    args = parser.parse_args(argv)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    watcher = FolderWatcher(args.directory, args.price, args.workers, args.pattern, args.settle, args.poll,
+                            not args.no_inotify, args.compresslevel, args.backup_dir)
+    try:
+        watcher.run(stop_event)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    from log_setup import setup_logging
+    setup_logging()
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+# workbook_writer.py
+"""Сохранение книги: потоковая запись строк листов и атомарная замена файла.
+
+wb.save пишет прямо в исходный файл: если процесс прервётся, файл испорчен. save_workbook
+пишет книгу во временный файл в том же каталоге, делает fsync и заменяет исходник
+одним os.replace — на диске всегда либо старый, либо новый файл целиком.
+
+Строки листа выводятся по одной готовым XML-текстом (FastWorksheetWriter) вместо сборки
+элемента на каждую ячейку; результат побайтно совпадает с записью openpyxl. Ячейки
+с формулами, датами, форматированным текстом, комментариями и ссылками пишутся
+стандартным write_cell. Уровень сжатия deflate задаётся (0 — без сжатия).
+
+FastWorksheetWriter и memory_budget используют внутренние классы openpyxl; они сверены
+с веткой OPENPYXL_SUPPORTED (закреплена в requirements.txt). С другой версией openpyxl
+книга сохраняется стандартным wb.save — по-прежнему во временный файл с атомарной заменой.
+"""
+
+import datetime
+import os
+import tempfile
+from xml.sax.saxutils import escape
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+import openpyxl
+from openpyxl.cell._writer import write_cell
+from openpyxl.comments.comment_sheet import CommentRecord
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.compat import safe_string
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.writer.excel import ExcelWriter
+from config import SAVE_COMPRESSLEVEL
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ветка openpyxl, с внутренними классами которой (WorksheetWriter, ExcelWriter, WorksheetReader,
+# ячейки листа) проверены FastWorksheetWriter и memory_budget
+OPENPYXL_SUPPORTED = (3, 1)
+
+# Предупреждение о записи через wb.save выводится один раз за процесс
+_fallback_warned = False
+
+def openpyxl_internals_supported():
+    """True, если установлена openpyxl ветки OPENPYXL_SUPPORTED."""
+    try:
+        return tuple(int(part) for part in openpyxl.__version__.split(".")[:2]) == OPENPYXL_SUPPORTED
+    except ValueError:
+        return False
+
+def _fast_writer_supported():
+    global _fallback_warned
+    if openpyxl_internals_supported():
+        return True
+    if not _fallback_warned:
+        logger.warning(f"⚠️ openpyxl {openpyxl.__version__} не проверена с потоковой записью строк "
+                       f"(нужна {'.'.join(map(str, OPENPYXL_SUPPORTED))}.x): книга сохраняется стандартным wb.save")
+        _fallback_warned = True
+    return False
+
+_ATTRIB_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
+_ATTRIB_SPECIAL = frozenset('&<>"\n\r\t')
+
+def _attrib(value):
+    return escape(value, _ATTRIB_ENTITIES) if _ATTRIB_SPECIAL.intersection(value) else value
+
+def _text(value):
+    # Экранирование нужно редко — проверка дешевле трёх replace
+    return escape(value) if "&" in value or "<" in value or ">" in value else value
+
+def _number(value):
+    # Как openpyxl.compat.safe_string для чисел
+    return "" if value != value or value in (float("inf"), float("-inf")) else "%.16g" % value
+
+class FastWorksheetWriter(WorksheetWriter):
+    """WorksheetWriter, выводящий строку листа одной строкой текста."""
+
+    def __init__(self, ws, out=None):
+        super().__init__(ws, out)
+        self._style_ids = {}
+        self._letters = {}
+
+    def _style_id(self, cell):
+        # cell.style_id дважды хеширует StyleArray и ищет его в списке стилей книги — кэшируем
+        style = cell._style
+        style_id = self._style_ids.get(style)
+        if style_id is None:
+            style_id = self._style_ids[style] = cell.style_id
+        return style_id
+
+    def write_row(self, xf, row, row_idx):
+        write = getattr(xf, "_file", None)
+        if not callable(write):
+            # lxml.etree.xmlfile — прямого доступа к потоку нет, пишем стандартно
+            return super().write_row(xf, row, row_idx)
+
+        attrs = {'r': f"{row_idx}"}
+        attrs.update(self.ws.row_dimensions.get(row_idx, {}))
+        parts = ["<row", *(f' {key}="{_attrib(value)}"' for key, value in attrs.items()), ">"]
+        for cell in row:
+            value = cell._value
+            styled = cell.has_style
+            if value is None and not styled and cell._comment is None:
+                continue
+            data_type = cell.data_type
+            if (cell._comment is not None or cell.hyperlink is not None
+                    or data_type not in "nsbe" or (data_type == "s" and not isinstance(value, str))):
+                write("".join(parts))
+                parts = []
+                if cell._comment is not None:
+                    self.ws._comments.append(CommentRecord.from_cell(cell))
+                write_cell(xf, self.ws, cell, styled)
+                continue
+            letter = self._letters.get(cell.column)
+            if letter is None:
+                letter = self._letters[cell.column] = get_column_letter(cell.column)
+            coordinate = f"{letter}{row_idx}"
+            style = f' s="{self._style_id(cell)}"' if styled else ""
+            if data_type == "s":
+                if value == "":
+                    parts.append(f'<c r="{coordinate}"{style} t="inlineStr" />')
+                    continue
+                space = ' xml:space="preserve"' if value.strip() and value != value.strip() else ""
+                parts.append(f'<c r="{coordinate}"{style} t="inlineStr"><is><t{space}>{_text(value)}</t></is></c>')
+            elif value is None or value == "":
+                parts.append(f'<c r="{coordinate}"{style} t="{data_type}" />')
+            else:
+                text = _number(value) if type(value) in (int, float) else _text(safe_string(value))
+                parts.append(f'<c r="{coordinate}"{style} t="{data_type}"><v>{text}</v></c>')
+        parts.append("</row>")
+        write("".join(parts))
+
+class _Writer(ExcelWriter):
+
+    def write_worksheet(self, ws):
+        if self.workbook.write_only:
+            return super().write_worksheet(ws)
+        ws._drawing = SpreadsheetDrawing()
+        ws._drawing.charts = ws._charts
+        ws._drawing.images = ws._images
+        # Лист может выводить строки сам (memory_budget.SpilledWorksheet — готовым XML)
+        writer = getattr(ws, "writer_class", FastWorksheetWriter)(ws)
+        writer.write()
+        ws._rels = writer._rels
+        self._archive.write(writer.out, ws.path[1:])
+        self.manifest.append(ws)
+        writer.cleanup()
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # Windows: каталог так не открыть, rename там и так надёжен
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def save_workbook(wb, path, compresslevel=None):
+    """Сохраняет книгу атомарно: временный файл рядом с path, fsync, os.replace.
+
+    compresslevel — уровень deflate 0–9 (None — SAVE_COMPRESSLEVEL из config; при записи
+    через wb.save — уровень openpyxl по умолчанию).
+    """
+    if compresslevel is None:
+        compresslevel = SAVE_COMPRESSLEVEL
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            if _fast_writer_supported():
+                compression = ZIP_STORED if compresslevel == 0 else ZIP_DEFLATED
+                with ZipFile(f, "w", compression, allowZip64=True,
+                             compresslevel=None if compresslevel == 0 else compresslevel) as archive:
+                    wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+                    _Writer(wb, archive).save()
+            else:
+                wb.save(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # mkstemp создаёт файл с правами 0600 — возвращаем права исходника
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+    logger.debug("💾 Книга записана атомарно: %s", path)
+    return path
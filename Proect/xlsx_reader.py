@@ -0,0 +1,281 @@
+# xlsx_reader.py
+"""Лёгкое чтение значений xlsx: zipfile + потоковый iterparse, без стилей и объединений.
+
+Читаются только запрошенные листы; общие строки (sharedStrings.xml) разбираются один раз.
+Архив по возможности отображается в память (mmap). Лист отдаётся как ValuesSheet —
+неизменяемое представление с тем же iter_rows / cell, что у листа openpyxl, поэтому
+scan_layout, сбор Tube Count и расчёт цен работают с ним без изменений.
+
+Отличия от openpyxl.load_workbook (он остаётся эталоном):
+- для ячеек с формулой берётся сохранённое значение (как data_only=True);
+- числа с форматом даты не превращаются в datetime.
+"""
+
+import mmap
+import posixpath
+import zipfile
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+_MAIN_NS = ("http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+            "http://purl.oclc.org/ooxml/spreadsheetml/main")
+_REL_NS = ("http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+           "http://purl.oclc.org/ooxml/officeDocument/relationships")
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+def _tags(name):
+    return {f"{{{ns}}}{name}" for ns in _MAIN_NS}
+
+_T, _R, _SI, _SHEET = (_tags(name) for name in ("t", "r", "si", "sheet"))
+_RELATIONSHIP = f"{{{_PKG_REL_NS}}}Relationship"
+_REL_IDS = tuple(f"{{{ns}}}id" for ns in _REL_NS)
+
+# Ячейка ValuesSheet: то, что читают row/column/value у ячейки openpyxl
+ValueCell = namedtuple("ValueCell", ["row", "column", "value"])
+
+_DIGITS = "0123456789"
+_column_cache = {}
+
+def _column_index(reference):
+    """'AB12' → 28."""
+    letters = reference.rstrip(_DIGITS)
+    index = _column_cache.get(letters)
+    if index is None:
+        index = 0
+        for char in letters.upper():
+            index = index * 26 + ord(char) - 64
+        _column_cache[letters] = index
+    return index
+
+def _row_index(reference):
+    """'AB12' → 12."""
+    return int(reference[len(reference.rstrip(_DIGITS)):])
+
+def _cast_number(text):
+    # Как openpyxl: целое, если нет точки и экспоненты
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+def _rich_text(element):
+    """Текст <si>/<is>: сам <t> или склейка <r><t>; фонетические подсказки (rPh) не входят."""
+    parts = []
+    for child in element:
+        if child.tag in _T:
+            parts.append(child.text or "")
+        elif child.tag in _R:
+            for t in child:
+                if t.tag in _T:
+                    parts.append(t.text or "")
+    return "".join(parts)
+
+class _MappedFile(mmap.mmap):
+    """mmap как файл для zipfile (seekable у mmap появился только в Python 3.13)."""
+
+    def seekable(self):
+        return True
+
+class ValuesSheet:
+    """Значения листа в памяти: {строка: кортеж значений со столбца 1}."""
+
+    def __init__(self, title, rows, min_row, max_row, min_column, max_column):
+        self.title = title
+        self._rows = rows
+        self.min_row = min_row
+        self.max_row = max_row
+        self.min_column = min_column
+        self.max_column = max_column
+
+    def _values(self, row, min_col, max_col):
+        values = self._rows.get(row, ())
+        picked = values[min_col - 1:max_col]
+        return picked + (None,) * (max_col - min_col + 1 - len(picked))
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=False):
+        """Как Worksheet.iter_rows: по умолчанию с первой строки и первого столбца."""
+        if not self._rows and not any([min_row, max_row, min_col, max_col]):
+            return
+        min_row, min_col = min_row or 1, min_col or 1
+        max_row, max_col = max_row or self.max_row, max_col or self.max_column
+        for row in range(min_row, max_row + 1):
+            values = self._values(row, min_col, max_col)
+            if values_only:
+                yield values
+            else:
+                yield tuple(ValueCell(row, column, value) for column, value in enumerate(values, start=min_col))
+
+    def cell(self, row, column):
+        values = self._rows.get(row, ())
+        return ValueCell(row, column, values[column - 1] if column <= len(values) else None)
+
+class XlsxValuesReader:
+    """Книга только для чтения значений: sheetnames и reader[имя] → ValuesSheet.
+
+        with XlsxValuesReader(path) as book:
+            ws = book["Part Info"]
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = _MappedFile(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Пустой файл или платформа без mmap для этого файла — читаем обычным образом
+            self._map = None
+        try:
+            self._zip = zipfile.ZipFile(self._map if self._map is not None else self._file)
+            self._sheet_paths = self._read_sheet_paths()
+        except Exception:
+            self.close()
+            raise
+        self._shared_strings = None
+        self._sheets = {}
+
+    @property
+    def sheetnames(self):
+        return list(self._sheet_paths)
+
+    def __contains__(self, name):
+        return name in self._sheet_paths
+
+    def __getitem__(self, name):
+        if name not in self._sheet_paths:
+            raise KeyError(f"Worksheet {name} does not exist.")
+        if name not in self._sheets:
+            self._sheets[name] = self._load_sheet(name)
+        return self._sheets[name]
+
+    def close(self):
+        if getattr(self, "_zip", None) is not None:
+            self._zip.close()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_sheet_paths(self):
+        targets = {}
+        with self._zip.open("xl/_rels/workbook.xml.rels") as f:
+            for _, element in iterparse(f):
+                if element.tag == _RELATIONSHIP:
+                    target = element.get("Target")
+                    # Путь цели — относительно xl/ или абсолютный внутри архива
+                    targets[element.get("Id")] = (target.lstrip("/") if target.startswith("/")
+                                                  else posixpath.normpath(posixpath.join("xl", target)))
+        paths = {}
+        with self._zip.open("xl/workbook.xml") as f:
+            for _, element in iterparse(f):
+                if element.tag in _SHEET:
+                    rel_id = next((element.get(key) for key in _REL_IDS if element.get(key)), None)
+                    if rel_id in targets:
+                        paths[element.get("name")] = targets[rel_id]
+        return paths
+
+    def shared_strings(self):
+        """Список общих строк книги (разбирается при первом обращении)."""
+        if self._shared_strings is None:
+            strings = []
+            if "xl/sharedStrings.xml" in self._zip.namelist():
+                with self._zip.open("xl/sharedStrings.xml") as f:
+                    for _, element in iterparse(f):
+                        if element.tag in _SI:
+                            strings.append(_rich_text(element))
+                            element.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _iter_cells(self, name, merged=None):
+        """Потоково: (номер строки, {столбец: значение}) для строк листа с ячейками.
+
+        Ячейки без значения (только стиль) тоже попадают в словарь — как в openpyxl, они
+        расширяют размеры листа. Диапазоны объединений добавляются в список merged.
+        """
+        strings = None
+        tags = None
+        with self._zip.open(self._sheet_paths[name]) as f:
+            row_number = 0
+            for _, element in iterparse(f):
+                if tags is None:
+                    # Пространство имён листа — по первому элементу (обычное или strict)
+                    ns = element.tag[:element.tag.index("}") + 1] if element.tag.startswith("{") else ""
+                    tags = ns + "row", ns + "c", ns + "v", ns + "is", ns + "mergeCell"
+                    row_tag, c_tag, v_tag, is_tag, merge_tag = tags
+                tag = element.tag
+                if tag != row_tag:
+                    if tag == merge_tag and merged is not None:
+                        merged.append(element.get("ref"))
+                    continue
+                reference = element.get("r")
+                row_number = int(reference) if reference else row_number + 1
+                cells = {}
+                column = 0
+                for c in element:
+                    if c.tag != c_tag:
+                        continue
+                    reference = c.get("r")
+                    column = _column_index(reference) if reference else column + 1
+                    data_type = c.get("t", "n")
+                    value = None
+                    if data_type == "inlineStr":
+                        inline = c.find(is_tag)
+                        value = _rich_text(inline) if inline is not None else None
+                    else:
+                        v = c.find(v_tag)
+                        text = v.text if v is not None else None
+                        if text is not None:
+                            if data_type == "n":
+                                value = _cast_number(text)
+                            elif data_type == "s":
+                                if strings is None:
+                                    strings = self.shared_strings()
+                                value = strings[int(text)]
+                            elif data_type == "b":
+                                value = bool(int(text))
+                            else:  # str, e, d — текст как есть
+                                value = text
+                    cells[column] = value
+                element.clear()
+                if cells:
+                    yield row_number, cells
+
+    def iter_sheet_rows(self, name):
+        """Потоково: (номер строки, кортеж значений со столбца 1) без загрузки листа целиком."""
+        for row_number, cells in self._iter_cells(name):
+            yield row_number, tuple(cells.get(i) for i in range(1, max(cells) + 1))
+
+    def _load_sheet(self, name):
+        merged = []
+        rows = dict(self._iter_cells(name, merged))
+        # openpyxl заполняет объединённый диапазон пустыми ячейками — размеры листа те же
+        for reference in merged:
+            first, _, last = reference.partition(":")
+            min_col, min_row = _column_index(first), _row_index(first)
+            max_col, max_row = (_column_index(last), _row_index(last)) if last else (min_col, min_row)
+            for row in range(min_row, max_row + 1):
+                cells = rows.setdefault(row, {})
+                for column in range(min_col, max_col + 1):
+                    cells.setdefault(column, None)
+        if not rows:
+            return ValuesSheet(name, {}, 1, 1, 1, 1)
+        values = {row: tuple(cells.get(i) for i in range(1, max(cells) + 1)) for row, cells in rows.items()}
+        logger.debug("📖 Лист '%s' прочитан: строк %s", name, len(rows))
+        return ValuesSheet(name, values, min(rows), max(rows),
+                           min(min(cells) for cells in rows.values()), max(max(cells) for cells in rows.values()))
+
+def open_values_workbook(path, backend="openpyxl"):
+    """Книга для чтения значений: "openpyxl" — load_workbook (эталон), "xml" — XlsxValuesReader."""
+    if backend == "xml":
+        return XlsxValuesReader(path)
+    if backend == "openpyxl":
+        import openpyxl
+        return openpyxl.load_workbook(path)
+    raise ValueError(f"Неизвестный способ чтения книги: {backend}")